@@ -8,6 +8,9 @@ from pytz import timezone
 #from smoke.box.Box import Box
 from box.Box import Box
 from box.FeatureTimeSpaceGrid import load_FeatureTimeSpaceGrid
+from box.cell_vector import pack_cells, unpack_cells
+from box.storage_dtype import resolve_storage_dtype
+from box.chunked_grid import CHUNKED_SUFFIX
 from amalgamate.errors.errors import NoValidValuesInGrid, IncompletePredictionSet, NoCorrespondingLabel
 
 
@@ -15,11 +18,25 @@ class Amalgamator:
 
     def __init__(self, pm25_labels_folder=None, firework_ftsg_folder=None,
                  bluesky_ftsg_folder=None, modisaod_ftsg_folder=None,
-                 modisfrp_ftsg_folder=None, noaa_grid_folder=None):
+                 modisfrp_ftsg_folder=None, noaa_grid_folder=None,
+                 area_of_interest=None, dtype=None, catalog=None):
         """ Create instance of amalgamator which will create pytorch tensors
         from the pm2.5 ground truths and prediction datasets located in the
         given file directories
 
+        :param area_of_interest: Boolean mask of cells to keep, if given every
+                                 dataset is streamed and stacked as packed cell
+                                 vectors of shape (n_features, n_aoi_cells)
+                                 instead of full grids, default None
+        :type area_of_interest: np.array, optional
+        :param dtype: Floating point dtype grids are loaded and tensors are
+                      made as, float16 giving torch.HalfTensor tensors,
+                      default None uses float32
+        :type dtype: str, optional
+        :param catalog: Catalog of saved FTSGs, if given FTSGs it records as
+                        all nan or without data at a label time are rejected
+                        without loading them, default None
+        :type catalog: FTSGCatalog, optional
         """
         self.pm25_labels_folder = pm25_labels_folder
 
@@ -28,6 +45,9 @@ class Amalgamator:
         self.modisaod_ftsg_folder = modisaod_ftsg_folder
         self.modisfrp_ftsg_folder = modisfrp_ftsg_folder
         self.noaa_grid_folder = noaa_grid_folder
+        self.area_of_interest = area_of_interest
+        self.dtype = resolve_storage_dtype(dtype)
+        self.catalog = catalog
 
     #     self.pm25_arr = None
     #     self.pm25_mask = None
@@ -98,15 +118,14 @@ class Amalgamator:
         return os.path.isfile(abs_file_path)
 
 
-    def _load_ftsg_containing_time(self,
-                                   _time,
-                                   file_directory,
-                                   file_prefix='',
-                                   ftsg_time_res_h=1):
-        """ Creates a file name of saved FTSG which theoretically would contain
-        _time given, then attempts to load it, raising FileNotFoundError if
-        the file could not be found and NoValidValuesInGrid is gri loaded is
-        all nan.
+    def _get_ftsg_file_name(self,
+                            _time,
+                            file_directory,
+                            file_prefix='',
+                            ftsg_time_res_h=1):
+        """ Creates the file name of saved FTSG which theoretically would
+        contain _time given, preferring the chunked format if the grid was
+        saved in it.
 
         """
         # Floor round time to nearest lowest 00h, this will be the endtime
@@ -119,22 +138,94 @@ class Amalgamator:
             day_endtime = datetime(_time.year, _time.month, _time.day) + timedelta(days=1)  # Round up then add a day to floor
         day_str_endtime = day_endtime.strftime('%Y%m%dT%H%M%S')
         day_str_starttime = (day_endtime - timedelta(days=1)).strftime('%Y%m%dT%H%M%S')
-        file_name = (
-            f"{file_prefix}strt{day_str_starttime}_stop{day_str_endtime}_res{ftsg_time_res_h}.tar.gz"
-        )
+        unique_name = f"{file_prefix}strt{day_str_starttime}_stop{day_str_endtime}_res{ftsg_time_res_h}"
+
+        # Prefer the chunked format if the grid was saved in it
+        file_name = unique_name + CHUNKED_SUFFIX
+        if not os.path.isdir(os.path.join(file_directory, file_name)):
+            file_name = unique_name + '.tar.gz'
+        return file_name
+
+    def _check_catalog(self,
+                       _time,
+                       file_directory,
+                       file_prefix='',
+                       ftsg_time_res_h=1,
+                       require_valid_time=False):
+        """ Using amalgamator's catalog, raises NoValidValuesInGrid if the
+        saved FTSG which would contain _time is all nan, or if
+        require_valid_time has no valid data at _time, without loading it.
+        Does nothing if there is no catalog or FTSG is not recorded in it.
 
+        """
+        if self.catalog is None:
+            return
+        file_name = self._get_ftsg_file_name(_time, file_directory, file_prefix, ftsg_time_res_h)
+        entry = self.catalog.get_entry(os.path.join(file_directory, file_name))
+        if entry is None:
+            return
+        if entry.is_all_nan():
+            raise NoValidValuesInGrid(
+                f'FTSG file name containing {_time} which is {file_name} has no valid data.'
+            )
+        if require_valid_time and not entry.has_valid_data(time=_time):
+            raise NoValidValuesInGrid(
+                f'FTSG file has no valid data for {_time}.'
+            )
+
+    def _check_catalog_datasets(self, label_time, dataset_list):
+        """ Raises IncompletePredictionSet if amalgamator's catalog records any
+        FTSG of dataset_list needed for label_time as having no valid data,
+        so incomplete prediction sets are found before loading any grid.
+
+        """
+        for dataset in dataset_list:
+            try:
+                if dataset.startswith('firework_'):
+                    self._check_catalog(label_time, self.firework_ftsg_folder,
+                                        dataset + '_', require_valid_time=True)
+                elif dataset.startswith('bluesky_'):
+                    self._check_catalog(label_time, self.bluesky_ftsg_folder,
+                                        dataset + '_', require_valid_time=True)
+                elif dataset == 'modisaod':
+                    self._check_catalog(label_time, self.modisaod_ftsg_folder,
+                                        'modisaod_', ftsg_time_res_h=6)
+                elif dataset == 'modisfrp':
+                    self._check_catalog(label_time, self.modisfrp_ftsg_folder,
+                                        'modisfrp_')
+            except NoValidValuesInGrid as e:
+                raise IncompletePredictionSet(
+                    f"Incomplete prediction set with dataset: {dataset} raising:\n{str(e)}"
+                )
+
+    def _load_ftsg_containing_time(self,
+                                   _time,
+                                   file_directory,
+                                   file_prefix='',
+                                   ftsg_time_res_h=1):
+        """ Creates a file name of saved FTSG which theoretically would contain
+        _time given, then attempts to load it, raising FileNotFoundError if
+        the file could not be found and NoValidValuesInGrid is gri loaded is
+        all nan.
+
+        """
+        file_name = self._get_ftsg_file_name(_time, file_directory, file_prefix, ftsg_time_res_h)
+
+        # Grids the catalog records as all nan were already rejected by
+        # make_pytorch_tensor's _check_catalog_datasets
         try:
             # Load FeatureTimeSpaceGrid and return
             ftsg = load_FeatureTimeSpaceGrid(
                 os.path.join(
                     file_directory,
                     file_name
-                )
+                ),
+                dtype=self.dtype
             )
 
             # If is an all nan grid, raise exception stating that it is else,
             # return valid grid
-            if np.isnan(ftsg.get_grid()).all():
+            if ftsg.is_all_nan():
                 raise NoValidValuesInGrid(
                     f'FTSG file name containing {_time} which is {file_name} has no valid data.'
                 )
@@ -146,6 +237,29 @@ class Amalgamator:
                 f'Generated FTSG file name containing {_time} which is {file_name} does not exist.'
             )
 
+    def _get_time_slice(self, ftsg, time_index):
+        """ Return grid of every feature of ftsg at time_index with nan's
+        converted to -1, as packed cell vectors of the area of interest if
+        amalgamator has one and as full grids if not, whichever way ftsg
+        stores its grid.
+
+        """
+        time_slice = ftsg.read_slice(time_index)
+        ftsg_aoi = ftsg.box.get_area_of_interest() if ftsg.is_packed() else None
+
+        # Nothing to convert if already in the layout we want
+        if ftsg_aoi is None and self.area_of_interest is None:
+            return time_slice
+        if (ftsg_aoi is not None and self.area_of_interest is not None and
+                np.array_equal(ftsg_aoi, self.area_of_interest)):
+            return time_slice
+
+        if ftsg_aoi is not None:
+            time_slice = unpack_cells(time_slice, ftsg_aoi, fill_val=-1)
+        if self.area_of_interest is not None:
+            time_slice = pack_cells(time_slice, self.area_of_interest)
+        return time_slice
+
     def _get_closest_previous_release_time(self, _time, daily_release_time_h):
         """ Based on the hour that item is released at daily, generates the
         closest previous release time to _time given.
@@ -184,8 +298,8 @@ class Amalgamator:
         # Return array of firework forecast at label_time if is not all nan,
         # raise no NoValidValuesInGrid if is all nan
         time_index = ftsg.get_time_index(label_time)
-        if not np.isnan(ftsg.get_grid()[:, time_index]).all():
-            return ftsg.get_grid_nan_converted()[:, time_index]
+        if not ftsg.is_time_all_nan(time_index):
+            return self._get_time_slice(ftsg, time_index)
         else:
             raise NoValidValuesInGrid(
                 f'FTSG file has no valid data for {label_time}.'
@@ -203,8 +317,8 @@ class Amalgamator:
         # Return array of bluesky forecast at label_time if is not all nan,
         # raise no NoValidValuesInGrid if is all nan
         time_index = ftsg.get_time_index(label_time)
-        if not np.isnan(ftsg.get_grid()[:, time_index]).all():
-            return ftsg.get_grid_nan_converted()[:, time_index]
+        if not ftsg.is_time_all_nan(time_index):
+            return self._get_time_slice(ftsg, time_index)
         else:
             raise NoValidValuesInGrid(
                 f'FTSG file has no valid data for {label_time}.'
@@ -235,11 +349,9 @@ class Amalgamator:
         )
 
         # Return time array closest to label time
-        before_inc_release_time = ftsg.get_times() <= label_time
-        closest_time_index = ftsg.get_time_index(
-            ftsg.get_times()[before_inc_release_time][-1]
-        )
-        return ftsg.get_grid_nan_converted()[:, closest_time_index]
+        before_inc_release_time = ftsg.get_times() <= np.datetime64(label_time, 'ns')
+        closest_time_index = np.flatnonzero(before_inc_release_time)[-1]
+        return self._get_time_slice(ftsg, closest_time_index)
 
     def modisfrp(self, label_time, modisfrp_daily_release_time_h=10, ftsg_time_res_h=1):
         # # Get closest last release time for files
@@ -269,7 +381,7 @@ class Amalgamator:
         # don't raise no NoValidValuesInGrid if is all nan for modisFRP
         # since no value represents no fire at place
         time_index = ftsg.get_time_index(label_time)
-        return ftsg.get_grid_nan_converted()[:, time_index]
+        return self._get_time_slice(ftsg, time_index)
 
     def noaa(self, label_time, noaa_grid_folder):
         label_datetime_str = label_time.strftime('%Y%m%d-%H')
@@ -277,11 +389,13 @@ class Amalgamator:
             filename = file.replace(".npy","")
             if filename == label_datetime_str:
                 try:
-                    arr = np.load(noaa_grid_folder+str(file))
+                    arr = np.load(noaa_grid_folder+str(file)).astype(self.dtype, copy=False)
                 except FileNotFoundError:
                     raise FileNotFoundError(
                     f'{label_datetime_str} at {label_time} does not exist.'
                     )
+                if self.area_of_interest is not None:
+                    arr = pack_cells(arr, self.area_of_interest)
                 return arr
 
     def make_pytorch_file_name(self, save_directory, label_time):
@@ -321,7 +435,8 @@ class Amalgamator:
         '''
         # NOTE: PyTorch tensors are "channel-first", meaning
         # the feature dimension comes first (i.e. tensor shapes are (n_features, grid_h, grid_w))
-        # This should be the shape that is returned by each of the individual dataset functions
+        # This should be the shape that is returned by each of the individual dataset functions,
+        # or (n_features, n_aoi_cells) if amalgamator has an area of interest
 
         # Check if labels exist for given label time, raising error is not
         if not self.check_pm25_PST_file_exists(label_time):
@@ -332,6 +447,9 @@ class Amalgamator:
         # Append grids of all desired features to one list and then stack
         # them to one array, raise IncompletePredictionSet error if any
         # prediction dataset appending raises NoValidValuesInGrid
+        # Reject incomplete sets the catalog knows of before loading any grid
+        self._check_catalog_datasets(label_time, dataset_list)
+
         master_arr = []
         try:
             for dataset in dataset_list:
@@ -372,8 +490,8 @@ class Amalgamator:
                 f"Incomplete prediction set with dataset: {dataset} raising:\n{str(e)}"
             )
 
-        master_arr = np.vstack(master_arr)
-        master_tensor = torch.from_numpy(master_arr).type(torch.FloatTensor)
+        master_arr = np.vstack(master_arr).astype(self.dtype, copy=False)
+        master_tensor = torch.from_numpy(master_arr)
 
         # Create file name from label_time and save_directory
         pt_file_save_path = self.make_pytorch_file_name(save_directory,
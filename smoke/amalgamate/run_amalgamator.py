@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 
 from smoke.amalgamate.Amalgamator import Amalgamator
 from smoke.amalgamate.errors.errors import IncompletePredictionSet, NoCorrespondingLabel
+from smoke.box.FTSGCatalog import FTSGCatalog
 
 
 @click.command(
@@ -72,6 +73,13 @@ def main(path_to_config, output_directory, logging_level):
         tensor_datasets.append("noaa")
     logger.info(f"Datasets included in tensor: {tensor_datasets}")
 
+    # Open catalog of saved FTSGs if one is kept to skip incomplete sets
+    # without loading grids
+    catalog = None
+    if loaded_yaml.get('catalog_path'):
+        catalog = FTSGCatalog(loaded_yaml['catalog_path'])
+        logger.info(f"Using FTSG catalog at {loaded_yaml['catalog_path']}")
+
     # Create amalgamator with file directory specifications in config
     amalgamator = Amalgamator(
         pm25_labels_folder = loaded_yaml['pm25_labels_folder'],
@@ -79,7 +87,9 @@ def main(path_to_config, output_directory, logging_level):
         bluesky_ftsg_folder = loaded_yaml['bluesky_ftsg_folder'],
         modisaod_ftsg_folder = loaded_yaml['modisaod_ftsg_folder'],
         modisfrp_ftsg_folder = loaded_yaml['modisfrp_ftsg_folder'],
-        noaa_grid_folder = loaded_yaml['noaa_grid_folder']
+        noaa_grid_folder = loaded_yaml['noaa_grid_folder'],
+        dtype = loaded_yaml.get('tensor_dtype'),
+        catalog = catalog
     )
 
     # Create tensor for every label time in tensor
@@ -0,0 +1,104 @@
+import math
+from collections import OrderedDict
+
+
+class AssignmentCache:
+    # Approximate bytes one entry costs in the OrderedDict, counting the
+    # dict node, the quantized key tuple and the stored assignment tuple
+    BYTES_PER_ENTRY = 320
+
+    def __init__(self, precision=6, max_bytes=64 * 1024 ** 2):
+        """ Create a least recently used cache of cell assignments keyed on
+        latitude, longitude quantized to a number of decimal places, so
+        coordinates differing only by float noise share an entry.
+
+        :param precision: Decimal places to quantize coordinates to, default 6
+                          (about 0.1 m)
+        :type precision: int, optional
+        :param max_bytes: Approximate memory cap of cache, least recently used
+                          entries are evicted beyond it, default 64 MiB
+        :type max_bytes: int, optional
+        """
+        self.precision = precision
+        self.scale = 10 ** precision
+        self.max_bytes = max_bytes
+        self.max_entries = max(1, max_bytes // self.BYTES_PER_ENTRY)
+
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _quantize(self, lat, lon):
+        # Integer keys avoid float noise, non finite coords are never cached
+        if not (math.isfinite(lat) and math.isfinite(lon)):
+            return None
+        return (int(round(lat * self.scale)), int(round(lon * self.scale)))
+
+    def __contains__(self, lat_lon):
+        key = self._quantize(*lat_lon)
+        return key is not None and key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, lat, lon):
+        """ Return stored assignment of lat, lon marking it as most recently
+        used, or None if it was not stored
+
+        :param lat: Latitude to get assignment of
+        :type lat: float
+        :param lon: Longitude to get assignment of
+        :type lon: float
+        :returns: Stored assignment or None
+        :rtype: tuple or None
+        """
+        key = self._quantize(lat, lon)
+        if key is None or key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, lat, lon, assignment):
+        """ Store assignment of lat, lon evicting least recently used entries
+        if cache is then over its memory cap
+
+        :param lat: Latitude to store assignment of
+        :type lat: float
+        :param lon: Longitude to store assignment of
+        :type lon: float
+        :param assignment: Assignment to store
+        :type assignment: tuple
+        """
+        key = self._quantize(lat, lon)
+        if key is None:
+            return
+        self.entries[key] = assignment
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """ Remove all entries, keeping counters
+
+        """
+        self.entries.clear()
+
+    def get_stats(self):
+        """ Return counters and size of cache
+
+        :returns: Dictionary of hits, misses, evictions, entries, max_entries
+                  and precision
+        :rtype: dict
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "precision": self.precision
+        }
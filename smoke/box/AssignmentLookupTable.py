@@ -0,0 +1,106 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import numpy as np
+
+
+class AssignmentLookupTable:
+    # Bump whenever a change alters assignments so stale tables are not
+    # reused, 2 since corner distances come from smoke.box.geodesic
+    TABLE_VERSION = 2
+
+    def __init__(self, table_dir):
+        """ Create an on disk store of cell assignments for source coordinate
+        grids, so grids which never change (e.g. Firework and BlueSky) are only
+        ever assigned to a Box once. Each table is a .npy file of shape
+        (2, *grid_shape) holding rows then cols, named by a fingerprint of the
+        coordinates and the Box args, which is memory mapped read only when
+        loaded so workers share one copy through the page cache.
+
+        :param table_dir: Directory to store and find lookup tables in
+        :type table_dir: str
+        """
+        self.table_dir = table_dir
+        os.makedirs(self.table_dir, exist_ok=True)
+
+        # Tables already opened by this process, by file path
+        self.opened_tables = {}
+
+        # Get logger
+        self.logger = logging.getLogger(__name__)
+
+    def fingerprint(self, box, lat, lon, method='consensus'):
+        """ Return hex digest uniquely identifying the pairing of the given
+        coordinate grid with the Box it is assigned to, and how
+
+        :param box: Theoretical space grid coordinates are assigned to
+        :type box: smoke.box.Box
+        :param lat: Array of latitudes of source grid
+        :type lat: np.array
+        :param lon: Array of longitudes of source grid, same shape as lat
+        :type lon: np.array
+        :param method: Assignment method of Box.assign_cells, default 'consensus'
+        :type method: str, optional
+        :returns: Fingerprint of source grid and Box
+        :rtype: str
+        """
+        lat = np.ascontiguousarray(lat, dtype=np.float64)
+        lon = np.ascontiguousarray(lon, dtype=np.float64)
+        sha = hashlib.sha1()
+        sha.update(json.dumps([self.TABLE_VERSION, method] + list(box.get_orig_box_args())).encode())
+        sha.update(json.dumps(list(lat.shape)).encode())
+        sha.update(lat.tobytes())
+        sha.update(lon.tobytes())
+        return sha.hexdigest()
+
+    def get_table_path(self, box, lat, lon, method='consensus'):
+        """ Return path the lookup table for coordinate grid and Box is stored at
+
+        :returns: Path to .npy lookup table
+        :rtype: str
+        """
+        return os.path.join(self.table_dir, self.fingerprint(box, lat, lon, method) + '.npy')
+
+    def get_assignments(self, box, lat, lon, method='consensus'):
+        """ Return the cell assignments of every coordinate in the grid,
+        loading them from disk if the grid has been assigned to this Box
+        before, otherwise assigning with Box.assign_cells and persisting them.
+
+        :param box: Theoretical space grid to assign coordinates to
+        :type box: smoke.box.Box
+        :param lat: Array of latitudes of source grid
+        :type lat: np.array
+        :param lon: Array of longitudes of source grid, same shape as lat
+        :type lon: np.array
+        :param method: Assignment method of Box.assign_cells, default 'consensus'
+        :type method: str, optional
+        :returns: Read only arrays of jth row indices and ith column indices in
+                  shape of lat, -1 where outside of Box
+        :rtype: (np.array, np.array)
+        """
+        table_path = self.get_table_path(box, lat, lon, method)
+
+        if table_path not in self.opened_tables:
+            if not os.path.isfile(table_path):
+                self._build_table(box, lat, lon, method, table_path)
+            self.opened_tables[table_path] = np.load(table_path, mmap_mode='r')
+
+        table = self.opened_tables[table_path]
+        return table[0], table[1]
+
+    def _build_table(self, box, lat, lon, method, table_path):
+        # Assign and write to a temporary file in the same directory first,
+        # then rename so other processes never see a partially written table
+        row, col = box.assign_cells(lat, lon, method)
+        f_temp, temp_path = tempfile.mkstemp(dir=self.table_dir, suffix='.npy.tmp')
+        try:
+            with os.fdopen(f_temp, 'wb') as f_npy:
+                np.save(f_npy, np.stack((row, col)))
+            os.replace(temp_path, table_path)
+        except BaseException:
+            if os.path.isfile(temp_path):
+                os.remove(temp_path)
+            raise
+        self.logger.info(f"Built assignment lookup table {table_path} for grid of shape {np.shape(lat)}")
@@ -0,0 +1,157 @@
+import os
+import json
+import bisect
+from collections import Counter
+
+
+class LatencyHistogram:
+    # Upper bounds of buckets in seconds, last bucket is everything slower
+    BUCKET_BOUNDS_S = (1e-5, 3e-5, 1e-4, 3e-4, 1e-3, 3e-3, 1e-2, 3e-2, 0.1, 0.3, 1, 3, 10)
+
+    def __init__(self):
+        """ Create histogram of call latencies, with count, total, min and max
+
+        """
+        self.bucket_counts = [0] * (len(self.BUCKET_BOUNDS_S) + 1)
+        self.count = 0
+        self.total_s = 0.0
+        self.min_s = None
+        self.max_s = None
+
+    def record(self, elapsed_s):
+        """ Add latency of one call to histogram
+
+        :param elapsed_s: Latency of call in seconds
+        :type elapsed_s: float
+        """
+        self.bucket_counts[bisect.bisect_left(self.BUCKET_BOUNDS_S, elapsed_s)] += 1
+        self.count += 1
+        self.total_s += elapsed_s
+        self.min_s = elapsed_s if self.min_s is None else min(self.min_s, elapsed_s)
+        self.max_s = elapsed_s if self.max_s is None else max(self.max_s, elapsed_s)
+
+    def to_dict(self):
+        """ Return histogram as json serializable dictionary, buckets keyed on
+        their upper bound in seconds
+
+        :rtype: dict
+        """
+        bucket_names = [f"<={bound:g}" for bound in self.BUCKET_BOUNDS_S]
+        bucket_names.append(f">{self.BUCKET_BOUNDS_S[-1]:g}")
+        return {
+            "count": self.count,
+            "total_s": self.total_s,
+            "mean_s": self.total_s / self.count if self.count else None,
+            "min_s": self.min_s,
+            "max_s": self.max_s,
+            "buckets": dict(zip(bucket_names, self.bucket_counts))
+        }
+
+
+class AssignmentTelemetry:
+
+    def __init__(self):
+        """ Create record of where a Box spends its cell assignment time:
+        latency histograms per assignment call, points assigned, SLSQP solver
+        calls, iterations and failures, consensus agreement levels,
+        fallbacks and adaptive consensus cold resolves. Cache hits are read from the Box's cache when dumped.
+
+        """
+        self.latencies = {}
+        self.points_assigned = Counter()
+        self.solver_calls = 0
+        self.solver_calls_saved = 0
+        self.solver_iterations = 0
+        self.solver_failures = 0
+        self.consensus_assignments = 0
+        self.agreement_levels = Counter()
+        self.fallbacks = 0
+        self.cold_resolves = 0
+
+    def record_latency(self, call_name, elapsed_s, num_points=1):
+        """ Record latency of an assignment call and the points it assigned
+
+        :param call_name: Name of call, e.g. 'get_cell_assignment'
+        :type call_name: str
+        :param elapsed_s: Latency of call in seconds
+        :type elapsed_s: float
+        :param num_points: Number of points assigned by call, default 1
+        :type num_points: int, optional
+        """
+        if call_name not in self.latencies:
+            self.latencies[call_name] = LatencyHistogram()
+        self.latencies[call_name].record(elapsed_s)
+        self.points_assigned[call_name] += num_points
+
+    def record_solve(self, res):
+        """ Record a SLSQP solver call from its result
+
+        :param res: Result of scipy.optimize.minimize
+        :type res: scipy.optimize.OptimizeResult
+        """
+        self.solver_calls += 1
+        self.solver_iterations += int(getattr(res, 'nit', 0))
+        if not res.success:
+            self.solver_failures += 1
+
+    def record_consensus(self, agreement, fallback, solver_calls_saved=0):
+        """ Record outcome of one consensus assignment
+
+        :param agreement: Number of solves agreeing on the most common cell
+        :type agreement: int
+        :param fallback: Whether there was no agreement of at least 3 so the
+                         four corner solve was used
+        :type fallback: bool
+        :param solver_calls_saved: Solver calls skipped by stopping early,
+                                   default 0
+        :type solver_calls_saved: int, optional
+        """
+        self.consensus_assignments += 1
+        self.agreement_levels[agreement] += 1
+        self.fallbacks += int(fallback)
+        self.solver_calls_saved += solver_calls_saved
+
+    def record_cold_resolve(self):
+        """ Record an adaptive consensus assignment solved again cold started
+        as a solution was too close to a cell edge
+
+        """
+        self.cold_resolves += 1
+
+    def to_dict(self, cache_stats=None):
+        """ Return telemetry as json serializable dictionary
+
+        :param cache_stats: Stats of assignment cache to include, default None
+        :type cache_stats: dict, optional
+        :rtype: dict
+        """
+        return {
+            "latency": {name: hist.to_dict() for name, hist in self.latencies.items()},
+            "points_assigned": dict(self.points_assigned),
+            "solver": {
+                "calls": self.solver_calls,
+                "calls_saved": self.solver_calls_saved,
+                "iterations": self.solver_iterations,
+                "failures": self.solver_failures
+            },
+            "consensus": {
+                "assignments": self.consensus_assignments,
+                "agreement_levels": {str(k): v for k, v in sorted(self.agreement_levels.items())},
+                "fallbacks": self.fallbacks,
+                "cold_resolves": self.cold_resolves
+            },
+            "cache": cache_stats
+        }
+
+    def dump_json(self, file_path, cache_stats=None):
+        """ Write telemetry to json file, making its directory if needed
+
+        :param file_path: Path of json file to write
+        :type file_path: str
+        :param cache_stats: Stats of assignment cache to include, default None
+        :type cache_stats: dict, optional
+        """
+        file_dir = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(file_dir, exist_ok=True)
+        with open(file_path, 'w') as f_json:
+            json.dump(self.to_dict(cache_stats), f_json, indent=2)
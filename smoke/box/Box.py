@@ -16,17 +16,46 @@ import pandas as pd
 from geopy.distance import distance
 from mpl_toolkits.basemap import Basemap
 from scipy.optimize import Bounds, minimize
+from scipy.spatial import cKDTree
 from shapely.geometry import Point, Polygon
+try:
+    from shapely import contains_xy
+except ImportError:
+    # shapely < 2.0, where shapely.vectorized is not yet deprecated
+    from shapely.vectorized import contains as contains_xy
 
 import logging
 
+from .AssignmentCache import AssignmentCache
+from .AssignmentTelemetry import AssignmentTelemetry
+from .BoxRegistry import BoxSpec, get_default_registry
+from .geodesic import distances_to_points, geodetic_to_ecef
+from .cell_vector import pack_cells, packed_index, unpack_cells
+
 class Box():
-    def __init__(self, nw_lat, nw_lon, sw_lat_est, sw_lon_est, dist, res):
+    # Gauss-Newton refinements used by assign_cells, and the documented worst
+    # case disagreement in cells on either axis with get_cell_assignment
+    ASSIGN_CELLS_ITERATIONS = 8
+    ASSIGN_CELLS_TOLERANCE_CELLS = 1
+    # Method of smoke.box.geodesic used for distances to corners of arrays of
+    # points, 'vincenty' matches geopy, 'spherical' is faster but approximate
+    CORNER_DISTANCE_METHOD = 'vincenty'
+    # Gauss-Newton refinements used to map planar positions back to lat, lon
+    CELL_LATTICE_ITERATIONS = 4
+    # Distance in km from a cell edge within which adaptive consensus solves
+    # a point again cold started, as warm starts may land across the edge
+    ADAPTIVE_CONSENSUS_EDGE_TOLERANCE_KM = 0.01
+    # Methods assign_cells can assign with
+    ASSIGNMENT_METHODS = ('consensus', 'kdtree')
+
+    def __init__(self, nw_lat, nw_lon, sw_lat_est, sw_lon_est, dist, res,
+                 cache_precision=6, cache_max_bytes=64 * 1024 ** 2,
+                 corners=None, registry=None, adaptive_consensus=False):
         # Save exact args used to make Box
         self.orig_box_args =  (nw_lat, nw_lon, sw_lat_est, sw_lon_est, dist, res)
 
-        # Create dictionary to store previously assigned coordinates
-        self.previous_assignments = {}
+        # Create bounded cache to store previously assigned coordinates
+        self.previous_assignments = AssignmentCache(cache_precision, cache_max_bytes)
 
         self.nw_lat = nw_lat
         self.nw_lon = nw_lon
@@ -37,11 +66,6 @@ class Box():
         self.se_lat = None
         self.se_lon = None
 
-        # # FOR DEBUGGING PURPOSES:
-        # self.err_count = 0
-        # self.correct_count = 0
-        # self.total_count = 0
-
         self.dist = dist
         self.res = res
         self.num_cells = dist // res
@@ -49,7 +73,39 @@ class Box():
         # Calculate index of last cell
         self.last_cell_indx = self.num_cells - 1
 
-        self._compute_box_coords()
+        # Whether get_cell_assignment warm starts from the previous point and
+        # stops solving once consensus is reached
+        self.adaptive_consensus = adaptive_consensus
+        self.previous_solution = None
+
+        # Record of where assignment time goes
+        self.telemetry = AssignmentTelemetry()
+
+        # Lat, lon of cell centers and cell corner lattice, computed on first use
+        self.cell_centers = None
+        self.cell_corners = None
+
+        # KD-tree of cell centers in ECEF coordinates, built on first use
+        self.cell_center_tree = None
+
+        # Optional mask of cells in area of interest for packed cell vectors
+        self.aoi_mask = None
+        self.aoi_packed_index = None
+
+        # Use given or previously solved corners if there are any, otherwise
+        # solve and remember them for next time. The default registry keeps
+        # them for the process, persisting them only if SMOKE_BOX_REGISTRY is set
+        if registry is None:
+            registry = get_default_registry()
+        if corners is None and registry is not None:
+            corners = registry.get_corners(self.orig_box_args)
+        if corners is None:
+            self._compute_box_coords()
+            if registry is not None:
+                registry.store_corners(self.orig_box_args, self.get_corners())
+        else:
+            (self.sw_lat, self.sw_lon, self.ne_lat,
+             self.ne_lon, self.se_lat, self.se_lon) = corners
 
         self.poly = Polygon([(self.nw_lat, self.nw_lon), (self.ne_lat, self.ne_lon),
                     (self.se_lat, self.se_lon), (self.sw_lat, self.sw_lon)])
@@ -57,17 +113,72 @@ class Box():
         # Get logger
         self.logger = logging.getLogger(__name__)
 
+    def __reduce__(self):
+        # Pickle as spec, settings and area of interest only, leaving out
+        # polygon, logger and caches
+        return (self.__class__.from_spec,
+                (self.to_spec(), self.previous_assignments.precision,
+                 self.previous_assignments.max_bytes, self.adaptive_consensus),
+                {"aoi_mask": self.aoi_mask})
+
+    def __setstate__(self, state):
+        if state["aoi_mask"] is not None:
+            self.set_area_of_interest(state["aoi_mask"])
+
+    @classmethod
+    def from_spec(cls, spec, cache_precision=6, cache_max_bytes=64 * 1024 ** 2,
+                  adaptive_consensus=False):
+        """ Rehydrate a Box from its BoxSpec without solving for corners.
+        Subclasses whose __init__ does not take the Box args override this.
+
+        :param spec: Spec of Box to create
+        :type spec: smoke.box.BoxRegistry.BoxSpec
+        :param cache_precision: Decimal places assignment cache quantizes
+                                coordinates to, default 6
+        :type cache_precision: int, optional
+        :param cache_max_bytes: Approximate memory cap of assignment cache,
+                                default 64 MiB
+        :type cache_max_bytes: int, optional
+        :param adaptive_consensus: Whether get_cell_assignment warm starts and
+                                   stops at consensus, default False
+        :type adaptive_consensus: bool, optional
+        :returns: Box described by spec
+        :rtype: Box
+        """
+        return cls(*spec.get_orig_box_args(), cache_precision=cache_precision,
+                   cache_max_bytes=cache_max_bytes, corners=spec.get_corners(),
+                   adaptive_consensus=adaptive_consensus)
+
+    def to_spec(self):
+        """ Return compact immutable spec of Box, to send to workers in place
+        of the Box itself
+
+        :returns: Spec of Box
+        :rtype: smoke.box.BoxRegistry.BoxSpec
+        """
+        return BoxSpec(*self.orig_box_args, *self.get_corners())
+
+    def get_corners(self):
+        """ Return tuple of solved corners in order sw_lat, sw_lon, ne_lat,
+        ne_lon, se_lat, se_lon
+
+        :returns: Solved corners of Box
+        :rtype: tuple
+        """
+        return (self.sw_lat, self.sw_lon, self.ne_lat,
+                self.ne_lon, self.se_lat, self.se_lon)
+
     def _assert_optim(self, res, optim_func):
         try:
-            assert(res.message == 'Optimization terminated successfully.')
+            assert(res.success)
         except AssertionError:
             print(res)
-            print('%s optimization call did not terminate successfully for %.5f, %.5f' % (optim_func.__name__))
+            print('%s optimization call did not terminate successfully' % (optim_func.__name__))
             sys.exit(1)
 
     def _assert_assign_optim(self, res, optim_func, lat, lon):
         try:
-            assert(res.message == 'Optimization terminated successfully.')
+            assert(res.success)
         except AssertionError:
             # print(res)
             # print('%s optimization call did not terminate successfully for %.5f, %.5f' % (optim_func.__name__, lat, lon))
@@ -188,104 +299,403 @@ class Box():
     def _get_euclidean_assignment(self, x, y):
         return int(np.floor(x / self.dist * self.last_cell_indx)), int(np.floor(y / self.dist * self.last_cell_indx))
 
+    def _get_euclidean_assignments(self, x, y):
+        # Array version of _get_euclidean_assignment
+        return (np.floor(x / self.dist * self.last_cell_indx).astype(np.int32),
+                np.floor(y / self.dist * self.last_cell_indx).astype(np.int32))
+
+    def _get_corner_distances(self, query_lat, query_lon):
+        # Distance from each of nw, ne, se, sw corners to every query point,
+        # stacked into shape (4, n_points)
+        return distances_to_points(
+            np.ravel(query_lat), np.ravel(query_lon),
+            [self.nw_lat, self.ne_lat, self.se_lat, self.sw_lat],
+            [self.nw_lon, self.ne_lon, self.se_lon, self.sw_lon],
+            method=self.CORNER_DISTANCE_METHOD
+        )
+
+    def _solve_planar_positions(self, nw_dist, ne_dist, se_dist, sw_dist):
+        # Closed form trilateration on the planar square (nw at origin, x east,
+        # y south) averaging the two estimates each axis has as initial guess
+        d = self.dist
+        x = ((nw_dist ** 2 - ne_dist ** 2) + (sw_dist ** 2 - se_dist ** 2) + 2 * d ** 2) / (4 * d)
+        y = ((nw_dist ** 2 - sw_dist ** 2) + (ne_dist ** 2 - se_dist ** 2) + 2 * d ** 2) / (4 * d)
+        x, y = np.clip(x, 0, d), np.clip(y, 0, d)
+
+        # Refine with Gauss-Newton steps on the same objective as _four_optim,
+        # clipping to the same bounds the SLSQP calls use
+        corner_x = np.array([0, d, d, 0], dtype=float)[:, np.newaxis]
+        corner_y = np.array([0, 0, d, d], dtype=float)[:, np.newaxis]
+        corner_dist = np.vstack((nw_dist, ne_dist, se_dist, sw_dist))
+        for _ in range(self.ASSIGN_CELLS_ITERATIONS):
+            dx, dy = x - corner_x, y - corner_y
+            curr_dist = np.maximum(np.hypot(dx, dy), 1e-9)
+            resid = curr_dist - corner_dist
+            jac_x, jac_y = dx / curr_dist, dy / curr_dist
+
+            # Solve 2x2 normal equations of every point at once
+            a = np.sum(jac_x * jac_x, axis=0)
+            b = np.sum(jac_x * jac_y, axis=0)
+            c = np.sum(jac_y * jac_y, axis=0)
+            g_x = np.sum(jac_x * resid, axis=0)
+            g_y = np.sum(jac_y * resid, axis=0)
+            det = a * c - b ** 2
+            det[det == 0] = np.inf
+            new_x = x - (c * g_x - b * g_y) / det
+            new_y = y - (a * g_y - b * g_x) / det
+
+            # Where a step leaves the bounds hold that coordinate on the bound
+            # and take a 1D step along the other, as a bounded solver would
+            x_out = (new_x < 0) | (new_x > d)
+            y_out = (new_y < 0) | (new_y > d)
+            new_y[x_out] = y[x_out] - g_y[x_out] / c[x_out]
+            new_x[y_out] = x[y_out] - g_x[y_out] / a[y_out]
+            x, y = np.clip(new_x, 0, d), np.clip(new_y, 0, d)
+
+        return x, y
+
+    def assign_cells(self, lat_array, lon_array, method='consensus'):
+        """ Assign a cell to every latitude, longitude pair at once.
+
+        With method 'consensus' solves the same corner distance problem as
+        get_cell_assignment, but for all points together with array math
+        instead of five SLSQP calls per point. The four corner fit of
+        _four_optim is solved directly, so results match the consensus of
+        get_cell_assignment to within ASSIGN_CELLS_TOLERANCE_CELLS cell on
+        either axis. Around 2% of points differ, those where the three corner
+        solves agree on a neighbouring cell to the four corner one, as happens
+        near cell edges.
+
+        With method 'kdtree' assigns every point to the cell with the nearest
+        center from get_cell_centers, looked up in a KD-tree of their ECEF
+        coordinates. No solving is done per point so it is much faster for
+        large batches (e.g. MODIS swaths), agreeing with 'consensus' to within
+        the same tolerance.
+
+        :param lat_array: Latitudes to assign, any shape
+        :type lat_array: np.array
+        :param lon_array: Longitudes to assign, same shape as lat_array
+        :type lon_array: np.array
+        :param method: One of ASSIGNMENT_METHODS, default 'consensus'
+        :type method: str, optional
+        :return: Arrays of jth row indices and ith column indices in shape of
+                 lat_array, -1 where point falls outside of Box
+        :rtype: (np.array, np.array) of np.int32
+        """
+        if method not in self.ASSIGNMENT_METHODS:
+            raise ValueError(f"Unknown assignment method {method}, use one of {self.ASSIGNMENT_METHODS}")
+
+        start_time = time.perf_counter()
+        lat_array, lon_array = np.asarray(lat_array, dtype=float), np.asarray(lon_array, dtype=float)
+        shape = lat_array.shape
+        flat_lat, flat_lon = lat_array.flatten(), lon_array.flatten()
+
+        row = np.full(flat_lat.size, -1, dtype=np.int32)
+        col = np.full(flat_lat.size, -1, dtype=np.int32)
+
+        # Only solve for points that are within the box
+        within = self.contains_many(flat_lat, flat_lon)
+        if within.any() and method == 'kdtree':
+            row[within], col[within] = self._get_nearest_cells(flat_lat[within], flat_lon[within])
+        elif within.any():
+            nw_dist, ne_dist, se_dist, sw_dist = self._get_corner_distances(
+                flat_lat[within], flat_lon[within]
+            )
+            x, y = self._solve_planar_positions(nw_dist, ne_dist, se_dist, sw_dist)
+            row[within], col[within] = self._get_euclidean_assignments(y, x)
+
+        self.telemetry.record_latency(f'assign_cells_{method}', time.perf_counter() - start_time,
+                                      flat_lat.size)
+        return row.reshape(shape), col.reshape(shape)
+
+    def _planar_to_lat_lon(self, x, y):
+        # Inverse of the corner distance solve, find the lat, lon whose
+        # distances to the four corners best match those of planar x, y.
+        # Starts from bilinear interpolation of the corners then refines with
+        # Gauss-Newton, taking the jacobian from cheap spherical distances
+        d = self.dist
+        u, v = x / d, y / d
+        lat = ((1 - u) * (1 - v) * self.nw_lat + u * (1 - v) * self.ne_lat +
+               u * v * self.se_lat + (1 - u) * v * self.sw_lat)
+        lon = ((1 - u) * (1 - v) * self.nw_lon + u * (1 - v) * self.ne_lon +
+               u * v * self.se_lon + (1 - u) * v * self.sw_lon)
+
+        corner_lats = [self.nw_lat, self.ne_lat, self.se_lat, self.sw_lat]
+        corner_lons = [self.nw_lon, self.ne_lon, self.se_lon, self.sw_lon]
+        corner_x = np.array([0, d, d, 0], dtype=float)[:, np.newaxis]
+        corner_y = np.array([0, 0, d, d], dtype=float)[:, np.newaxis]
+        target_dist = np.hypot(x - corner_x, y - corner_y)
+
+        step = 1e-5
+        for _ in range(self.CELL_LATTICE_ITERATIONS):
+            resid = distances_to_points(lat, lon, corner_lats, corner_lons,
+                                        method=self.CORNER_DISTANCE_METHOD) - target_dist
+            base = distances_to_points(lat, lon, corner_lats, corner_lons, method='spherical')
+            jac_lat = (distances_to_points(lat + step, lon, corner_lats, corner_lons,
+                                           method='spherical') - base) / step
+            jac_lon = (distances_to_points(lat, lon + step, corner_lats, corner_lons,
+                                           method='spherical') - base) / step
+
+            # Solve 2x2 normal equations of every point at once
+            a = np.sum(jac_lat * jac_lat, axis=0)
+            b = np.sum(jac_lat * jac_lon, axis=0)
+            c = np.sum(jac_lon * jac_lon, axis=0)
+            g_lat = np.sum(jac_lat * resid, axis=0)
+            g_lon = np.sum(jac_lon * resid, axis=0)
+            det = a * c - b ** 2
+            det[det == 0] = np.inf
+            lat = lat - (c * g_lat - b * g_lon) / det
+            lon = lon - (a * g_lon - b * g_lat) / det
+
+        return lat, lon
+
+    def _compute_cell_lattices(self):
+        # Cell edges follow _get_euclidean_assignment, so cells are
+        # dist / last_cell_indx wide and the last row and column reach past
+        # the south and east edges of the Box
+        n = int(self.num_cells)
+        cell_width = self.dist / self.last_cell_indx
+        edges = np.arange(n + 1) * cell_width
+        centers = (np.arange(n) + 0.5) * cell_width
+
+        # Solve centers and corners together in a single pass
+        center_y, center_x = np.meshgrid(centers, centers, indexing='ij')
+        corner_y, corner_x = np.meshgrid(edges, edges, indexing='ij')
+        lat, lon = self._planar_to_lat_lon(
+            np.concatenate((center_x.ravel(), corner_x.ravel())),
+            np.concatenate((center_y.ravel(), corner_y.ravel()))
+        )
+        self.cell_centers = (lat[:n * n].reshape(n, n), lon[:n * n].reshape(n, n))
+        self.cell_corners = (lat[n * n:].reshape(n + 1, n + 1), lon[n * n:].reshape(n + 1, n + 1))
+
+    def get_cell_centers(self):
+        """ Return latitudes and longitudes of the center of every cell,
+        indexed by [row, col] like assignments. Computed once per Box on first
+        call.
+
+        :returns: Arrays of latitudes and longitudes of shape
+                  (num_cells, num_cells)
+        :rtype: (np.array, np.array)
+        """
+        if self.cell_centers is None:
+            self._compute_cell_lattices()
+        return self.cell_centers
+
+    def get_cell_corners(self):
+        """ Return latitudes and longitudes of the lattice of cell corners,
+        cell [row, col] being bounded by lattice points [row, col] to
+        [row + 1, col + 1]. Computed once per Box on first call.
+
+        :returns: Arrays of latitudes and longitudes of shape
+                  (num_cells + 1, num_cells + 1)
+        :rtype: (np.array, np.array)
+        """
+        if self.cell_corners is None:
+            self._compute_cell_lattices()
+        return self.cell_corners
+
+    def _get_nearest_cells(self, lat, lon):
+        # Row and col of cell center nearest to each point
+        return self._query_nearest_cells(geodetic_to_ecef(lat, lon))
+
+    def _query_nearest_cells(self, ecef):
+        # Row and col of cell center nearest to each point given in ECEF
+        if self.cell_center_tree is None:
+            center_lat, center_lon = self.get_cell_centers()
+            self.cell_center_tree = cKDTree(geodetic_to_ecef(center_lat.ravel(), center_lon.ravel()))
+        _, nearest = self.cell_center_tree.query(ecef)
+        row, col = np.divmod(nearest, int(self.num_cells))
+        return row.astype(np.int32), col.astype(np.int32)
+
+    def get_cell_center(self, row, col):
+        """ Return latitude and longitude of the center of a cell, the
+        reverse of get_cell_assignment
+
+        :param row: jth row index of cell
+        :type row: int
+        :param col: ith column index of cell
+        :type col: int
+        :returns: Latitude and longitude of cell center
+        :rtype: (float, float)
+        """
+        center_lat, center_lon = self.get_cell_centers()
+        return float(center_lat[row, col]), float(center_lon[row, col])
+
+    def _solve_assignment(self, optim_func, args, init_x, bounds, query_lat, query_lon):
+        # Run one SLSQP solve, returning its cell assignment (nan if it did not
+        # terminate successfully) and the optimizer result
+        res = minimize(optim_func, init_x,
+                        args=args,
+                        method='SLSQP', tol=1e-6, bounds=bounds)
+        self.telemetry.record_solve(res)
+        x, y = res.x[1], res.x[0]
+        cell_x, cell_y = self._get_euclidean_assignment(x, y)
+        try:
+            self._assert_assign_optim(res, optim_func, query_lat, query_lon)
+        except AssertionError:
+            cell_x, cell_y = np.nan, np.nan
+        return (cell_x, cell_y), res
+
     def get_cell_assignment(self, query_lat, query_lon):
+        start_time = time.perf_counter()
+
         # Compute distance to each corner
         nw_dist = distance((self.nw_lat, self.nw_lon), (query_lat, query_lon)).km
         sw_dist = distance((self.sw_lat, self.sw_lon), (query_lat, query_lon)).km
         ne_dist = distance((self.ne_lat, self.ne_lon), (query_lat, query_lon)).km
         se_dist = distance((self.se_lat, self.se_lon), (query_lat, query_lon)).km
 
-        # Get a Euclidean assignment from each pair of corner optimizations
-        init_x = np.ones((2,)) * self.dist / 2
+        # Each pair of corner optimizations and the distances they fit, the
+        # four corner fit last as its assignment is used if there is no agreement
+        optims = [
+            (self._three_nw, (nw_dist, ne_dist, se_dist)),
+            (self._three_ne, (ne_dist, se_dist, sw_dist)),
+            (self._three_se, (nw_dist, sw_dist, se_dist)),
+            (self._three_sw, (nw_dist, ne_dist, sw_dist)),
+            (self._four_optim, (nw_dist, ne_dist, se_dist, sw_dist))
+        ]
         bounds = Bounds([0, 0],
                         [self.dist, self.dist])
-        cell_assignments = []
 
-        # Get nw_optim
-        res = minimize(self._three_nw, init_x,
-                        args=(nw_dist, ne_dist, se_dist),
-                        method='SLSQP', tol=1e-6, bounds=bounds)
-        x, y = res.x[1], res.x[0]
-        cell_x, cell_y = self._get_euclidean_assignment(x, y)
-        try:
-            self._assert_assign_optim(res, self._three_nw, query_lat, query_lon)
-        except AssertionError:
-            cell_x, cell_y = np.nan, np.nan
-        cell_assignments.append((cell_x, cell_y))
+        if self.adaptive_consensus:
+            mode = self._get_adaptive_consensus(optims, bounds, query_lat, query_lon)
+        else:
+            mode = self._get_full_consensus(optims, bounds, query_lat, query_lon)
 
-        # Get ne_optim
-        res = minimize(self._three_ne, init_x,
-                        args=(ne_dist, se_dist, sw_dist),
-                        method='SLSQP', tol=1e-6, bounds=bounds)
-        x, y = res.x[1], res.x[0]
-        cell_x, cell_y = self._get_euclidean_assignment(x, y)
-        try:
-            self._assert_assign_optim(res, self._three_ne, query_lat, query_lon)
-        except AssertionError:
-            cell_x, cell_y = np.nan, np.nan
-        cell_assignments.append((cell_x, cell_y))
+        self.telemetry.record_latency('get_cell_assignment', time.perf_counter() - start_time)
+        return mode
 
-        # Get se_optim
-        # tic = time.time()
-        res = minimize(self._three_se, init_x,
-                        args=(nw_dist, sw_dist, se_dist),
-                        method='SLSQP', tol=1e-6, bounds=bounds)
-        x, y = res.x[1], res.x[0]
-        cell_x, cell_y = self._get_euclidean_assignment(x, y)
-        try:
-            self._assert_assign_optim(res, self._three_se, query_lat, query_lon)
-        except AssertionError:
-            cell_x, cell_y = np.nan, np.nan
-        cell_assignments.append((cell_x, cell_y))
+    def _get_full_consensus(self, optims, bounds, query_lat, query_lon):
+        # Get a Euclidean assignment from each pair of corner optimizations
+        init_x = np.ones((2,)) * self.dist / 2
+        cell_assignments = []
+        for optim_func, args in optims:
+            cell_assignment, _ = self._solve_assignment(optim_func, args, init_x, bounds,
+                                                        query_lat, query_lon)
+            cell_assignments.append(cell_assignment)
 
-        # Get sw_optim
-        res = minimize(self._three_sw, init_x,
-                        args=(nw_dist, ne_dist, sw_dist),
-                        method='SLSQP', tol=1e-6, bounds=bounds)
-        x, y = res.x[1], res.x[0]
-        cell_x, cell_y = self._get_euclidean_assignment(x, y)
-        try:
-            self._assert_assign_optim(res, self._three_sw, query_lat, query_lon)
-        except AssertionError:
-            cell_x, cell_y = np.nan, np.nan
-        cell_assignments.append((cell_x, cell_y))
+        # Take mode of cell assignments, falling back to the four corner
+        # assignment if there are not 3 or more agreements
+        mode_counter = Counter(cell_assignments)
+        [(mode, count)] = mode_counter.most_common(1)
+        if count < 3:
+            self.logger.debug('No agreement of at least 3 computations for % .5f, %.5f' % (query_lat, query_lon))
+            mode = cell_assignments[-1]
+        self.telemetry.record_consensus(count, count < 3)
 
-        # Get four_optim
-        res = minimize(self._four_optim, init_x,
-                        args=(nw_dist, ne_dist, se_dist, sw_dist),
-                        method='SLSQP', tol=1e-6, bounds=bounds)
-        x, y = res.x[1], res.x[0]
-        cell_x, cell_y = self._get_euclidean_assignment(x, y)
-        try:
-            self._assert_assign_optim(res, self._four_optim, query_lat, query_lon)
-        except AssertionError:
-            cell_x, cell_y = np.nan, np.nan
-        cell_assignments.append((cell_x, cell_y))
+        return mode
 
-        # Take mode of cell assignments (only if 3 or more agreements, otherwise, throw an error here)
-        mode_counter = Counter(cell_assignments)
-        [(mode, _)] = mode_counter.most_common(1)
-        # print(mode)
-        # print(mode_counter[mode])
-        # self.total_count += 1
-        try:
-            assert(mode_counter[mode] >= 3)
-            # if mode_counter[mode] == mode_counter[(cell_x, cell_y)]:
-            #     self.err_count += 1
-            # self.correct_count += 1
-        except AssertionError:
+    def _get_adaptive_consensus(self, optims, bounds, query_lat, query_lon):
+        # Solve the four corner fit first, warm started from the previous
+        # point's solution, then the three corner fits warm started from it,
+        # stopping as soon as 3 agree or 3 agreements are no longer possible.
+        # Warm and cold started solves only land in different cells when
+        # close to a cell edge, so if any solution is within
+        # ADAPTIVE_CONSENSUS_EDGE_TOLERANCE_KM of one the point is solved
+        # again with the full cold started consensus
+        init_x = self.previous_solution
+        if init_x is None:
+            init_x = np.ones((2,)) * self.dist / 2
+
+        fallback = None
+        near_edge = False
+        mode_counter = Counter()
+        ordered_optims = [optims[-1]] + optims[:-1]
+        for num_solved, (optim_func, args) in enumerate(ordered_optims, start=1):
+            cell_assignment, res = self._solve_assignment(optim_func, args, init_x, bounds,
+                                                          query_lat, query_lon)
+            near_edge = near_edge or self._is_near_cell_edge(res.x)
+            if fallback is None:
+                fallback = cell_assignment
+                if not np.isnan(cell_assignment[0]):
+                    self.previous_solution = init_x = res.x
+            mode_counter[cell_assignment] += 1
+            [(mode, count)] = mode_counter.most_common(1)
+            if count >= 3 or count + len(ordered_optims) - num_solved < 3:
+                break
+
+        if near_edge:
+            self.telemetry.record_cold_resolve()
+            return self._get_full_consensus(optims, bounds, query_lat, query_lon)
+
+        if count < 3:
             self.logger.debug('No agreement of at least 3 computations for % .5f, %.5f' % (query_lat, query_lon))
-            mode = (cell_x, cell_y)
-            # print(mode_counter)
-            # sys.exit(1)
+            mode = fallback
+        self.telemetry.record_consensus(count, count < 3, len(ordered_optims) - num_solved)
 
         return mode
 
+    def _is_near_cell_edge(self, x):
+        # Whether planar solution x is within ADAPTIVE_CONSENSUS_EDGE_TOLERANCE_KM
+        # of a cell edge on either axis, the Box's edges included
+        cell_width = self.dist / self.last_cell_indx
+        offsets = np.mod(x, cell_width)
+        return bool(np.any(np.minimum(offsets, cell_width - offsets) < self.ADAPTIVE_CONSENSUS_EDGE_TOLERANCE_KM))
+
+    def get_consensus_stats(self):
+        """ Return counts of consensus assignments made by get_cell_assignment,
+        SLSQP solver calls run for them, solver calls saved by adaptive
+        consensus stopping early, and adaptive consensus assignments solved
+        again cold started as they were too close to a cell edge
+
+        :returns: Dictionary of assignments, solver_calls, solver_calls_saved
+                  and cold_resolves
+        :rtype: dict
+        """
+        return {
+            "assignments": self.telemetry.consensus_assignments,
+            "solver_calls": self.telemetry.solver_calls,
+            "solver_calls_saved": self.telemetry.solver_calls_saved,
+            "cold_resolves": self.telemetry.cold_resolves
+        }
+
+    def get_telemetry(self):
+        """ Return assignment telemetry of Box, latency histograms, solver
+        calls and iterations, consensus agreement levels, fallbacks and cache
+        hits, as json serializable dictionary
+
+        :returns: Dictionary of telemetry
+        :rtype: dict
+        """
+        return self.telemetry.to_dict(self.get_cache_stats())
+
+    def dump_telemetry(self, file_path):
+        """ Write assignment telemetry of Box to json file
+
+        :param file_path: Path of json file to write
+        :type file_path: str
+        """
+        self.telemetry.dump_json(file_path, self.get_cache_stats())
+
     def is_within(self, query_lat, query_lon):
         p = Point(query_lat, query_lon)
 
         return self.poly.contains(p)
 
+    def contains_many(self, lat, lon):
+        """ Array version of is_within. Rejects points outside of the Box's
+        bounding envelope with cheap comparisons first, then tests only the
+        remaining candidates against the Box polygon in one vectorized call.
+
+        :param lat: Latitudes to check, any shape
+        :type lat: np.array
+        :param lon: Longitudes to check, same shape as lat
+        :type lon: np.array
+        :returns: Boolean array in shape of lat, True where point is within Box
+        :rtype: np.array
+        """
+        lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+        min_lat, min_lon, max_lat, max_lon = self.poly.bounds
+
+        # Polygon is made of (lat, lon) points so bounds are in that order,
+        # comparisons with nan are False so nan coords are rejected here too
+        within = ((min_lat < lat) & (lat < max_lat) &
+                  (min_lon < lon) & (lon < max_lon))
+        if within.any():
+            within[within] = contains_xy(self.poly, lat[within], lon[within])
+
+        return within
+
     def visualize_box(self):
         # Make the background map
         # m = Basemap(llcrnrlon=-180, llcrnrlat=-65, urcrnrlon=180, urcrnrlat=80)  # full map
@@ -314,6 +724,98 @@ class Box():
         """
         return self.num_cells
 
+    def set_area_of_interest(self, aoi_mask):
+        """ Set mask of cells in the area of interest (e.g. land within the
+        province), the only cells kept by pack_cells. None removes it.
+
+        :param aoi_mask: Boolean mask of shape (num_cells, num_cells) or None
+        :type aoi_mask: np.array or None
+        """
+        if aoi_mask is None:
+            self.aoi_mask, self.aoi_packed_index = None, None
+            return
+        aoi_mask = np.array(aoi_mask, dtype=bool)
+        num_cells = int(self.num_cells)
+        if aoi_mask.shape != (num_cells, num_cells):
+            raise ValueError(f"Area of interest mask must be of shape {(num_cells, num_cells)}")
+        self.aoi_mask = aoi_mask
+        self.aoi_packed_index = packed_index(aoi_mask)
+
+    def get_area_of_interest(self):
+        """ Return mask of cells in the area of interest, None if not set
+
+        :returns: Boolean mask of shape (num_cells, num_cells) or None
+        :rtype: np.array or None
+        """
+        return self.aoi_mask
+
+    def get_cells_within(self, poly):
+        """ Return mask of cells whose centers are within polygon, e.g. to
+        use as area of interest
+
+        :param poly: Polygon made of (lat, lon) points like Box.poly
+        :type poly: shapely.geometry.Polygon
+        :returns: Boolean mask of shape (num_cells, num_cells)
+        :rtype: np.array
+        """
+        center_lat, center_lon = self.get_cell_centers()
+        return contains_xy(poly, center_lat, center_lon)
+
+    def get_num_packed_cells(self):
+        """ Return number of cells in packed cell vectors, all cells of the
+        box if there is no area of interest
+
+        :rtype: int
+        """
+        if self.aoi_mask is None:
+            return int(self.num_cells) ** 2
+        return int(np.count_nonzero(self.aoi_mask))
+
+    def get_packed_index(self):
+        """ Return index of every cell in packed cell vectors, -1 for cells
+        outside of the area of interest
+
+        :returns: Packed index of shape (num_cells, num_cells)
+        :rtype: np.array of np.int32
+        """
+        if self.aoi_mask is None:
+            num_cells = int(self.num_cells)
+            return np.arange(num_cells ** 2, dtype=np.int32).reshape(num_cells, num_cells)
+        return self.aoi_packed_index
+
+    def pack_cells(self, grid):
+        """ Pack grid of shape (..., num_cells, num_cells) into cell vectors
+        of shape (..., get_num_packed_cells()) of the area of interest
+
+        :param grid: Grid to pack
+        :type grid: np.array
+        :returns: Packed copy of grid
+        :rtype: np.array
+        """
+        grid = np.asarray(grid)
+        if self.aoi_mask is None:
+            return grid.reshape(grid.shape[:-2] + (-1,)).copy()
+        return pack_cells(grid, self.aoi_mask)
+
+    def unpack_cells(self, packed, fill_val=np.nan, out=None):
+        """ Unpack cell vectors of the area of interest back into a grid of
+        shape (..., num_cells, num_cells), cells outside of it set to fill_val
+
+        :param packed: Cell vectors to unpack
+        :type packed: np.array
+        :param fill_val: Value of cells outside of area of interest, default np.nan
+        :type fill_val: float, optional
+        :param out: C contiguous array to unpack into, default None
+        :type out: np.array, optional
+        :returns: Unpacked grid
+        :rtype: np.array
+        """
+        aoi_mask = self.aoi_mask
+        if aoi_mask is None:
+            num_cells = int(self.num_cells)
+            aoi_mask = np.ones((num_cells, num_cells), dtype=bool)
+        return unpack_cells(packed, aoi_mask, fill_val, out)
+
     def get_orig_box_args(self):
         """ Return a tuple of the original arguments used to make the box
         in order nw_lat, nw_lon, sw_lat_est, sw_lon_est, dist, res
@@ -323,8 +825,68 @@ class Box():
         """
         return self.orig_box_args
 
+    def coarsen(self, factor):
+        """ Return Box of the same class over the same area with cells factor
+        times as wide, keeping this Box's cache and adaptive consensus
+        settings. Corners are reused rather than solved for again. As cells
+        are dist / (num_cells - 1) wide coarse cells do not cover exact factor
+        by factor blocks of this Box's cells, get_coarse_cell_map gives the
+        coarse cell each cell falls in. The area of interest if any is every
+        coarse cell with a cell of this Box's in it.
+
+        :param factor: Number of cells of this Box along each axis of a coarse cell
+        :type factor: int
+        :returns: Coarser Box, its spec given by to_spec
+        :rtype: Box
+        """
+        num_cells = int(self.num_cells)
+        if factor < 1 or num_cells % factor:
+            raise ValueError(f"Box of {num_cells} cells can not be coarsened by {factor}")
+        nw_lat, nw_lon, sw_lat_est, sw_lon_est, dist, res = self.orig_box_args
+        coarse_box = self.__class__.from_spec(
+            BoxSpec(nw_lat, nw_lon, sw_lat_est, sw_lon_est, dist, res * factor, *self.get_corners()),
+            self.previous_assignments.precision, self.previous_assignments.max_bytes,
+            self.adaptive_consensus
+        )
+        if self.aoi_mask is not None:
+            rows, cols = self.get_coarse_cell_map(coarse_box)
+            coarse_num_cells = int(coarse_box.get_num_cells())
+            coarse_aoi_mask = np.zeros((coarse_num_cells, coarse_num_cells), dtype=bool)
+            coarse_aoi_mask[rows[self.aoi_mask], cols[self.aoi_mask]] = True
+            coarse_box.set_area_of_interest(coarse_aoi_mask)
+        return coarse_box
+
+    def get_coarse_cell_map(self, coarse_box):
+        """ Return row and col of the cell of coarse_box containing the center
+        of each cell of this Box, coarse_box having the same corners (e.g. from
+        coarsen). Found on the planar square both Boxes share, so it is the
+        assignment coarse_box gives each cell center without solving any,
+        centers past the south and east edges going to the last row and col.
+
+        :param coarse_box: Box with the same corners and coarser cells
+        :type coarse_box: Box
+        :returns: Arrays of coarse rows and cols of shape (num_cells, num_cells)
+        :rtype: (np.array, np.array)
+        """
+        centers = (np.arange(int(self.num_cells)) + 0.5) * (self.dist / self.last_cell_indx)
+        coarse_indices = np.clip(
+            np.floor(centers / coarse_box.dist * coarse_box.last_cell_indx).astype(np.int32),
+            0, int(coarse_box.last_cell_indx)
+        )
+        return np.meshgrid(coarse_indices, coarse_indices, indexing='ij')
+
+    def get_cache_stats(self):
+        """ Return hit, miss and eviction counters, and size of the cache of
+        previous assignments
+
+        :returns: Dictionary of cache counters
+        :rtype: dict
+        """
+        return self.previous_assignments.get_stats()
+
     def is_already_assigned(self, query_lat, query_lon):
-        """ Returns true if tuple of lat, lon have already been assigned
+        """ Returns true if tuple of lat, lon have already been assigned, up to
+        the precision of the cache
 
         :param query_lat: Latitude to check
         :type query_lat: float
@@ -333,7 +895,7 @@ class Box():
         :returns: Boolean of whether pair was assigned already or not
         :rtype: bool
         """
-        return (query_lat, query_lon) in self.previous_assignments.keys()
+        return (query_lat, query_lon) in self.previous_assignments
 
     def store_assignment(self, lat_stor, long_stor, row_stor, col_stor):
         """ Stores row, col assignment of paired lat, lon to be used if lat, lon
@@ -348,21 +910,21 @@ class Box():
         :param col_stor: Column assignment to store
         :type col_stor: float
         """
-        self.previous_assignments[(lat_stor, long_stor)] = (row_stor, col_stor)
+        self.previous_assignments.put(lat_stor, long_stor, (row_stor, col_stor))
 
     def get_previous_assignment(self, stored_lat, stored_lon):
         """ Returns previous assignment tuple of row, col for given
-        stored_lat, stored_lon coordinates, assumes given coords were
-        previously assigned and stored
+        stored_lat, stored_lon coordinates, or None if they were not
+        previously assigned and stored or have since been evicted
 
         :param lat_stor: Latitude to get assignment of
         :type lat_stor: float
         :param long_stor: Longitude to get assignment of
         :type long_stor: float
         :returns: Previously assigned tuple of row and col for lat and lon
-        :rtype: tuple of (float, float)
+        :rtype: tuple of (float, float) or None
         """
-        return self.previous_assignments.get((stored_lat, stored_lon))
+        return self.previous_assignments.get(stored_lat, stored_lon)
 
     def get_cell_assignment_if_in_grid(self, query_lat, query_lon):
         """ Assigns latitude and longitude a cell coordinate if they are in
@@ -376,7 +938,8 @@ class Box():
                  (np.nan, np.nan) if not within grid
         :rtype: tuple<int or np.nan>
         """
-        if not self.is_already_assigned(query_lat, query_lon):
+        previous_assignment = self.get_previous_assignment(query_lat, query_lon)
+        if previous_assignment is None:
 
             if self.is_within(query_lat, query_lon):
                 row, col = self.get_cell_assignment(query_lat, query_lon)
@@ -388,4 +951,4 @@ class Box():
                 return (np.nan, np.nan)
 
         else:
-            return self.get_previous_assignment(query_lat, query_lon)
+            return previous_assignment
@@ -0,0 +1,126 @@
+import os
+import json
+import logging
+import tempfile
+from collections import namedtuple
+
+
+class BoxSpec(namedtuple('BoxSpec', ['nw_lat', 'nw_lon', 'sw_lat_est', 'sw_lon_est', 'dist', 'res',
+                                     'sw_lat', 'sw_lon', 'ne_lat', 'ne_lon', 'se_lat', 'se_lon'])):
+    """ Compact immutable description of a Box, the original args used to make
+    it followed by its solved sw, ne and se corners. Cheap to pickle and
+    rehydrates into a Box with Box.from_spec without solving any corners.
+
+    """
+    __slots__ = ()
+
+    def get_orig_box_args(self):
+        """ Return tuple of args used to make Box in order nw_lat, nw_lon,
+        sw_lat_est, sw_lon_est, dist, res
+
+        :rtype: tuple
+        """
+        return tuple(self[:6])
+
+    def get_corners(self):
+        """ Return tuple of solved corners in order sw_lat, sw_lon, ne_lat,
+        ne_lon, se_lat, se_lon
+
+        :rtype: tuple
+        """
+        return tuple(self[6:])
+
+
+class BoxRegistry:
+
+    def __init__(self, registry_path=None):
+        """ Create registry memoizing solved Box corners per Box args, in
+        memory and if given a path persisted to a json file so they are reused
+        across processes and runs. Corners do not depend on resolution so
+        Boxes differing only in res share them.
+
+        :param registry_path: Path of json file to persist corners in, default
+                              None keeps them in memory only
+        :type registry_path: str, optional
+        """
+        self.registry_path = registry_path
+        self.corners = {}
+
+        # Get logger
+        self.logger = logging.getLogger(__name__)
+
+    def _make_key(self, box_args):
+        # Key on everything but res
+        return json.dumps([float(arg) for arg in box_args[:5]])
+
+    def _read_file(self):
+        if self.registry_path is None:
+            return {}
+        try:
+            with open(self.registry_path, 'r') as f_json:
+                return json.load(f_json)
+        except (OSError, ValueError):
+            return {}
+
+    def get_corners(self, box_args):
+        """ Return solved corners for Box args if known to registry, checking
+        persisted file if not already in memory
+
+        :param box_args: Args used to make Box, nw_lat, nw_lon, sw_lat_est,
+                         sw_lon_est, dist, res
+        :type box_args: tuple
+        :returns: Corners sw_lat, sw_lon, ne_lat, ne_lon, se_lat, se_lon or None
+        :rtype: tuple or None
+        """
+        key = self._make_key(box_args)
+        if key not in self.corners:
+            self.corners.update(
+                {k: tuple(v) for k, v in self._read_file().items()}
+            )
+        return self.corners.get(key)
+
+    def store_corners(self, box_args, corners):
+        """ Store solved corners for Box args in memory and in persisted file
+        if there is one, failing to persist only logs a warning
+
+        :param box_args: Args used to make Box, nw_lat, nw_lon, sw_lat_est,
+                         sw_lon_est, dist, res
+        :type box_args: tuple
+        :param corners: Corners sw_lat, sw_lon, ne_lat, ne_lon, se_lat, se_lon
+        :type corners: tuple
+        """
+        key = self._make_key(box_args)
+        self.corners[key] = tuple(float(c) for c in corners)
+        if self.registry_path is None:
+            return
+
+        # Merge with whatever other processes persisted then atomically replace
+        try:
+            registry_dir = os.path.dirname(os.path.abspath(self.registry_path))
+            os.makedirs(registry_dir, exist_ok=True)
+            persisted = self._read_file()
+            persisted[key] = list(self.corners[key])
+            f_temp, temp_path = tempfile.mkstemp(dir=registry_dir, suffix='.json.tmp')
+            with os.fdopen(f_temp, 'w') as f_json:
+                json.dump(persisted, f_json, indent=2)
+            os.replace(temp_path, self.registry_path)
+        except OSError as e:
+            self.logger.warning(f"Could not persist box corners to {self.registry_path}: {e}")
+
+
+# Registries shared by every Box made in this process, per path, None
+# keeping corners in memory only
+_default_registries = {}
+
+
+def get_default_registry():
+    """ Return registry shared by Boxes not given one, memoizing corners for
+    the whole process and persisting them to the path in the
+    SMOKE_BOX_REGISTRY environment variable only if it is set
+
+    :rtype: BoxRegistry
+    """
+    registry_path = os.environ.get('SMOKE_BOX_REGISTRY') or None
+    if registry_path not in _default_registries:
+        _default_registries[registry_path] = BoxRegistry(registry_path)
+    return _default_registries[registry_path]
@@ -0,0 +1,212 @@
+import time
+import numpy as np
+from collections import OrderedDict
+
+from .AssignmentTelemetry import AssignmentTelemetry
+from .geodesic import distances_to_points, geodetic_to_ecef
+
+
+class BoxSet:
+    # Methods assign_cells can assign with, the same as Box.assign_cells
+    ASSIGNMENT_METHODS = ('consensus', 'kdtree')
+
+    def __init__(self, boxes=None):
+        """ Create a named set of Boxes (domains) that coordinate batches are
+        assigned to together. Work common to the Boxes is only done once per
+        batch: points outside every Box are rejected in one pass, distances
+        to every distinct corner are computed once, and Boxes that are the
+        same square at different resolutions (e.g. BCBox at 5 and 10 km)
+        share one planar position solve. Time of the common work is recorded
+        in the BoxSet's own telemetry, each Box's telemetry recording only the
+        time of its own assignments.
+
+        :param boxes: Boxes to add keyed on domain name, default None
+        :type boxes: dict<str, smoke.box.Box>, optional
+        """
+        self.boxes = OrderedDict()
+        self.telemetry = AssignmentTelemetry()
+        if boxes is not None:
+            for name, box in boxes.items():
+                self.add(name, box)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __iter__(self):
+        return iter(self.boxes)
+
+    def __getitem__(self, name):
+        return self.boxes[name]
+
+    def add(self, name, box):
+        """ Register Box as a domain of set
+
+        :param name: Name of domain
+        :type name: str
+        :param box: Theoretical space grid of domain
+        :type box: smoke.box.Box
+        """
+        self.boxes[name] = box
+
+    def get_names(self):
+        """ Return names of domains in order added
+
+        :rtype: list<str>
+        """
+        return list(self.boxes)
+
+    def items(self):
+        """ Return (name, Box) pairs of domains in order added
+
+        :rtype: list<(str, smoke.box.Box)>
+        """
+        return list(self.boxes.items())
+
+    def get_telemetry(self):
+        """ Return assignment telemetry of work common to the Boxes, that of
+        each Box being in its own
+
+        :returns: Dictionary of telemetry
+        :rtype: dict
+        """
+        return self.telemetry.to_dict()
+
+    def dump_telemetry(self, file_path):
+        """ Write assignment telemetry of work common to the Boxes to json file
+
+        :param file_path: Path of json file to write
+        :type file_path: str
+        """
+        self.telemetry.dump_json(file_path)
+
+    def _get_corner_points(self, box):
+        # Corners in order nw, ne, se, sw with the distance method to use
+        method = box.CORNER_DISTANCE_METHOD
+        return [(box.nw_lat, box.nw_lon, method), (box.ne_lat, box.ne_lon, method),
+                (box.se_lat, box.se_lon, method), (box.sw_lat, box.sw_lon, method)]
+
+    def _get_planar_groups(self):
+        # Group names of Boxes with identical corners and side length, which
+        # only differ in res so have identical planar positions
+        groups = OrderedDict()
+        for name, box in self.boxes.items():
+            key = (tuple(self._get_corner_points(box)), box.dist)
+            groups.setdefault(key, []).append(name)
+        return groups
+
+    def _reject_outside(self, flat_lat, flat_lon):
+        # Indices of points within any Box, checking only points within the
+        # envelope of all Boxes, and which of them are within each Box
+        bounds = np.array([box.poly.bounds for box in self.boxes.values()])
+        min_lat, min_lon = bounds[:, 0].min(), bounds[:, 1].min()
+        max_lat, max_lon = bounds[:, 2].max(), bounds[:, 3].max()
+        candidates = np.flatnonzero((min_lat < flat_lat) & (flat_lat < max_lat) &
+                                    (min_lon < flat_lon) & (flat_lon < max_lon))
+
+        within = OrderedDict(
+            (name, box.contains_many(flat_lat[candidates], flat_lon[candidates]))
+            for name, box in self.boxes.items()
+        )
+        within_any = np.logical_or.reduce(list(within.values()))
+        return candidates[within_any], {name: w[within_any] for name, w in within.items()}
+
+    def _get_corner_distances(self, lat, lon):
+        # Distance of points to every distinct corner, one call per method
+        corners_by_method = OrderedDict()
+        for box in self.boxes.values():
+            for corner in self._get_corner_points(box):
+                corners_by_method.setdefault(corner[2], OrderedDict())[corner] = None
+
+        corner_dists = {}
+        for method, corners in corners_by_method.items():
+            corners = list(corners)
+            dists = distances_to_points(lat, lon, [c[0] for c in corners],
+                                        [c[1] for c in corners], method=method)
+            corner_dists.update(zip(corners, dists))
+        return corner_dists
+
+    def assign_cells(self, lat_array, lon_array, method='consensus'):
+        """ Assign a cell of every Box to every latitude, longitude pair at
+        once. Gives the same assignments as Box.assign_cells of each Box.
+
+        :param lat_array: Latitudes to assign, any shape
+        :type lat_array: np.array
+        :param lon_array: Longitudes to assign, same shape as lat_array
+        :type lon_array: np.array
+        :param method: One of ASSIGNMENT_METHODS, default 'consensus'
+        :type method: str, optional
+        :return: Arrays of jth row indices and ith column indices in shape of
+                 lat_array for each domain name, -1 where point falls outside
+                 of that domain's Box
+        :rtype: dict<str, (np.array, np.array)>
+        """
+        if method not in self.ASSIGNMENT_METHODS:
+            raise ValueError(f"Unknown assignment method {method}, use one of {self.ASSIGNMENT_METHODS}")
+
+        start_time = time.perf_counter()
+        lat_array, lon_array = np.asarray(lat_array, dtype=float), np.asarray(lon_array, dtype=float)
+        shape = lat_array.shape
+        flat_lat, flat_lon = lat_array.flatten(), lon_array.flatten()
+
+        assignments = OrderedDict(
+            (name, (np.full(flat_lat.size, -1, dtype=np.int32), np.full(flat_lat.size, -1, dtype=np.int32)))
+            for name in self.boxes
+        )
+        if len(self.boxes) == 0:
+            return assignments
+
+        # Only solve for points that are within any of the boxes
+        candidates, within = self._reject_outside(flat_lat, flat_lon)
+        cand_lat, cand_lon = flat_lat[candidates], flat_lon[candidates]
+
+        # Seconds each Box spent on its own assignments, a planar solve shared
+        # by a group split evenly among its Boxes
+        box_elapsed_s = OrderedDict((name, 0.0) for name in self.boxes)
+        if candidates.size and method == 'kdtree':
+            ecef = geodetic_to_ecef(cand_lat, cand_lon)
+            shared_s = time.perf_counter() - start_time
+            for name, box in self.boxes.items():
+                if within[name].any():
+                    box_start_time = time.perf_counter()
+                    row, col = assignments[name]
+                    indices = candidates[within[name]]
+                    row[indices], col[indices] = box._query_nearest_cells(ecef[within[name]])
+                    box_elapsed_s[name] += time.perf_counter() - box_start_time
+
+        elif candidates.size:
+            corner_dists = self._get_corner_distances(cand_lat, cand_lon)
+            shared_s = time.perf_counter() - start_time
+            for (corners, _), names in self._get_planar_groups().items():
+                group_within = np.logical_or.reduce([within[name] for name in names])
+                if not group_within.any():
+                    continue
+                group_start_time = time.perf_counter()
+                x, y = self.boxes[names[0]]._solve_planar_positions(
+                    *[corner_dists[corner][group_within] for corner in corners]
+                )
+                group_solve_s = (time.perf_counter() - group_start_time) / len(names)
+                for name in names:
+                    box_start_time = time.perf_counter()
+                    row, col = assignments[name]
+                    box_within = within[name][group_within]
+                    indices = candidates[within[name]]
+                    row[indices], col[indices] = self.boxes[name]._get_euclidean_assignments(
+                        y[box_within], x[box_within]
+                    )
+                    box_elapsed_s[name] += group_solve_s + time.perf_counter() - box_start_time
+
+        else:
+            shared_s = time.perf_counter() - start_time
+
+        # Common rejection and distances recorded once, on the BoxSet
+        self.telemetry.record_latency(f'assign_cells_{method}_shared', shared_s, flat_lat.size)
+        self.telemetry.record_latency(f'assign_cells_{method}', time.perf_counter() - start_time,
+                                      flat_lat.size)
+        for name, box in self.boxes.items():
+            box.telemetry.record_latency(f'box_set_assign_cells_{method}', box_elapsed_s[name],
+                                         int(np.count_nonzero(within[name])))
+
+        return OrderedDict(
+            (name, (row.reshape(shape), col.reshape(shape)))
+            for name, (row, col) in assignments.items()
+        )
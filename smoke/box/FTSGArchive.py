@@ -0,0 +1,223 @@
+import os
+import re
+import json
+import numpy as np
+from datetime import datetime
+
+from .FeatureTimeSpaceGrid import (FeatureTimeSpaceGrid, load_FeatureTimeSpaceGrid,
+                                   _as_datetime64_ns, _box_from_args)
+
+
+class FTSGArchive:
+
+    HEADER_NAME = 'header.json'
+    DATA_NAME = 'data.bin'
+    TIMES_NAME = 'times.i8'
+    FORMAT_NAME = 'ftsg-archive'
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory):
+        """ Open a consolidated append-only archive of FeatureTimeSpaceGrids
+        of one source and prefix (e.g. all firework_closest_ days). Grids are
+        appended in time order to one raw data file of time major records of
+        shape (n_features, ...space) with a matching file of record times, so
+        any time range is one contiguous memory mapped slice.
+
+        The times file is written after the data of an append, so an
+        interrupted append is ignored and overwritten by the next one.
+
+        :param directory: Directory of archive, created on first append
+        :type directory: str
+        """
+        self.directory = directory
+        self.header = None
+        header_path = os.path.join(directory, self.HEADER_NAME)
+        if os.path.isfile(header_path):
+            with open(header_path, 'r') as f_json:
+                self.header = json.load(f_json)
+
+    def _get_header_for(self, ftsg):
+        # Header describing everything appended grids must share
+        header = {
+            "format":self.FORMAT_NAME,
+            "version":self.FORMAT_VERSION,
+            "features list":list(ftsg.get_features()),
+            "box_args":ftsg.orig_box_args,
+            "time_res_h":ftsg.time_res_h,
+            "dtype":ftsg.get_dtype().name,
+            "space shape":list(ftsg._get_space_shape()),
+            "packed":ftsg.is_packed()
+        }
+        if ftsg.is_packed():
+            header["aoi_mask"] = np.flatnonzero(ftsg.box.get_area_of_interest()).tolist()
+        return header
+
+    def _get_record_shape(self):
+        return (len(self.header["features list"]),) + tuple(self.header["space shape"])
+
+    def _get_record_size(self):
+        return int(np.prod(self._get_record_shape())) * np.dtype(self.header["dtype"]).itemsize
+
+    def get_num_times(self):
+        """ Return number of times in archive
+
+        :rtype: int
+        """
+        if self.header is None:
+            return 0
+        times_path = os.path.join(self.directory, self.TIMES_NAME)
+        data_path = os.path.join(self.directory, self.DATA_NAME)
+        if not os.path.isfile(times_path):
+            return 0
+        return min(os.path.getsize(times_path) // 8, os.path.getsize(data_path) // self._get_record_size())
+
+    def get_times(self):
+        """ Return np.array of every time in archive as datetime64[ns], sorted
+
+        """
+        if self.get_num_times() == 0:
+            return np.empty(0, dtype='datetime64[ns]')
+        times = np.fromfile(os.path.join(self.directory, self.TIMES_NAME), dtype=np.int64,
+                            count=self.get_num_times())
+        return times.view('datetime64[ns]')
+
+    def get_features(self):
+        """ Return np.array of features of archive
+
+        """
+        return np.array(self.header["features list"])
+
+    def append(self, ftsg):
+        """ Append every time of ftsg to end of archive, all of which must be
+        after the last time already archived
+
+        :param ftsg: Grid to append, with the same features, Box, time
+                     resolution, dtype and layout as grids already archived
+        :type ftsg: FeatureTimeSpaceGrid
+        """
+        header = self._get_header_for(ftsg)
+        if self.header is None:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, self.HEADER_NAME), 'w') as f_json:
+                json.dump(header, f_json, indent=2)
+            self.header = header
+        elif header != self.header:
+            raise ValueError(f"Grid does not match grids archived in {self.directory}")
+
+        times = ftsg.get_times()
+        archived_times = self.get_times()
+        if archived_times.size and times.size and times[0] <= archived_times[-1]:
+            raise ValueError(
+                f"Grid starting {times[0]} is not after last archived time {archived_times[-1]}"
+            )
+
+        # Drop anything left by an interrupted append, then write data before times
+        num_times = archived_times.size
+        data_path = os.path.join(self.directory, self.DATA_NAME)
+        with open(data_path, 'ab') as f_data:
+            f_data.truncate(num_times * self._get_record_size())
+            f_data.write(np.ascontiguousarray(np.swapaxes(ftsg.get_grid(), 0, 1)).tobytes())
+        with open(os.path.join(self.directory, self.TIMES_NAME), 'ab') as f_times:
+            f_times.truncate(num_times * 8)
+            f_times.write(times.astype(np.int64).tobytes())
+
+    def read_time_indices(self, start_index, stop_index):
+        """ Return read only memory map of archived records start_index up to
+        stop_index, time major
+
+        :param start_index: First record index
+        :type start_index: int
+        :param stop_index: Record index to stop before
+        :type stop_index: int
+        :returns: Records of shape (n_times, n_features, ...space)
+        :rtype: np.memmap
+        """
+        num_times = self.get_num_times()
+        start_index, stop_index, _ = slice(start_index, stop_index).indices(num_times)
+        if stop_index <= start_index:
+            return np.empty((0,) + self._get_record_shape(), dtype=self.header["dtype"])
+        return np.memmap(os.path.join(self.directory, self.DATA_NAME), dtype=self.header["dtype"],
+                         mode='r', offset=start_index * self._get_record_size(),
+                         shape=(stop_index - start_index,) + self._get_record_shape())
+
+    def read_range(self, datetime_start, datetime_stop):
+        """ Return archived times after datetime_start up to and including
+        datetime_stop, as FTSG time axes are, and their grids as one
+        contiguous memory mapped cube
+
+        :param datetime_start: Time to start after
+        :type datetime_start: datetime
+        :param datetime_stop: Time to stop at inclusive
+        :type datetime_stop: datetime
+        :returns: Times and grid of shape (n_times, n_features, ...space)
+        :rtype: (np.array, np.memmap)
+        """
+        times = self.get_times()
+        start_index = np.searchsorted(times, _as_datetime64_ns(datetime_start), side='right')
+        stop_index = np.searchsorted(times, _as_datetime64_ns(datetime_stop), side='right')
+        return times[start_index:stop_index], self.read_time_indices(start_index, stop_index)
+
+    def to_FeatureTimeSpaceGrid(self, datetime_start, datetime_stop, sparse=False):
+        """ Return FeatureTimeSpaceGrid from datetime_start to datetime_stop
+        at the archive's time resolution filled from archive, times missing
+        from archive left np.nan
+
+        :param datetime_start: Time for FeatureTimeSpaceGrid to start exclusive
+        :type datetime_start: datetime
+        :param datetime_stop: Time for FeatureTimeSpaceGrid to end inclusive
+        :type datetime_stop: datetime
+        :param sparse: Whether grid returned is sparse, default False
+        :type sparse: bool, optional
+        :rtype: FeatureTimeSpaceGrid
+        """
+        box = _box_from_args(self.header["box_args"])
+        if self.header["packed"]:
+            aoi_mask = np.zeros(box.get_num_cells() ** 2, dtype=bool)
+            aoi_mask[self.header["aoi_mask"]] = True
+            box.set_area_of_interest(aoi_mask.reshape(box.get_num_cells(), box.get_num_cells()))
+
+        ftsg = FeatureTimeSpaceGrid(box, self.get_features(), datetime_start, datetime_stop,
+                                    self.header["time_res_h"], packed=self.header["packed"],
+                                    dtype=self.header["dtype"], sparse=sparse)
+        times, records = self.read_range(datetime_start, datetime_stop)
+        time_indices = ftsg.get_time_indices(times)
+        on_axis = time_indices >= 0
+        grid = np.full(ftsg._get_storage_shape(), np.nan, dtype=ftsg.get_dtype())
+        grid[:, time_indices[on_axis]] = np.swapaxes(records[on_axis], 0, 1)
+        ftsg.set_grid(grid)
+        return ftsg
+
+
+def consolidate_FTSGs(file_directory, file_prefix, archive_directory):
+    """ Append every daily tar.gz or .ftsg FTSG of file_prefix in
+    file_directory to the archive at archive_directory in time order,
+    skipping days already archived so it can be rerun as new days are saved
+
+    :param file_directory: Directory of daily saved FTSGs
+    :type file_directory: str
+    :param file_prefix: Prefix of FTSGs to consolidate (e.g. firework_closest_)
+    :type file_prefix: str
+    :param archive_directory: Directory of archive to append to
+    :type archive_directory: str
+    :returns: Archive appended to
+    :rtype: FTSGArchive
+    """
+    name_regex = re.compile(
+        re.escape(file_prefix) + r"strt(\d{8}T\d{6})_stop(\d{8}T\d{6})_res\d+(\.tar\.gz|\.ftsg)$"
+    )
+    day_files = sorted(
+        (datetime.strptime(match.group(1), '%Y%m%dT%H%M%S'),
+         datetime.strptime(match.group(2), '%Y%m%dT%H%M%S'), f)
+        for f, match in ((f, name_regex.match(f)) for f in os.listdir(file_directory))
+        if match is not None
+    )
+
+    archive = FTSGArchive(archive_directory)
+    for _, datetime_stop, file_name in day_files:
+        # Skip days already archived without loading them, a day's last time
+        # being its stop time
+        archived_times = archive.get_times()
+        if archived_times.size and _as_datetime64_ns(datetime_stop) <= archived_times[-1]:
+            continue
+        archive.append(load_FeatureTimeSpaceGrid(os.path.join(file_directory, file_name)))
+    return archive
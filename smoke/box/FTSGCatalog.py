@@ -0,0 +1,201 @@
+import os
+import re
+import json
+import sqlite3
+from contextlib import closing
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from collections import namedtuple
+
+from .FeatureTimeSpaceGrid import load_FeatureTimeSpaceGrid
+
+
+_DATETIME_FMT = '%Y-%m-%dT%H:%M:%S'
+_FILE_NAME_REGEX = re.compile(r"^(.*)strt\d{8}T\d{6}_stop\d{8}T\d{6}_res\d+(\.tar\.gz|\.ftsg)$")
+
+
+def _as_naive_utc(time):
+    # Timezone aware time converted to naive UTC as FTSG time axes are
+    if time.tzinfo is not None:
+        time = time.astimezone(timezone.utc).replace(tzinfo=None)
+    return time
+
+
+class CatalogEntry(namedtuple('CatalogEntry', [
+        'file_path', 'prefix', 'datetime_start', 'datetime_stop', 'time_res_h',
+        'features', 'grid_shape', 'validity'])):
+    """ Catalog record of a saved FTSG, validity being a boolean array of
+    shape (n_features, n_time) of whether each feature at each time has any
+    cell that is not np.nan
+    """
+
+    def get_times(self):
+        """ Return times of FTSG's time axis, the ends of each time bin
+
+        :rtype: list<datetime>
+        """
+        return [self.datetime_start + timedelta(hours=self.time_res_h * (i + 1))
+                for i in range(self.validity.shape[1])]
+
+    def is_all_nan(self):
+        """ Return whether every cell of FTSG is np.nan
+
+        :rtype: bool
+        """
+        return not self.validity.any()
+
+    def has_valid_data(self, time=None, feature=None):
+        """ Return whether FTSG has any cell that is not np.nan, at time
+        and feature if given
+
+        :param time: Time on FTSG's time axis, default None checks all times
+        :type time: datetime, optional
+        :param feature: Feature of FTSG, default None checks all features
+        :type feature: str, optional
+        :rtype: bool
+        """
+        validity = self.validity
+        if feature is not None:
+            validity = validity[[self.features.index(feature)]]
+        if time is not None:
+            times = self.get_times()
+            time = _as_naive_utc(time)
+            if time not in times:
+                return False
+            validity = validity[:, [times.index(time)]]
+        return bool(validity.any())
+
+
+class FTSGCatalog:
+
+    def __init__(self, db_path, timeout_s=60):
+        """ Open (creating if needed) a SQLite catalog of saved FTSGs, holding
+        each one's prefix, time coverage, shape and which features have valid
+        data at which times, so completeness can be checked without loading
+        any grid. Safe to record to from several processes at once.
+
+        :param db_path: Path to SQLite database file
+        :type db_path: str
+        :param timeout_s: Seconds to wait on other processes' writes, default 60
+        :type timeout_s: float, optional
+        """
+        self.db_path = db_path
+        self.timeout_s = timeout_s
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ftsgs ("
+                "file_path TEXT PRIMARY KEY, directory TEXT, prefix TEXT, "
+                "datetime_start TEXT, datetime_stop TEXT, time_res_h INTEGER, "
+                "features TEXT, grid_shape TEXT, validity BLOB, all_nan INTEGER)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ftsgs_coverage "
+                "ON ftsgs (directory, prefix, datetime_stop)"
+            )
+
+    def _connect(self):
+        # Connection to use as closing(self._connect()) with an inner with to
+        # commit, as a sqlite3 connection's own with never closes it
+        return sqlite3.connect(self.db_path, timeout=self.timeout_s)
+
+    def _key(self, file_path):
+        # Catalog key of file, normalized so any path to it matches
+        return os.path.abspath(file_path).rstrip(os.sep)
+
+    def record(self, ftsg, file_path, prefix=None):
+        """ Record saved ftsg in catalog, replacing any record of file_path
+
+        :param ftsg: Grid that was saved
+        :type ftsg: FeatureTimeSpaceGrid
+        :param file_path: Path grid was saved to
+        :type file_path: str
+        :param prefix: Prefix grid was saved with, default None takes it from
+                       file name
+        :type prefix: str, optional
+        """
+        key = self._key(file_path)
+        if prefix is None:
+            match = _FILE_NAME_REGEX.match(os.path.basename(key))
+            prefix = match.group(1) if match is not None else ''
+        validity = ftsg.get_validity()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ftsgs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, os.path.dirname(key), prefix,
+                 ftsg.datetime_start.strftime(_DATETIME_FMT),
+                 ftsg.datetime_stop.strftime(_DATETIME_FMT),
+                 ftsg.time_res_h,
+                 json.dumps(list(ftsg.get_features())),
+                 json.dumps(list(ftsg._get_storage_shape())),
+                 np.packbits(validity.ravel()).tobytes(),
+                 int(not validity.any()))
+            )
+
+    def _to_entry(self, row):
+        file_path, prefix, start, stop, time_res_h, features, grid_shape, validity = row
+        features, grid_shape = json.loads(features), json.loads(grid_shape)
+        n_validity = grid_shape[0] * grid_shape[1]
+        validity = np.unpackbits(np.frombuffer(validity, dtype=np.uint8))[:n_validity]
+        return CatalogEntry(file_path, prefix,
+                            datetime.strptime(start, _DATETIME_FMT),
+                            datetime.strptime(stop, _DATETIME_FMT),
+                            time_res_h, features, grid_shape,
+                            validity.astype(bool).reshape(grid_shape[:2]))
+
+    def get_entry(self, file_path):
+        """ Return catalog record of file_path, None if it was never recorded
+
+        :param file_path: Path FTSG was saved to
+        :type file_path: str
+        :rtype: CatalogEntry
+        """
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT file_path, prefix, datetime_start, datetime_stop, time_res_h, "
+                "features, grid_shape, validity FROM ftsgs WHERE file_path = ?",
+                (self._key(file_path),)
+            ).fetchone()
+        return None if row is None else self._to_entry(row)
+
+    def find(self, directory, prefix, time):
+        """ Return records of FTSGs of prefix in directory whose time axis
+        covers time, after their start up to and including their stop
+
+        :param directory: Directory FTSGs were saved in
+        :type directory: str
+        :param prefix: Prefix FTSGs were saved with
+        :type prefix: str
+        :param time: Time to cover
+        :type time: datetime
+        :rtype: list<CatalogEntry>
+        """
+        time_str = _as_naive_utc(time).strftime(_DATETIME_FMT)
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                "SELECT file_path, prefix, datetime_start, datetime_stop, time_res_h, "
+                "features, grid_shape, validity FROM ftsgs WHERE directory = ? AND prefix = ? "
+                "AND datetime_start < ? AND datetime_stop >= ? ORDER BY datetime_start",
+                (self._key(directory), prefix, time_str, time_str)
+            ).fetchall()
+        return [self._to_entry(row) for row in rows]
+
+    def record_directory(self, directory):
+        """ Record every saved tar.gz or .ftsg FTSG in directory that is not
+        already in catalog, loading each once, for FTSGs saved before the
+        catalog was kept
+
+        :param directory: Directory of saved FTSGs
+        :type directory: str
+        :returns: Number of FTSGs recorded
+        :rtype: int
+        """
+        recorded = 0
+        for file_name in sorted(os.listdir(directory)):
+            file_path = os.path.join(directory, file_name)
+            if _FILE_NAME_REGEX.match(file_name) is None or self.get_entry(file_path) is not None:
+                continue
+            self.record(load_FeatureTimeSpaceGrid(file_path), file_path)
+            recorded += 1
+        return recorded
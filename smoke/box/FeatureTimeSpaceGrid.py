@@ -1,7 +1,8 @@
+import io
 import os
 import json
+import time
 import tarfile
-import tempfile
 import numpy as np
 import numpy.ma as ma
 import matplotlib.pyplot as plt
@@ -9,19 +10,97 @@ from datetime import datetime, timedelta
 from pytz import timezone
 from geopy.distance import distance
 from scipy.optimize import Bounds, minimize
-from collections import Counter
+from collections import Counter, OrderedDict
 
 from box.Box import Box
+from box.storage_dtype import resolve_storage_dtype
+from box.SparseGrid import SparseGrid
+from box import parallel_gzip
+from box.chunked_grid import CHUNKED_SUFFIX, ChunkedGridReader, is_chunked_grid, write_chunked_grid
 #from smoke.box.Box import Box
 
+# Reductions FeatureTimeSpaceGrid.coarsen and resample_time can combine
+# blocks of cells or times with
+REDUCE_METHODS = ('mean', 'sum', 'max')
+
+
+def _as_datetime64_ns(times):
+    """ Convert datetime, np.datetime64, or pd.Timestamp (or arrays of any of
+    them) to datetime64[ns], timezone aware datetimes converted to naive UTC
+
+    :param times: Time or array of times to convert
+    :type times: datetime or np.array
+    :returns: Times as datetime64[ns] in same shape
+    :rtype: np.datetime64 or np.array
+    """
+    times = np.asarray(times)
+    if times.dtype == object:
+        times = np.array([
+            t.astimezone(timezone('UTC')).replace(tzinfo=None)
+            if getattr(t, 'tzinfo', None) is not None else t
+            for t in times.flat
+        ], dtype='datetime64[ns]').reshape(times.shape)
+    return times.astype('datetime64[ns]')
+
+
+class _TimeAxisIndex:
+
+    def __init__(self, times):
+        """ Hash index of a datetime64[ns] time axis, for O(1) lookup of a
+        single time and a sorted search of many times at once
+
+        :param times: Time axis to index
+        :type times: np.array of datetime64[ns]
+        """
+        self.times_ns = times.astype(np.int64)
+        self.base = 0
+        self.lookup = {time_ns: i for i, time_ns in enumerate(self.times_ns.tolist())}
+        self.order = np.argsort(self.times_ns, kind='stable')
+
+    def get_index(self, time):
+        # Index of single time, KeyError if not on axis
+        return self.lookup[_as_datetime64_ns(time).astype(np.int64).item()] - self.base
+
+    def get_indices(self, times):
+        # Indices of many times in shape of times, -1 where not on axis
+        times_ns = _as_datetime64_ns(times).astype(np.int64)
+        if self.times_ns.size == 0:
+            return np.full(times_ns.shape, -1, dtype=np.int64)
+        if self.order is None:
+            indices = np.minimum(np.searchsorted(self.times_ns, times_ns), self.times_ns.size - 1)
+        else:
+            sorted_pos = np.searchsorted(self.times_ns, times_ns, sorter=self.order)
+            indices = self.order[np.minimum(sorted_pos, self.order.size - 1)]
+        return np.where(self.times_ns[indices] == times_ns, indices, -1)
+
+    def roll(self, times, n_dropped):
+        # Re-index after n_dropped oldest times were dropped and any later
+        # times appended to give times, touching only the times that changed.
+        # Positions in lookup are kept and offset by base instead.
+        for time_ns in self.times_ns[:n_dropped].tolist():
+            del self.lookup[time_ns]
+        n_kept = self.times_ns.size - n_dropped
+        self.base += n_dropped
+        self.times_ns = times.view(np.int64)
+        for i, time_ns in enumerate(self.times_ns[n_kept:].tolist(), self.base + n_kept):
+            self.lookup[time_ns] = i
+        # Rolled axes are sorted
+        self.order = None
+
 
 class FeatureTimeSpaceGrid:
 
     def __init__(self, box, features,
-                 datetime_start, datetime_stop, time_res_h):
+                 datetime_start, datetime_stop, time_res_h, packed=False, dtype=None,
+                 sparse=False):
         """ Create an instance of a 4D grid with shape
         (n_features, n_time, n_latitude, n_longitude) object acts as a
-        wrapper around the 2D theoretical space grid of the given Box
+        wrapper around the 2D theoretical space grid of the given Box.
+        If packed the grid is instead stored as 3D cell vectors of shape
+        (n_features, n_time, n_aoi_cells) holding only the cells in the
+        Box's area of interest. If sparse only the cells that are not
+        np.nan are stored, for mostly empty grids such as fire detections,
+        and the grid is only made dense when asked for by get_grid.
 
         :param box: Theoretical space grid to use as last 2 dims of space
         :type box: smoke_tools.box.Box
@@ -33,8 +112,23 @@ class FeatureTimeSpaceGrid:
         :type datetime_stop: datetime
         :param time_res_h: Resolution to use in between start and stop for time in hours
         :type time_res_h: int
+        :param packed: Whether to store grid as packed cell vectors of the
+                       Box's area of interest, default False
+        :type packed: bool, optional
+        :param dtype: Floating point dtype to store grid as, one of
+                      storage_dtype.STORAGE_DTYPES, default None uses float32
+        :type dtype: str, optional
+        :param sparse: Whether to store only cells that are not np.nan,
+                       default False
+        :type sparse: bool, optional
 
         """
+        if packed and box.get_area_of_interest() is None:
+            raise ValueError("Box has no area of interest to pack grid to")
+        self.packed = packed
+        self.dtype = resolve_storage_dtype(dtype)
+        self.sparse = sparse
+
         # Assign box attributes
         self.box = box
 
@@ -56,17 +150,66 @@ class FeatureTimeSpaceGrid:
         # Create times and empty feature time space grid (features, time, lat, lon)
         # use ends of each time bins to make it easier for cleaner selection
         # as just have to choose all times in day
-        self.times = np.arange(
+        self.times = _as_datetime64_ns(np.arange(
             datetime_start+timedelta(hours=time_res_h),
             datetime_stop+timedelta(hours=time_res_h),
             timedelta(hours=time_res_h)
-        )
-        self.feature_time_space_grid = np.empty((self.features.size,
-                                                self.times.size,
-                                                self.box.get_num_cells(),
-                                                self.box.get_num_cells()
-                                                ))
-        self.feature_time_space_grid[:] = np.nan
+        ))
+        self.time_axis_index = _TimeAxisIndex(self.times)
+        self.feature_lookup = {feature: i for i, feature in enumerate(self.features.tolist())}
+        if self.sparse:
+            self.feature_time_space_grid = None
+            self.sparse_grid = SparseGrid(self._get_storage_shape(), self.dtype)
+        else:
+            self.feature_time_space_grid = np.full(self._get_storage_shape(),
+                                                   np.nan, dtype=self.dtype)
+
+        # Time axis and grid are windows into buffers that can be rolled
+        # forward without reallocating, see append_times
+        self._times_buffer = self.times
+        self._grid_buffer = self.feature_time_space_grid
+        self._time_offset = 0
+
+    def _get_space_shape(self):
+        # Shape of space axes of stored grid
+        if self.packed:
+            return (self.box.get_num_packed_cells(),)
+        return (self.box.get_num_cells(), self.box.get_num_cells())
+
+    def _get_storage_shape(self):
+        # Shape of stored grid
+        return (self.features.size, self.times.size) + self._get_space_shape()
+
+    def _to_storage_layout(self, grid):
+        # Pack grid if grid is stored packed and given grid is not
+        num_cells = self.box.get_num_cells()
+        if self.packed and grid.shape[-2:] == (num_cells, num_cells):
+            return self.box.pack_cells(grid)
+        return grid
+
+    def get_dtype(self):
+        """ Return np.dtype grid is stored as
+
+        """
+        return self.dtype
+
+    def is_sparse(self):
+        """ Return whether only cells that are not np.nan are stored
+
+        """
+        return self.sparse
+
+    def get_sparse_grid(self):
+        """ Return SparseGrid grid is stored in if sparse, None if not
+
+        """
+        return self.sparse_grid if self.sparse else None
+
+    def is_packed(self):
+        """ Return whether grid is stored as packed cell vectors
+
+        """
+        return self.packed
 
     def get_feature(self, i):
         """ Return feature at given index in features
@@ -84,16 +227,16 @@ class FeatureTimeSpaceGrid:
         """ Return int index of feature in features
 
         """
-        return np.indices(self.features.shape)[0][self.features == feature][0]
+        return self.feature_lookup[feature]
 
     def get_time(self, i):
         """ Return datetime at given index in times
 
         """
-        return self.times[i]
+        return self.times[i].astype('datetime64[us]').item()
 
     def get_times(self):
-        """ Return np.array of time axis
+        """ Return np.array of time axis as datetime64[ns]
 
         """
         return self.times
@@ -101,17 +244,129 @@ class FeatureTimeSpaceGrid:
     def get_time_index(self, time):
         """ Return int index of time in times
 
+        :param time: Time on time axis, naive or UTC
+        :type time: datetime or np.datetime64
+        """
+        return self.time_axis_index.get_index(time)
+
+    def get_time_indices(self, times):
+        """ Return int indices of many times in times at once
+
+        :param times: Times to find on time axis, naive or UTC
+        :type times: np.array
+        :returns: Indices in shape of times, -1 where time is not on time axis
+        :rtype: np.array
         """
-        return np.indices(self.times.shape)[0][self.times == time][0]
+        return self.time_axis_index.get_indices(times)
+
+    def _set_time_window(self, offset, n_time):
+        # Point time axis and grid at n_time times of buffers from offset
+        self._time_offset = offset
+        self.times = self._times_buffer[offset:offset + n_time]
+        if not self.sparse:
+            self.feature_time_space_grid = self._grid_buffer[:, offset:offset + n_time]
+
+    def _reserve_times(self, n_time_needed):
+        # Move time window to front of buffers so n_time_needed times fit,
+        # doubling buffers if less than half of them would be free, so any
+        # sequence of appends and drops moves each time amortized O(1) times
+        n_time = self.times.size
+        capacity = max(self._times_buffer.size, 2 * n_time_needed)
+        if capacity > self._times_buffer.size:
+            times_buffer = np.empty(capacity, dtype=self.times.dtype)
+            times_buffer[:n_time] = self.times
+            self._times_buffer = times_buffer
+            if not self.sparse:
+                shape = self._get_storage_shape()
+                grid_buffer = np.empty((shape[0], capacity) + shape[2:], dtype=self.dtype)
+                grid_buffer[:, :n_time] = self.feature_time_space_grid
+                self._grid_buffer = grid_buffer
+        else:
+            self._times_buffer[:n_time] = self.times
+            if not self.sparse:
+                self._grid_buffer[:, :n_time] = self.feature_time_space_grid
+        self._set_time_window(0, n_time)
+
+    def _shift_sparse_times(self, n_dropped, n_appended):
+        # Re-index stored cells of sparse grid for n_dropped oldest times
+        # dropped and n_appended times appended, O(number of stored cells)
+        shape = self.sparse_grid.shape
+        n_time, space_size = shape[1], int(np.prod(shape[2:]))
+        new_n_time = n_time - n_dropped + n_appended
+        flat_indices, values = self.sparse_grid.get_cells()
+        feature_indices, remainder = np.divmod(flat_indices, n_time * space_size)
+        kept = remainder >= n_dropped * space_size
+        sparse_grid = SparseGrid((shape[0], new_n_time) + shape[2:], self.dtype)
+        sparse_grid.set_cells(
+            feature_indices[kept] * new_n_time * space_size + remainder[kept] - n_dropped * space_size,
+            values[kept]
+        )
+        self.sparse_grid = sparse_grid
+
+    def append_times(self, n_times=1):
+        """ Extend time axis by n_times times after datetime_stop, their
+        grids all np.nan, in amortized O(1) per time as time axis and grid
+        are over allocated
+
+        :param n_times: Number of times to append, default 1
+        :type n_times: int, optional
+        """
+        n_time = self.times.size
+        if self._time_offset + n_time + n_times > self._times_buffer.size:
+            self._reserve_times(n_time + n_times)
+        start, stop = self._time_offset + n_time, self._time_offset + n_time + n_times
+        self._times_buffer[start:stop] = (
+            _as_datetime64_ns(self.datetime_stop) +
+            np.timedelta64(self.time_res_h, 'h') * np.arange(1, n_times + 1)
+        )
+        if self.sparse:
+            self._shift_sparse_times(0, n_times)
+        else:
+            self._grid_buffer[:, start:stop] = np.nan
+        self._set_time_window(self._time_offset, n_time + n_times)
+        self.time_axis_index.roll(self.times, 0)
+        self.datetime_stop += timedelta(hours=self.time_res_h * n_times)
+
+    def drop_oldest_times(self, n_times=1):
+        """ Drop the n_times oldest times from time axis and their grids,
+        moving datetime_start forward, in O(1) as only the time window into
+        buffers moves
+
+        :param n_times: Number of times to drop, default 1
+        :type n_times: int, optional
+        """
+        n_times = min(n_times, self.times.size)
+        if self.sparse:
+            self._shift_sparse_times(n_times, 0)
+        self._set_time_window(self._time_offset + n_times, self.times.size - n_times)
+        self.time_axis_index.roll(self.times, n_times)
+        self.datetime_start += timedelta(hours=self.time_res_h * n_times)
+
+    def roll_time_axis(self, n_times=1):
+        """ Append n_times times and drop as many of the oldest, keeping a
+        rolling window of the same length (e.g. the last 48 h of a source)
+
+        :param n_times: Number of times to roll forward by, default 1
+        :type n_times: int, optional
+        """
+        self.append_times(n_times)
+        self.drop_oldest_times(n_times)
 
     def set_grid(self, grid):
-        """ Set grid to whatever grid was given if it correct shape
+        """ Set grid to whatever grid was given if it correct shape, full
+        grids are packed if grid is stored packed
 
         :param grid: Grid of similar shape to replace current grid with
         :type grid: np.array
         """
-        assert self.get_grid().shape == grid.shape, "Given grid has incorrect shape"
-        self.feature_time_space_grid = grid
+        grid = self._to_storage_layout(grid).astype(self.dtype, copy=False)
+        assert self._get_storage_shape() == grid.shape, "Given grid has incorrect shape"
+        if self.sparse:
+            self.sparse_grid.set_dense(grid)
+        else:
+            self._times_buffer = self.times.copy()
+            self._grid_buffer = grid
+            self._set_time_window(0, self.times.size)
 
     def set_feature_grid(self, feature, grid):
         """ Set grid of time, space at feature to whatever grid was given if it
@@ -120,17 +375,144 @@ class FeatureTimeSpaceGrid:
         :param grid: Grid of similar shape to replace current grid at feature with
         :type grid: np.array
         """
-        assert self.get_grid().shape[1:] == grid.shape, "Given feature grid has incorrect shape"
+        grid = self._to_storage_layout(grid).astype(self.dtype, copy=False)
+        assert self._get_storage_shape()[1:] == grid.shape, "Given feature grid has incorrect shape"
         feature_index = self.get_feature_index(feature)
-        self.feature_time_space_grid[feature_index] = grid
+        if self.sparse:
+            self.sparse_grid.set_dense(grid, offset=feature_index * grid.size)
+        else:
+            self.feature_time_space_grid[feature_index] = grid
 
     def get_grid(self):
         """ Return np.array of current grid of FeatureTimeSpaceGrid shape
-        (n_features, n_time, n_latitude, n_longitude)
+        (n_features, n_time, n_latitude, n_longitude), or
+        (n_features, n_time, n_aoi_cells) if packed. If sparse a dense copy
+        is made, so writing to it does not change the grid.
 
         """
+        if self.sparse:
+            return self.sparse_grid.to_dense()
         return self.feature_time_space_grid
 
+    def is_all_nan(self):
+        """ Return whether every cell of grid is np.nan, without making
+        sparse grids dense
+
+        """
+        if self.sparse:
+            return self.sparse_grid.get_nnz() == 0
+        return bool(np.isnan(self.feature_time_space_grid).all())
+
+    def get_validity(self):
+        """ Return whether each feature at each time has any cell that is not
+        np.nan, without making sparse grids dense
+
+        :returns: Boolean array of shape (n_features, n_time)
+        :rtype: np.array
+        """
+        shape = self._get_storage_shape()
+        if self.sparse:
+            validity = np.zeros(shape[:2], dtype=bool)
+            flat_indices, _ = self.sparse_grid.get_cells()
+            validity.reshape(-1)[flat_indices // int(np.prod(shape[2:]))] = True
+            return validity
+        return ~np.isnan(self.feature_time_space_grid).reshape(shape[:2] + (-1,)).all(axis=-1)
+
+    def is_time_all_nan(self, time_index):
+        """ Return whether every cell of every feature at time_index is
+        np.nan, without copying the grid
+
+        :param time_index: Index on time axis
+        :type time_index: int
+        :rtype: bool
+        """
+        if self.sparse:
+            return not self.get_validity()[:, time_index].any()
+        return bool(np.isnan(self.feature_time_space_grid[:, time_index]).all())
+
+    def read_slices(self, time_indices, fill_val=-1, out=None):
+        """ Return grid of every feature at each of time_indices with np.nan
+        converted into fill_val, copying and filling only those times rather
+        than the whole grid. Grid is in storage layout, so packed cell vectors
+        if packed.
+
+        :param time_indices: Indices on time axis to read
+        :type time_indices: list<int> or np.array
+        :param fill_val: Value to replace np.nan with, default -1
+        :type fill_val: float, optional
+        :param out: Array to read into of shape (n_features, n_times_read, ...space),
+                    default None allocates one of grid's dtype
+        :type out: np.array, optional
+        :returns: Grid of shape (n_features, n_times_read, ...space), out if given
+        :rtype: np.array
+        """
+        time_indices = np.asarray(time_indices, dtype=np.int64).reshape(-1)
+        shape = self._get_storage_shape()
+        out_shape = (shape[0], time_indices.size) + shape[2:]
+        if out is None:
+            out = np.empty(out_shape, dtype=self.dtype)
+        assert out.shape == out_shape, "Given out has incorrect shape"
+
+        if self.sparse:
+            out[...] = fill_val
+            # Split flat indices of stored cells into feature, time and space
+            space_shape = shape[2:]
+            space_size = int(np.prod(space_shape))
+            flat_indices, values = self.sparse_grid.get_cells()
+            feature_indices, remainder = np.divmod(flat_indices, shape[1] * space_size)
+            cell_time_indices, space_indices = np.divmod(remainder, space_size)
+            # Fill the first position each time is requested at, then copy it
+            # to any later position requesting the same time
+            unique_times, first_positions, inverse = np.unique(
+                np.where(time_indices < 0, time_indices + shape[1], time_indices),
+                return_index=True, return_inverse=True
+            )
+            out_positions = np.full(shape[1], -1, dtype=np.int64)
+            out_positions[unique_times] = first_positions
+            out_positions = out_positions[cell_time_indices]
+            read = out_positions >= 0
+            out[(feature_indices[read], out_positions[read]) +
+                np.unravel_index(space_indices[read], space_shape)] = values[read]
+            repeated = np.flatnonzero(first_positions[inverse] != np.arange(time_indices.size))
+            out[:, repeated] = out[:, first_positions[inverse[repeated]]]
+            return out
+
+        for i, time_index in enumerate(time_indices):
+            out[:, i] = self.feature_time_space_grid[:, time_index]
+        np.copyto(out, fill_val, where=np.isnan(out))
+        return out
+
+    def read_slice(self, time_index, fill_val=-1, out=None):
+        """ Return grid of every feature at time_index with np.nan converted
+        into fill_val, copying and filling only that time rather than the
+        whole grid. Grid is in storage layout, so packed cell vectors if
+        packed.
+
+        :param time_index: Index on time axis to read
+        :type time_index: int
+        :param fill_val: Value to replace np.nan with, default -1
+        :type fill_val: float, optional
+        :param out: Array to read into of shape (n_features, ...space),
+                    default None allocates one of grid's dtype
+        :type out: np.array, optional
+        :returns: Grid of shape (n_features, ...space), out if given
+        :rtype: np.array
+        """
+        slices = self.read_slices([time_index], fill_val, None if out is None else out[:, np.newaxis])
+        return slices[:, 0]
+
+    def get_unpacked_grid(self, fill_val=np.nan):
+        """ Return np.array of current grid of FeatureTimeSpaceGrid shape
+        (n_features, n_time, n_latitude, n_longitude) whether packed or not,
+        cells outside of area of interest set to fill_val if packed
+
+        :param fill_val: Value of cells outside of area of interest, default np.nan
+        :type fill_val: float, optional
+        """
+        if self.packed:
+            return self.box.unpack_cells(self.get_grid(), fill_val)
+        return self.get_grid()
+
     def get_grid_nan_converted(self, fill_val=-1):
         """ Return np.array of current grid of FeatureTimeSpaceGrid shape
         (n_features, n_time, n_latitude, n_longitude) with all np.nan
@@ -139,12 +521,13 @@ class FeatureTimeSpaceGrid:
         :param fill_val: Value to replace np.nan with, default -1
         :type: float, optional
         """
-        grid_copy = self.feature_time_space_grid.copy()
+        # Sparse grids are already a dense copy
+        grid_copy = self.get_grid() if self.sparse else self.get_grid().copy()
         where_nan = np.isnan(grid_copy)
         grid_copy[where_nan] = fill_val
         return grid_copy
 
-    def assign_space_grid(self, lat, lon, mesh=True):
+    def assign_space_grid(self, lat, lon, mesh=True, lookup_table=None, method='consensus'):
         """ Assign cells i and j for every data point spatially based on longitude and
         latitude.
 
@@ -154,6 +537,12 @@ class FeatureTimeSpaceGrid:
         :type lon: np.array
         :param mesh: Whether or not to mesh 1D grids, default True
         :type mesh: bool, optional
+        :param lookup_table: Persistent lookup table to get assignments from,
+                             for grids that are assigned repeatedly, default None
+        :type lookup_table: smoke.box.AssignmentLookupTable, optional
+        :param method: Assignment method of Box.assign_cells, 'consensus' or
+                       'kdtree', default 'consensus'
+        :type method: str, optional
         :return: Masked array of jth row indices, ith column indices of data values in
                  shape of data, masked values are ones that fall outside of
                  grid of Box
@@ -166,19 +555,17 @@ class FeatureTimeSpaceGrid:
         # Save shape of coordinate arrays
         shape = lon.shape
 
-        # Vectorize assignment function and assign cell placement if in grid or
-        # leave unplaced w np.nan if not
-        assign_fcn_vectorized = np.vectorize(
-            self.box.get_cell_assignment_if_in_grid,
-            otypes=[float, float]
-        )
-        row, col = assign_fcn_vectorized(lat.flatten(), lon.flatten())
+        # Assign cell placement of all coordinates at once, leaving
+        # unplaced w -1 if not in grid
+        if lookup_table is not None:
+            row, col = lookup_table.get_assignments(self.box, lat, lon, method)
+        else:
+            row, col = self.box.assign_cells(lat.flatten(), lon.flatten(), method)
         row, col = row.reshape(shape), col.reshape(shape)
-        cell_indices = np.dstack((row, col))
+        cell_indices = np.dstack((row, col)).astype(int)
 
-        # Mask array where is np.nan (no assignment) and convert to int
-        cell_indices = ma.masked_where(np.isnan(cell_indices), cell_indices)
-        cell_indices = cell_indices.astype(int)
+        # Mask array where is -1 (no assignment)
+        cell_indices = ma.masked_where(cell_indices == -1, cell_indices)
 
         return cell_indices
 
@@ -197,7 +584,19 @@ class FeatureTimeSpaceGrid:
         :param value: Value to place at location
         :type value: float
         """
-        self.feature_time_space_grid[feature_index][time_index][j][i] = value
+        if self.packed:
+            # Drop values of cells outside of area of interest
+            cell_index = self.box.get_packed_index()[j][i]
+            if cell_index < 0:
+                return
+            index = (feature_index, time_index, cell_index)
+        else:
+            index = (feature_index, time_index, j, i)
+
+        if self.sparse:
+            self.sparse_grid.set_cells(self._get_flat_index(index), value)
+        else:
+            self.feature_time_space_grid[index] = value
 
     def populate_space_grid(self, feature, time, unique_cell_assignments, data_vals):
         """ Given an array of unique grid cell assignments (j, i) and corresponding data_vals
@@ -213,10 +612,183 @@ class FeatureTimeSpaceGrid:
                           in unique_cell_assignments
         :type data_vals: np.array shape=(unique_cell_assignments, )
         """
+        unique_cell_assignments = np.asarray(unique_cell_assignments).reshape(-1, 2)
+        self.populate_space_grid_many(feature,
+                                      self.get_time_index(time),
+                                      unique_cell_assignments[:, 0],
+                                      unique_cell_assignments[:, 1],
+                                      data_vals)
+
+    def _get_scatter_index(self, feature, time_indices, rows, cols):
+        # Index into stored grid for a batch of cells, packed grids dropping
+        # cells outside of area of interest
         feature_index = self.get_feature_index(feature)
-        time_index = self.get_time_index(time)
-        for coords, val in zip(unique_cell_assignments, data_vals):
-            self.populate_cell(feature_index, time_index, coords[0], coords[1], val)
+        time_indices, rows, cols = np.broadcast_arrays(time_indices, rows, cols)
+        if not self.packed:
+            return (feature_index, time_indices, rows, cols), None
+        cell_indices = self.box.get_packed_index()[rows, cols]
+        keep = cell_indices >= 0
+        return (feature_index, time_indices[keep], cell_indices[keep]), keep
+
+    def _get_flat_index(self, index):
+        # Flat index into stored grid of index tuple
+        return np.ravel_multi_index(np.broadcast_arrays(*index), self._get_storage_shape())
+
+    def populate_space_grid_many(self, feature, time_indices, rows, cols, values):
+        """ Populate a batch of cells at feature with values in one
+        assignment, where a cell is given more than once the last value is
+        kept as with populate_cell
+
+        :param feature: Feature in grid to populate
+        :type feature: str
+        :param time_indices: Index on time axis of each value, or one index for all
+        :type time_indices: np.array or int
+        :param rows: Row index of each value
+        :type rows: np.array
+        :param cols: Column index of each value
+        :type cols: np.array
+        :param values: Values to place in cells
+        :type values: np.array or float
+        """
+        index, keep = self._get_scatter_index(feature, time_indices, rows, cols)
+        values = np.broadcast_to(values, index[1].shape if keep is None else keep.shape)
+        values = values if keep is None else values[keep]
+        if self.sparse:
+            self.sparse_grid.set_cells(self._get_flat_index(index), values)
+        else:
+            self.feature_time_space_grid[index] = values
+
+    def accumulate_space_grid_many(self, feature, time_indices, rows, cols, values):
+        """ Add a batch of values to cells at feature, a cell given more than
+        once is added to once for each value. Cells still np.nan are treated
+        as 0 so accumulating into a fresh grid gives sums (or counts with
+        values of 1).
+
+        :param feature: Feature in grid to accumulate into
+        :type feature: str
+        :param time_indices: Index on time axis of each value, or one index for all
+        :type time_indices: np.array or int
+        :param rows: Row index of each value
+        :type rows: np.array
+        :param cols: Column index of each value
+        :type cols: np.array
+        :param values: Values to add to cells
+        :type values: np.array or float
+        """
+        index, keep = self._get_scatter_index(feature, time_indices, rows, cols)
+        values = np.broadcast_to(values, index[1].shape if keep is None else keep.shape)
+        values = values if keep is None else values[keep]
+        if self.sparse:
+            self.sparse_grid.add_cells(self._get_flat_index(index), values)
+            return
+        grid = self.feature_time_space_grid
+        grid[index] = np.where(np.isnan(grid[index]), 0, grid[index])
+        np.add.at(grid, index, values)
+
+    def coarsen(self, factor, how='mean'):
+        """ Return FeatureTimeSpaceGrid of the same features and times on a
+        Box factor times coarser (e.g. 10 km from 5 km with factor 2), each
+        coarse cell the reduction of the cells whose centers fall in it (see
+        Box.get_coarse_cell_map) ignoring np.nan, np.nan if every one of them
+        is. Packed and sparse grids stay packed and sparse, sparse grids
+        reduced from their stored cells only.
+
+        :param factor: Number of cells along each axis of a coarse cell
+        :type factor: int
+        :param how: One of REDUCE_METHODS, default 'mean'
+        :type how: str, optional
+        :returns: Coarser grid, its Box's spec given by box.to_spec()
+        :rtype: FeatureTimeSpaceGrid
+        """
+        if how not in REDUCE_METHODS:
+            raise ValueError(f"Unknown reduce method {how}, use one of {REDUCE_METHODS}")
+        coarse_box = self.box.coarsen(factor)
+        coarse_ftsg = FeatureTimeSpaceGrid(coarse_box, self.features,
+                                           self.datetime_start.replace(tzinfo=None),
+                                           self.datetime_stop.replace(tzinfo=None),
+                                           self.time_res_h, packed=self.packed,
+                                           dtype=self.dtype, sparse=self.sparse)
+        coarse_rows, coarse_cols = self.box.get_coarse_cell_map(coarse_box)
+        coarse_space_index = coarse_box.get_packed_index()[coarse_rows, coarse_cols]
+        coarse_space_size = int(np.prod(coarse_ftsg._get_space_shape()))
+
+        # Flat index of every valid cell on its own grid's feature and time
+        # axes and within its unpacked space
+        if self.sparse:
+            shape = self._get_storage_shape()
+            flat_indices, values = self.sparse_grid.get_cells()
+            feature_time_indices, space_indices = np.divmod(flat_indices, int(np.prod(shape[2:])))
+            if self.packed:
+                space_indices = np.flatnonzero(self.box.get_area_of_interest())[space_indices]
+        else:
+            grid = self.get_unpacked_grid()
+            grid = grid.reshape(grid.shape[:2] + (-1,))
+            valid = ~np.isnan(grid)
+            feature_indices, time_indices, space_indices = np.nonzero(valid)
+            feature_time_indices = feature_indices * grid.shape[1] + time_indices
+            values = grid[valid]
+
+        # Reduce cells falling in the same coarse cell
+        coarse_flat_indices, reduced = _reduce_cells(
+            feature_time_indices * coarse_space_size + coarse_space_index.ravel()[space_indices],
+            values, how
+        )
+        if self.sparse:
+            coarse_ftsg.get_sparse_grid().set_cells(coarse_flat_indices, reduced.astype(self.dtype))
+        else:
+            coarse_grid = np.full(coarse_ftsg._get_storage_shape(), np.nan, dtype=self.dtype)
+            coarse_grid.reshape(-1)[coarse_flat_indices] = reduced
+            coarse_ftsg.set_grid(coarse_grid)
+        return coarse_ftsg
+
+    def resample_time(self, new_res_h, how='mean'):
+        """ Return FeatureTimeSpaceGrid of the same features, space and time
+        range at a coarser time resolution (e.g. 3 h or 24 h from 1 h), each
+        new time bin the reduction of the times it covers ignoring np.nan,
+        np.nan if every one of them is. Packed and sparse grids stay packed
+        and sparse, sparse grids reduced from their stored cells only. To
+        resample windows spanning several saved daily grids see
+        ftsg_range.resample_ftsg_range.
+
+        :param new_res_h: New time resolution in hours, a multiple of
+                          time_res_h dividing the time range
+        :type new_res_h: int
+        :param how: One of REDUCE_METHODS, default 'mean'
+        :type how: str, optional
+        :returns: Resampled grid
+        :rtype: FeatureTimeSpaceGrid
+        """
+        if how not in REDUCE_METHODS:
+            raise ValueError(f"Unknown reduce method {how}, use one of {REDUCE_METHODS}")
+        n_time = self.times.size
+        if new_res_h < self.time_res_h or new_res_h % self.time_res_h or n_time % (new_res_h // self.time_res_h):
+            raise ValueError(
+                f"Time axis of {n_time} times every {self.time_res_h} h can not be resampled to {new_res_h} h"
+            )
+        factor = new_res_h // self.time_res_h
+        resampled_ftsg = FeatureTimeSpaceGrid(self.box, self.features,
+                                              self.datetime_start.replace(tzinfo=None),
+                                              self.datetime_stop.replace(tzinfo=None),
+                                              new_res_h, packed=self.packed,
+                                              dtype=self.dtype, sparse=self.sparse)
+        space_shape = self._get_space_shape()
+        if not self.sparse:
+            blocks = self.get_grid().reshape((self.features.size, n_time // factor, factor) + space_shape)
+            resampled_ftsg.set_grid(_nan_reduce(blocks, 2, how))
+            return resampled_ftsg
+
+        # Map every stored cell to the time bin it falls in and reduce cells
+        # falling in the same one
+        space_size = int(np.prod(space_shape))
+        flat_indices, values = self.sparse_grid.get_cells()
+        feature_time_indices, space_indices = np.divmod(flat_indices, space_size)
+        feature_indices, time_indices = np.divmod(feature_time_indices, n_time)
+        resampled_flat_indices, reduced = _reduce_cells(
+            (feature_indices * (n_time // factor) + time_indices // factor) * space_size + space_indices,
+            values, how
+        )
+        resampled_ftsg.get_sparse_grid().set_cells(resampled_flat_indices, reduced.astype(self.dtype))
+        return resampled_ftsg
 
     def diagnostic_plot(self):
         """ Plot 2D plot for all features and times
@@ -229,7 +801,7 @@ class FeatureTimeSpaceGrid:
             for time in self.get_times():
 
                 time_index = self.get_time_index(time)
-                grid2D = self.get_grid()[feature_index][time_index]
+                grid2D = self.get_unpacked_grid()[feature_index][time_index]
 
                 fig, ax = plt.subplots(figsize=(16.2, 16))
                 im = ax.imshow(grid2D)
@@ -240,70 +812,178 @@ class FeatureTimeSpaceGrid:
 
                 plt.show()
 
-    def save(self, save_dir, prefix=''):
+    def get_unique_name(self, prefix=''):
+        """ Return name unique to grid's start time, stop time, and time
+        resolution that saved grids are named with
+
+        :param prefix: Prefix to add before automatically generated name,
+                       (e.g. firework_ or bluesky_), default ''
+        :type prefix: str
+        """
+        return (
+            prefix +
+            self.datetime_start.strftime('strt%Y%m%dT%H%M%S_') +
+            self.datetime_stop.strftime('stop%Y%m%dT%H%M%S_') +
+            f"res{self.time_res_h}"
+        )
+
+    def _get_time_args(self):
+        # Args needed to recreate time axis
+        return {
+            "datetime_start":self.datetime_start.strftime('%Y-%m-%dT%H:%M:%S'),
+            "datetime_stop":self.datetime_stop.strftime('%Y-%m-%dT%H:%M:%S'),
+            "time_res_h":self.time_res_h
+        }
+
+    def _get_meta_data(self, unique_name):
+        # Human readable description of saved grid
+        return {
+            "unique file name":unique_name,
+            "start (inclusive)":self.datetime_start.strftime('%Y-%m-%dT%H:%M:%S'),
+            "stop (exclusive)":self.datetime_stop.strftime('%Y-%m-%dT%H:%M:%S'),
+            "time resolution (h)":self.time_res_h,
+            "features list":list(self.get_features()),
+            "times list":list(self.get_times().astype('datetime64[us]').astype(str)),
+            "grid shape":self._get_storage_shape(),
+            "packed":self.packed,
+            "sparse":self.sparse,
+            "dtype":self.dtype.name,
+            "grid all nan":self.is_all_nan()
+        }
+
+    def save_chunked(self, save_dir, prefix='', time_chunk_size=1, compression='zlib'):
+        """ Save grid in the chunked format of chunked_grid, a directory named
+        like save's tar.gz but ending in .ftsg holding a JSON header and the
+        grid chunked by feature and time_chunk_size times, so it can be read
+        a few chunks at a time instead of extracted whole
+
+        :param save_dir: Directory to save grid directory into
+        :type save_dir: str
+        :param prefix: Prefix to add before automatically generated name,
+                       (e.g. firework_ or bluesky_), default ''
+        :type prefix: str
+        :param time_chunk_size: Times in each chunk, default 1
+        :type time_chunk_size: int, optional
+        :param compression: Compression of each chunk, 'zlib' or None for
+                            memory mappable chunks, default 'zlib'
+        :type compression: str, optional
+        :returns: Path of saved grid directory
+        :rtype: str
+        """
+        unique_name = self.get_unique_name(prefix)
+        header = self._get_meta_data(unique_name)
+        header.update({
+            "box_args":self.orig_box_args,
+            "time_args":self._get_time_args()
+        })
+        if self.packed:
+            header["aoi_mask"] = np.flatnonzero(self.box.get_area_of_interest()).tolist()
+
+        save_path = os.path.join(save_dir, unique_name + CHUNKED_SUFFIX)
+        write_chunked_grid(save_path, self.get_grid(), header, time_chunk_size, compression)
+        return save_path
+
+    def save(self, save_dir, prefix='', compression_threads=None):
         """ Save 4D grid array, features array, time array, and
         corresponding Box and other meta data in .npy and .json
         files describing entirely the current FTSG.
         File name will contain grid start time, grid end time, and
-        grid time resolution
+        grid time resolution. Files are tarred in memory, gzipped on
+        several threads and written to a temporary file renamed into place,
+        so a partially written tar.gz is never seen at the file name.
 
         :param save_dir: Directory to save tar.gz into
         :type save_dir: str
         :param prefix: Prefix to add before automatically generated name,
                        (e.g. firework_ or bluesky_), default ''
         :type prefix: str
+        :param compression_threads: Threads to gzip with, default None uses
+                                    cpu count
+        :type compression_threads: int, optional
+        :returns: Path of saved tar.gz
+        :rtype: str
         """
         # Generate unique name from start time sop time and some prefix
-        unique_name = (
-            prefix +
-            self.datetime_start.strftime('strt%Y%m%dT%H%M%S_') +
-            self.datetime_stop.strftime('stop%Y%m%dT%H%M%S_') +
-            f"res{self.time_res_h}"
+        unique_name = self.get_unique_name(prefix)
+
+        # Serialize individual .npy and .json files in memory
+        members = OrderedDict()
+        members['features.npy'] = _npy_bytes(self.get_features())
+        members['times.npy'] = _npy_bytes(self.get_times().astype('datetime64[us]'))
+        if self.sparse:
+            # Only valid cells, as flat indices into grid of grid shape
+            sparse_indices, sparse_values = self.sparse_grid.get_cells()
+            members['sparse_indices.npy'] = _npy_bytes(sparse_indices)
+            members['sparse_values.npy'] = _npy_bytes(sparse_values)
+        else:
+            members['grid.npy'] = _npy_bytes(self.get_grid())
+        if self.packed:
+            members['aoi_mask.npy'] = _npy_bytes(self.box.get_area_of_interest())
+        members['box_args.json'] = _json_bytes(self.orig_box_args)
+        members['time_args.json'] = _json_bytes(self._get_time_args())
+        members['meta.json'] = _json_bytes(self._get_meta_data(unique_name))
+
+        # Tar .npy and .json in memory then compress into a .tar.gz with
+        # unique_name in save_dir
+        tar_buffer = io.BytesIO()
+        with tarfile.open(fileobj=tar_buffer, mode='w') as f_tar:
+            for name, data in members.items():
+                tar_info = tarfile.TarInfo(name)
+                tar_info.size = len(data)
+                tar_info.mtime = time.time()
+                f_tar.addfile(tar_info, io.BytesIO(data))
+        save_path = os.path.join(save_dir, unique_name+'.tar.gz')
+        parallel_gzip.write_atomic(
+            save_path,
+            parallel_gzip.compress(tar_buffer.getbuffer(), threads=compression_threads)
         )
-
-        # Save individual .npy and .json file in temp dir pre compress
-        temp_dir = tempfile.TemporaryDirectory()
-        temp_dir_path = temp_dir.name
-        np.save(os.path.join(temp_dir_path, 'features.npy'), self.get_features())
-        np.save(os.path.join(temp_dir_path, 'times.npy'), self.get_times())
-        np.save(os.path.join(temp_dir_path, 'grid.npy'), self.get_grid())
-        with open(os.path.join(temp_dir_path, 'box_args.json'), 'w') as f_json:
-            json.dump(self.orig_box_args, f_json, indent=2)
-        with open(os.path.join(temp_dir_path, 'time_args.json'), 'w') as f_json:
-            time_args = {
-                "datetime_start":self.datetime_start.strftime('%Y-%m-%dT%H:%M:%S'),
-                "datetime_stop":self.datetime_stop.strftime('%Y-%m-%dT%H:%M:%S'),
-                "time_res_h":self.time_res_h
-            }
-            json.dump(time_args, f_json, indent=2)
-        with open(os.path.join(temp_dir_path, 'meta.json'), 'w') as f_json:
-            meta_data = {
-                "unique file name":unique_name,
-                "start (inclusive)":self.datetime_start.strftime('%Y-%m-%dT%H:%M:%S'),
-                "stop (exclusive)":self.datetime_stop.strftime('%Y-%m-%dT%H:%M:%S'),
-                "time resolution (h)":self.time_res_h,
-                "features list":list(self.get_features()),
-                "times list":list(self.get_times().astype(str)),
-                "grid shape":self.get_grid().shape,
-                "grid all nan":bool(np.isnan(self.get_grid()).all())
-            }
-            json.dump(meta_data, f_json, indent=2)
-
-        # Compress .npy and .json into a .tar.gz with unique_name in save_dir
-        with tarfile.open(os.path.join(save_dir, unique_name+'.tar.gz'), 'w:gz') as f_tar:
-            files_in_temp = [
-                os.path.join(temp_dir_path, f_in_temp) for f_in_temp in os.listdir(temp_dir_path)
-            ]
-            for f_in_temp in files_in_temp:
-                f_tar.add(f_in_temp, arcname=os.path.basename(f_in_temp))
-
-        # Explicity close tempdir
-        temp_dir.cleanup()
+        return save_path
+
+
+def _nan_reduce(blocks, axis, how):
+    # Reduce blocks over axis ignoring np.nan, left np.nan where every value
+    # reduced is
+    valid = ~np.isnan(blocks)
+    counts = valid.sum(axis=axis)
+    if how == 'max':
+        reduced = np.where(valid, blocks, -np.inf).max(axis=axis)
+    else:
+        reduced = np.where(valid, blocks, 0).sum(axis=axis, dtype=np.float64)
+        if how == 'mean':
+            reduced /= np.maximum(counts, 1)
+    reduced[counts == 0] = np.nan
+    return reduced
+
+
+def _reduce_cells(flat_indices, values, how):
+    # Reduce valid cell values falling on the same flat index, returning the
+    # sorted unique flat indices and their reduced values
+    unique_indices, inverse = np.unique(flat_indices, return_inverse=True)
+    if how == 'max':
+        reduced = np.full(unique_indices.size, -np.inf)
+        np.maximum.at(reduced, inverse, values)
+    else:
+        reduced = np.bincount(inverse, weights=values, minlength=unique_indices.size)
+        if how == 'mean':
+            reduced /= np.bincount(inverse, minlength=unique_indices.size)
+    return unique_indices, reduced
+
+
+def _npy_bytes(arr):
+    # Bytes of arr saved as .npy file
+    buffer = io.BytesIO()
+    np.save(buffer, arr)
+    return buffer.getvalue()
+
+
+def _json_bytes(obj):
+    # Bytes of obj saved as .json file
+    return json.dumps(obj, indent=2).encode('utf-8')
 
 
 class TemporaryTimeSpaceGrid:
 
-    def __init__(self, box, times):
+    def __init__(self, box, times, dtype=None):
         """ Create an instance of a 4D grid with shape
         (n_features, n_time, n_latitude, n_longitude) object acts as a
         wrapper around the 2D theoretical space grid of the given Box
@@ -312,23 +992,29 @@ class TemporaryTimeSpaceGrid:
         :type box: smoke.box.Box
         :param times: Array of times to use for time axis of timespace grid
         :type times: numpy.ndarray
+        :param dtype: Floating point dtype to store grid as, one of
+                      storage_dtype.STORAGE_DTYPES, default None uses float32
+        :type dtype: str, optional
         """
         # Assign box attributes
         self.box = box
 
         # Create time and empty feature time space grid (time, lat, lon)
-        self.times = times
-        self.time_space_grid = np.empty(
+        self.times = _as_datetime64_ns(times)
+        self.time_axis_index = _TimeAxisIndex(self.times)
+        self.dtype = resolve_storage_dtype(dtype)
+        self.time_space_grid = np.full(
             (
                 self.times.size,
                 self.box.get_num_cells(),
                 self.box.get_num_cells()
-            )
+            ),
+            np.nan,
+            dtype=self.dtype
         )
-        self.time_space_grid[:] = np.nan
 
     def get_times(self):
-        """ Return np.array of time axis
+        """ Return np.array of time axis as datetime64[ns]
 
         """
         return self.times
@@ -337,7 +1023,14 @@ class TemporaryTimeSpaceGrid:
         """ Return int index of time in times
 
         """
-        return np.indices(self.times.shape)[0][self.times == time][0]
+        return self.time_axis_index.get_index(time)
+
+    def get_time_indices(self, times):
+        """ Return int indices of many times in times at once, -1 where time
+        is not on time axis
+
+        """
+        return self.time_axis_index.get_indices(times)
 
     def get_grid(self):
         """ Return np.array of current grid of TemporaryTimeSpaceGrid shape
@@ -382,48 +1075,189 @@ class TemporaryTimeSpaceGrid:
                           in unique_cell_assignments
         :type data_vals: np.array shape=(unique_cell_assignments, )
         """
-        time_index = self.get_time_index(time)
-        for coords, val in zip(unique_cell_assignments, data_vals):
-            self.populate_cell(time_index, coords[0], coords[1], val)
+        unique_cell_assignments = np.asarray(unique_cell_assignments).reshape(-1, 2)
+        self.populate_space_grid_many(self.get_time_index(time),
+                                      unique_cell_assignments[:, 0],
+                                      unique_cell_assignments[:, 1],
+                                      data_vals)
+
+    def populate_space_grid_many(self, time_indices, rows, cols, values):
+        """ Populate a batch of cells with values in one assignment, where a
+        cell is given more than once the last value is kept as with
+        populate_cell
+
+        :param time_indices: Index on time axis of each value, or one index for all
+        :type time_indices: np.array or int
+        :param rows: Row index of each value
+        :type rows: np.array
+        :param cols: Column index of each value
+        :type cols: np.array
+        :param values: Values to place in cells
+        :type values: np.array or float
+        """
+        self.time_space_grid[time_indices, rows, cols] = values
+
+    def accumulate_space_grid_many(self, time_indices, rows, cols, values):
+        """ Add a batch of values to cells, a cell given more than once is
+        added to once for each value. Cells still np.nan are treated as 0 so
+        accumulating into a fresh grid gives sums (or counts with values of 1).
+
+        :param time_indices: Index on time axis of each value, or one index for all
+        :type time_indices: np.array or int
+        :param rows: Row index of each value
+        :type rows: np.array
+        :param cols: Column index of each value
+        :type cols: np.array
+        :param values: Values to add to cells
+        :type values: np.array or float
+        """
+        index = tuple(np.broadcast_arrays(time_indices, rows, cols))
+        grid = self.time_space_grid
+        grid[index] = np.where(np.isnan(grid[index]), 0, grid[index])
+        np.add.at(grid, index, values)
 
 
-def load_FeatureTimeSpaceGrid(file_path):
+def load_FeatureTimeSpaceGrid(file_path, dtype=None):
     """ Load a previously saved FTSG into the same state as it was when it was
     saved
 
-    :param file_path: Path to saved tar.gz of FeatureTimeSpaceGrid
+    :param file_path: Path to saved tar.gz or chunked .ftsg directory of
+                      FeatureTimeSpaceGrid
     :type file_path: str
+    :param dtype: Floating point dtype to cast grid to, default None keeps
+                  the dtype grid was saved as (float64 for older files)
+    :type dtype: str, optional
     :returns: FeatureTimeSpaceGrid in same state as one which was saved
     :rtype: FeatureTimeSpaceGrid
     """
-    # Load all files in tar.gz into a temp dir
-    temp_dir = tempfile.TemporaryDirectory()
-    temp_dir_path = temp_dir.name
-    f_tar = tarfile.open(file_path, mode='r')
-    f_tar.extractall(temp_dir_path)
+    if is_chunked_grid(file_path):
+        return _load_chunked_FeatureTimeSpaceGrid(file_path, dtype)
+
+    # Decompress tar.gz in memory and read every file in it
+    with open(file_path, 'rb') as f_gz:
+        tar_buffer = io.BytesIO(parallel_gzip.decompress(f_gz.read()))
+    with tarfile.open(fileobj=tar_buffer, mode='r:') as f_tar:
+        members = {
+            os.path.basename(member.name): f_tar.extractfile(member).read()
+            for member in f_tar.getmembers() if member.isfile()
+        }
 
     # Create FeatureTimeSpaceGrid from old data
-    features = np.load(os.path.join(temp_dir_path, "features.npy"))
-    with open(os.path.join(temp_dir_path, "box_args.json")) as f_json:
-        box_args = json.load(f_json)
-    with open(os.path.join(temp_dir_path, "time_args.json")) as f_json:
-        time_args = json.load(f_json)
-    new_box = Box(box_args["nw_lat"],
-                  box_args["nw_lon"],
-                  box_args["sw_lat_est"],
-                  box_args["sw_lon_est"],
-                  box_args["dist_km"],
-                  box_args["dist_res_km"])
-    new_ftsg = FeatureTimeSpaceGrid(
-        new_box,
+    features = np.load(io.BytesIO(members["features.npy"]))
+    box_args = json.loads(members["box_args.json"])
+    time_args = json.loads(members["time_args.json"])
+    new_box = _box_from_args(box_args)
+
+    # Grids saved packed come with the area of interest they were packed to
+    packed = "aoi_mask.npy" in members
+    if packed:
+        new_box.set_area_of_interest(np.load(io.BytesIO(members["aoi_mask.npy"])))
+
+    # Grids saved sparse come as only their valid cells
+    sparse = "sparse_indices.npy" in members
+    if sparse:
+        sparse_indices = np.load(io.BytesIO(members["sparse_indices.npy"]))
+        sparse_values = np.load(io.BytesIO(members["sparse_values.npy"]))
+        saved_dtype = sparse_values.dtype
+    else:
+        grid = np.load(io.BytesIO(members["grid.npy"]))
+        saved_dtype = grid.dtype
+
+    new_ftsg = _ftsg_from_args(new_box, features, time_args, packed,
+                               saved_dtype if dtype is None else dtype, sparse)
+    if sparse:
+        new_ftsg.get_sparse_grid().set_cells(sparse_indices, sparse_values)
+    else:
+        new_ftsg.set_grid(grid)
+
+    return new_ftsg
+
+
+def _box_from_args(box_args):
+    # Box from original args saved with grid
+    return Box(box_args["nw_lat"],
+               box_args["nw_lon"],
+               box_args["sw_lat_est"],
+               box_args["sw_lon_est"],
+               box_args["dist_km"],
+               box_args["dist_res_km"])
+
+
+def _ftsg_from_args(box, features, time_args, packed, dtype, sparse=False):
+    # Empty FTSG from time args saved with grid
+    return FeatureTimeSpaceGrid(
+        box,
         features,
         datetime.strptime(time_args["datetime_start"], '%Y-%m-%dT%H:%M:%S'),
         datetime.strptime(time_args["datetime_stop"], '%Y-%m-%dT%H:%M:%S'),
-        time_args["time_res_h"]
+        time_args["time_res_h"],
+        packed=packed,
+        dtype=dtype,
+        sparse=sparse
     )
-    new_ftsg.set_grid(np.load(os.path.join(temp_dir_path, "grid.npy")))
 
-    # Explicity close tempdir
-    temp_dir.cleanup()
 
+def open_chunked_FeatureTimeSpaceGrid(dir_path, mmap=True):
+    """ Open a FTSG saved by save_chunked for reading only the chunks needed,
+    without loading its grid
+
+    :param dir_path: Path to saved .ftsg directory of FeatureTimeSpaceGrid
+    :type dir_path: str
+    :param mmap: Whether to memory map uncompressed chunks, default True
+    :type mmap: bool, optional
+    :returns: Reader of grid's chunks, its header holding the FTSG's meta data
+    :rtype: chunked_grid.ChunkedGridReader
+    """
+    return ChunkedGridReader(dir_path, mmap)
+
+
+def _load_chunked_FeatureTimeSpaceGrid(dir_path, dtype=None):
+    # Load FTSG saved by save_chunked, reading every chunk
+    reader = ChunkedGridReader(dir_path, mmap=True)
+    header = reader.get_header()
+
+    new_box = _box_from_args(header["box_args"])
+    packed = header.get("packed", False)
+    if packed:
+        aoi_mask = np.zeros(new_box.get_num_cells() ** 2, dtype=bool)
+        aoi_mask[header["aoi_mask"]] = True
+        new_box.set_area_of_interest(aoi_mask.reshape(new_box.get_num_cells(), new_box.get_num_cells()))
+
+    new_ftsg = _ftsg_from_args(new_box, np.array(header["features list"]), header["time_args"],
+                               packed, reader.dtype if dtype is None else dtype,
+                               header.get("sparse", False))
+    new_ftsg.set_grid(reader.read())
     return new_ftsg
+
+
+def save_FeatureTimeSpaceGrid_pyramid(ftsg, save_dir, prefix='', factors=(2, 5), how='mean',
+                                      chunked=False):
+    """ Save ftsg and a copy of it coarsened by each of factors alongside it
+    in save_dir, each coarse level's prefix followed by its Box's resolution
+    (e.g. firework_closest_10km_ and firework_closest_25km_ for a 5 km
+    firework_closest_ grid), so levels are found like the base grid is
+
+    :param ftsg: Base grid of pyramid
+    :type ftsg: FeatureTimeSpaceGrid
+    :param save_dir: Directory to save every level into
+    :type save_dir: str
+    :param prefix: Prefix of base grid, default ''
+    :type prefix: str, optional
+    :param factors: Factor to coarsen base grid by for each level, default (2, 5)
+    :type factors: tuple<int>, optional
+    :param how: One of REDUCE_METHODS, default 'mean'
+    :type how: str, optional
+    :param chunked: Whether to save levels in the chunked .ftsg format
+                    instead of as tar.gz's, default False
+    :type chunked: bool, optional
+    :returns: Paths of saved levels, base grid first
+    :rtype: list<str>
+    """
+    levels = [(prefix, ftsg)]
+    for factor in factors:
+        coarse_ftsg = ftsg.coarsen(factor, how)
+        levels.append((f"{prefix}{coarse_ftsg.box.get_orig_box_args()[5]:g}km_", coarse_ftsg))
+    return [
+        level_ftsg.save_chunked(save_dir, level_prefix) if chunked else level_ftsg.save(save_dir, level_prefix)
+        for level_prefix, level_ftsg in levels
+    ]
@@ -0,0 +1,124 @@
+import numpy as np
+
+
+class SparseGrid:
+
+    def __init__(self, shape, dtype):
+        """ Create a grid of given shape that is np.nan everywhere except at
+        the cells it has been given values for, stored as COO flat cell
+        indices and values so memory scales with the number of valid cells
+        and not the grid's size. Writes are appended and only coalesced
+        (last write of a cell kept, np.nan writes removing the cell) when
+        the grid is read.
+
+        :param shape: Shape of dense grid
+        :type shape: tuple<int>
+        :param dtype: Floating point dtype of values
+        :type dtype: np.dtype
+        """
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.indices = np.empty(0, dtype=np.int64)
+        self.values = np.empty(0, dtype=self.dtype)
+        self.pending = []
+
+    def _coalesce(self):
+        # Fold pending writes into indices and values, keeping the last value
+        # written to each cell and dropping cells that are np.nan
+        if not self.pending:
+            return
+        indices = np.concatenate([self.indices] + [p[0] for p in self.pending])
+        values = np.concatenate([self.values] + [p[1] for p in self.pending])
+        self.pending = []
+
+        # Unique on reversed writes finds the last write of each cell
+        unique_indices, last_reversed = np.unique(indices[::-1], return_index=True)
+        unique_values = values[::-1][last_reversed]
+        valid = ~np.isnan(unique_values)
+        self.indices, self.values = unique_indices[valid], unique_values[valid]
+
+    def get_nnz(self):
+        """ Return number of cells with a valid value
+
+        :rtype: int
+        """
+        self._coalesce()
+        return self.indices.size
+
+    def get_cells(self):
+        """ Return sorted flat indices of valid cells into the dense grid and
+        their values
+
+        :rtype: (np.array, np.array)
+        """
+        self._coalesce()
+        return self.indices, self.values
+
+    def set_cells(self, flat_indices, values):
+        """ Set cells at flat indices to values, the last value given for a
+        cell kept, np.nan values clearing the cell
+
+        :param flat_indices: Flat indices of cells into the dense grid
+        :type flat_indices: np.array
+        :param values: Value of each cell
+        :type values: np.array or float
+        """
+        flat_indices = np.asarray(flat_indices, dtype=np.int64).ravel()
+        values = np.broadcast_to(np.asarray(values, dtype=self.dtype), flat_indices.shape)
+        self.pending.append((flat_indices, values.ravel()))
+
+    def add_cells(self, flat_indices, values):
+        """ Add values to cells at flat indices, a cell given more than once
+        added to once for each value, cells without a value treated as 0
+
+        :param flat_indices: Flat indices of cells into the dense grid
+        :type flat_indices: np.array
+        :param values: Value to add to each cell
+        :type values: np.array or float
+        """
+        self._coalesce()
+        flat_indices = np.asarray(flat_indices, dtype=np.int64).ravel()
+        values = np.broadcast_to(np.asarray(values, dtype=self.dtype), flat_indices.shape).ravel()
+        unique_indices, inverse = np.unique(
+            np.concatenate((self.indices, flat_indices)), return_inverse=True
+        )
+        sums = np.bincount(inverse, weights=np.concatenate((self.values, values)),
+                           minlength=unique_indices.size)
+        self.indices, self.values = np.empty(0, dtype=np.int64), np.empty(0, dtype=self.dtype)
+        self.set_cells(unique_indices, sums)
+
+    def clear_range(self, start, stop):
+        """ Clear every cell with a flat index in [start, stop)
+
+        :param start: First flat index to clear
+        :type start: int
+        :param stop: Flat index to clear up to
+        :type stop: int
+        """
+        self._coalesce()
+        keep = (self.indices < start) | (self.indices >= stop)
+        self.indices, self.values = self.indices[keep], self.values[keep]
+
+    def set_dense(self, grid, offset=0):
+        """ Replace cells of a dense block of the grid starting at flat
+        index offset with the valid values of grid
+
+        :param grid: Dense values of block, np.nan where not valid
+        :type grid: np.array
+        :param offset: Flat index of the first cell of block, default 0
+        :type offset: int, optional
+        """
+        flat_grid = np.asarray(grid).ravel()
+        self.clear_range(offset, offset + flat_grid.size)
+        valid = np.flatnonzero(~np.isnan(flat_grid))
+        self.set_cells(valid + offset, flat_grid[valid])
+
+    def to_dense(self):
+        """ Return dense grid, np.nan where there is no valid value
+
+        :rtype: np.array
+        """
+        self._coalesce()
+        dense = np.full(self.shape, np.nan, dtype=self.dtype)
+        dense.reshape(-1)[self.indices] = self.values
+        return dense
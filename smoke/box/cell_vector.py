@@ -0,0 +1,81 @@
+'''
+Packed "cell vector" layout of Box grids, keeping only the cells of an area
+of interest mask (e.g. land within the province) along one flattened last
+axis instead of the full square of num_cells x num_cells
+'''
+import numpy as np
+
+
+def _check_mask(grid_shape, aoi_mask):
+    if tuple(grid_shape[-2:]) != aoi_mask.shape:
+        raise ValueError(
+            f"Grid of shape {tuple(grid_shape)} does not end in area of interest shape {aoi_mask.shape}"
+        )
+
+
+def pack_cells(grid, aoi_mask):
+    """ Pack grid of shape (..., num_cells, num_cells) into cell vectors of
+    shape (..., n_aoi_cells), keeping cells in row major order
+
+    :param grid: Grid to pack, any leading axes
+    :type grid: np.array
+    :param aoi_mask: Boolean mask of cells in area of interest, shape
+                     (num_cells, num_cells)
+    :type aoi_mask: np.array
+    :returns: Packed copy of grid
+    :rtype: np.array
+    """
+    grid, aoi_mask = np.asarray(grid), np.asarray(aoi_mask, dtype=bool)
+    _check_mask(grid.shape, aoi_mask)
+    flat_grid = grid.reshape(grid.shape[:-2] + (aoi_mask.size,))
+    return np.take(flat_grid, np.flatnonzero(aoi_mask), axis=-1)
+
+
+def unpack_cells(packed, aoi_mask, fill_val=np.nan, out=None):
+    """ Unpack cell vectors of shape (..., n_aoi_cells) back into a grid of
+    shape (..., num_cells, num_cells), filling cells outside of the area of
+    interest with fill_val
+
+    :param packed: Cell vectors to unpack, any leading axes
+    :type packed: np.array
+    :param aoi_mask: Boolean mask of cells in area of interest, shape
+                     (num_cells, num_cells)
+    :type aoi_mask: np.array
+    :param fill_val: Value of cells outside of area of interest, default np.nan
+    :type fill_val: float, optional
+    :param out: C contiguous array to unpack into instead of allocating one,
+                default None
+    :type out: np.array, optional
+    :returns: Unpacked grid
+    :rtype: np.array
+    """
+    packed, aoi_mask = np.asarray(packed), np.asarray(aoi_mask, dtype=bool)
+    flat_indices = np.flatnonzero(aoi_mask)
+    if packed.shape[-1] != flat_indices.size:
+        raise ValueError(
+            f"Packed cells of shape {packed.shape} do not match {flat_indices.size} area of interest cells"
+        )
+
+    shape = packed.shape[:-1] + aoi_mask.shape
+    if out is None:
+        out = np.empty(shape, dtype=np.result_type(packed.dtype, np.min_scalar_type(fill_val)))
+    elif out.shape != shape or not out.flags.c_contiguous:
+        raise ValueError(f"out must be C contiguous of shape {shape}")
+    out[...] = fill_val
+    out.reshape(packed.shape[:-1] + (aoi_mask.size,))[..., flat_indices] = packed
+    return out
+
+
+def packed_index(aoi_mask):
+    """ Return index of every cell in the packed cell vector, -1 for cells
+    outside of the area of interest
+
+    :param aoi_mask: Boolean mask of cells in area of interest
+    :type aoi_mask: np.array
+    :returns: Packed index of each cell in shape of aoi_mask
+    :rtype: np.array of np.int32
+    """
+    aoi_mask = np.asarray(aoi_mask, dtype=bool)
+    index = np.full(aoi_mask.shape, -1, dtype=np.int32)
+    index[aoi_mask] = np.arange(np.count_nonzero(aoi_mask), dtype=np.int32)
+    return index
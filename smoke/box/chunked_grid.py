@@ -0,0 +1,198 @@
+'''
+Chunked on-disk format of FeatureTimeSpaceGrids. A grid is saved as a
+directory ending in CHUNKED_SUFFIX holding a JSON header and the grid split
+into chunks of one feature by time_chunk_size times, each chunk its own file
+so readers only read (or memory map) the chunks they need:
+
+    header.json                   grid shape, dtype, chunking, compression,
+                                  chunk index and any FTSG meta data
+    chunks/f{f}_t{t}.npy          uncompressed chunk, memory mappable
+    chunks/f{f}_t{t}.zlib         zlib compressed raw chunk bytes
+
+Chunks that are entirely np.nan are not written at all.
+'''
+import os
+import json
+import zlib
+import shutil
+import numpy as np
+
+
+CHUNKED_SUFFIX = '.ftsg'
+HEADER_NAME = 'header.json'
+CHUNKS_DIR = 'chunks'
+FORMAT_NAME = 'ftsg-chunked'
+FORMAT_VERSION = 1
+COMPRESSIONS = (None, 'zlib')
+
+
+def is_chunked_grid(path):
+    """ Return whether path is a grid saved in the chunked format
+
+    :param path: Path to check
+    :type path: str
+    :rtype: bool
+    """
+    return os.path.isfile(os.path.join(path, HEADER_NAME))
+
+
+def _chunk_file_name(feature_index, time_chunk_index, compression):
+    extension = 'npy' if compression is None else compression
+    return f"f{feature_index}_t{time_chunk_index}.{extension}"
+
+
+def write_chunked_grid(path, grid, header=None, time_chunk_size=1,
+                       compression='zlib', compression_level=6):
+    """ Write grid of shape (n_features, n_time, ...) in the chunked format to
+    directory path, replacing anything already at path only once every chunk
+    is written
+
+    :param path: Directory to write grid to, should end in CHUNKED_SUFFIX
+    :type path: str
+    :param grid: Grid to write
+    :type grid: np.array
+    :param header: Extra JSON serializable meta data to store in header,
+                   default None
+    :type header: dict, optional
+    :param time_chunk_size: Times in each chunk, default 1
+    :type time_chunk_size: int, optional
+    :param compression: One of COMPRESSIONS, default 'zlib', None writes
+                        memory mappable .npy chunks
+    :type compression: str, optional
+    :param compression_level: zlib compression level 0 to 9, default 6
+    :type compression_level: int, optional
+    :returns: Header written
+    :rtype: dict
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression}, use one of {COMPRESSIONS}")
+    grid = np.asarray(grid)
+
+    # Write into a temporary sibling so an interrupted write never leaves a
+    # partial grid at path
+    temp_path = path.rstrip(os.sep) + '.partial'
+    if os.path.exists(temp_path):
+        shutil.rmtree(temp_path)
+    os.makedirs(os.path.join(temp_path, CHUNKS_DIR))
+
+    chunks = {}
+    for feature_index in range(grid.shape[0]):
+        for time_start in range(0, grid.shape[1], time_chunk_size):
+            time_chunk_index = time_start // time_chunk_size
+            chunk = np.ascontiguousarray(grid[feature_index, time_start:time_start + time_chunk_size])
+            if np.isnan(chunk).all():
+                continue
+
+            file_name = _chunk_file_name(feature_index, time_chunk_index, compression)
+            chunk_path = os.path.join(temp_path, CHUNKS_DIR, file_name)
+            if compression is None:
+                np.save(chunk_path, chunk)
+            else:
+                with open(chunk_path, 'wb') as f_chunk:
+                    f_chunk.write(zlib.compress(chunk.tobytes(), compression_level))
+            chunks[f"{feature_index},{time_chunk_index}"] = file_name
+
+    full_header = dict(header or {})
+    full_header.update({
+        "format":FORMAT_NAME,
+        "version":FORMAT_VERSION,
+        "grid shape":list(grid.shape),
+        "dtype":grid.dtype.name,
+        "time chunk size":time_chunk_size,
+        "compression":compression,
+        "chunks":chunks
+    })
+    with open(os.path.join(temp_path, HEADER_NAME), 'w') as f_json:
+        json.dump(full_header, f_json, indent=2)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.rename(temp_path, path)
+    return full_header
+
+
+class ChunkedGridReader:
+
+    def __init__(self, path, mmap=True):
+        """ Open a grid saved in the chunked format, reading only its header
+        until chunks are asked for
+
+        :param path: Directory grid was written to
+        :type path: str
+        :param mmap: Whether to memory map uncompressed chunks instead of
+                     reading them, default True
+        :type mmap: bool, optional
+        """
+        self.path = path
+        self.mmap = mmap
+        with open(os.path.join(path, HEADER_NAME), 'r') as f_json:
+            self.header = json.load(f_json)
+        if self.header.get("format") != FORMAT_NAME:
+            raise ValueError(f"{path} is not a chunked grid")
+        self.shape = tuple(self.header["grid shape"])
+        self.dtype = np.dtype(self.header["dtype"])
+        self.time_chunk_size = self.header["time chunk size"]
+
+    def get_header(self):
+        """ Return header of grid
+
+        :rtype: dict
+        """
+        return self.header
+
+    def _get_chunk_shape(self, time_chunk_index):
+        time_start = time_chunk_index * self.time_chunk_size
+        n_times = min(self.time_chunk_size, self.shape[1] - time_start)
+        return (n_times,) + self.shape[2:]
+
+    def read_chunk(self, feature_index, time_chunk_index):
+        """ Read chunk of one feature and time_chunk_size times, all np.nan if
+        the chunk was not written
+
+        :param feature_index: Index on feature axis
+        :type feature_index: int
+        :param time_chunk_index: Index of chunk along time axis
+        :type time_chunk_index: int
+        :returns: Chunk of shape (n_times_in_chunk, ...)
+        :rtype: np.array
+        """
+        chunk_shape = self._get_chunk_shape(time_chunk_index)
+        file_name = self.header["chunks"].get(f"{feature_index},{time_chunk_index}")
+        if file_name is None:
+            return np.full(chunk_shape, np.nan, dtype=self.dtype)
+
+        chunk_path = os.path.join(self.path, CHUNKS_DIR, file_name)
+        if self.header["compression"] is None:
+            return np.load(chunk_path, mmap_mode='r' if self.mmap else None)
+        with open(chunk_path, 'rb') as f_chunk:
+            return np.frombuffer(zlib.decompress(f_chunk.read()), dtype=self.dtype).reshape(chunk_shape)
+
+    def read(self, feature_indices=None, time_indices=None, out=None):
+        """ Read grid at the given features and times, only touching the
+        chunks holding them
+
+        :param feature_indices: Indices on feature axis, default None reads all
+        :type feature_indices: list<int>, optional
+        :param time_indices: Indices on time axis, default None reads all
+        :type time_indices: list<int>, optional
+        :param out: Array of shape (n_features_read, n_times_read, ...) to read
+                    into instead of allocating one, default None
+        :type out: np.array, optional
+        :returns: Grid of shape (n_features_read, n_times_read, ...)
+        :rtype: np.array
+        """
+        feature_indices = np.arange(self.shape[0]) if feature_indices is None else np.asarray(feature_indices)
+        time_indices = np.arange(self.shape[1]) if time_indices is None else np.asarray(time_indices)
+        shape = (feature_indices.size, time_indices.size) + self.shape[2:]
+        if out is None:
+            out = np.empty(shape, dtype=self.dtype)
+        elif out.shape != shape:
+            raise ValueError(f"out must be of shape {shape}")
+
+        time_chunk_indices = time_indices // self.time_chunk_size
+        for i, feature_index in enumerate(feature_indices):
+            for time_chunk_index in np.unique(time_chunk_indices):
+                in_chunk = np.flatnonzero(time_chunk_indices == time_chunk_index)
+                chunk = self.read_chunk(feature_index, time_chunk_index)
+                out[i, in_chunk] = chunk[time_indices[in_chunk] % self.time_chunk_size]
+        return out
@@ -0,0 +1,311 @@
+'''
+Lazy multi-day view of saved FeatureTimeSpaceGrids. open_ftsg_range stitches
+the daily tar.gz or chunked .ftsg FTSGs of a prefix into one xarray DataArray
+of dims (feature, time, row, col), or (feature, time, cell) for packed grids,
+with latitude and longitude of cell centers as coordinates. Opening reads
+file names and the first FTSG's metadata, its header alone if chunked but the
+whole grid if a tar.gz as those can only be decompressed whole; indexing the
+DataArray reads only the days, and for .ftsg grids only the chunks, that the
+selection touches.
+With dask installed the view can also be chunked, one dask chunk per day.
+resample_ftsg_range resamples the same files to a coarser time resolution,
+reading them a day of windows at a time.
+'''
+import os
+import re
+import threading
+import numpy as np
+import xarray as xr
+from datetime import datetime, timedelta
+from xarray.backends.common import BackendArray
+from xarray.core import indexing
+
+# Lazy indexing relies on xarray internals, tested against the pinned
+# xarray==0.15.1, LazilyOuterIndexedArray being renamed LazilyIndexedArray in
+# later releases
+try:
+    _explicit_indexing_adapter = indexing.explicit_indexing_adapter
+    _OUTER_INDEXING = indexing.IndexingSupport.OUTER
+    _LazilyIndexedArray = getattr(indexing, 'LazilyIndexedArray', None) or indexing.LazilyOuterIndexedArray
+except AttributeError as e:
+    raise ImportError(
+        f"xarray {xr.__version__} does not provide the lazy indexing ftsg_range needs, "
+        f"use the version pinned in requirements.txt"
+    ) from e
+
+from .FeatureTimeSpaceGrid import (FeatureTimeSpaceGrid, REDUCE_METHODS, load_FeatureTimeSpaceGrid,
+                                   _as_datetime64_ns, _box_from_args, _nan_reduce)
+from .chunked_grid import CHUNKED_SUFFIX, ChunkedGridReader
+
+
+def _find_day_files(directory, prefix):
+    # (start, stop, time_res_h, file_name) of every saved FTSG of prefix in
+    # directory sorted by start, .ftsg preferred over a tar.gz of same name
+    name_regex = re.compile(
+        re.escape(prefix) + r"strt(\d{8}T\d{6})_stop(\d{8}T\d{6})_res(\d+)(\.tar\.gz|\.ftsg)$"
+    )
+    day_files = {}
+    for file_name in os.listdir(directory):
+        match = name_regex.match(file_name)
+        if match is None:
+            continue
+        key = match.group(1, 2, 3)
+        if key not in day_files or match.group(4) == CHUNKED_SUFFIX:
+            day_files[key] = file_name
+    return sorted(
+        (datetime.strptime(start, '%Y%m%dT%H%M%S'), datetime.strptime(stop, '%Y%m%dT%H%M%S'),
+         int(time_res_h), file_name)
+        for (start, stop, time_res_h), file_name in day_files.items()
+    )
+
+
+class _FTSGRangeArray(BackendArray):
+
+    def __init__(self, sources, shape, dtype):
+        """ Array of many saved FTSGs concatenated along time, reading only
+        the FTSGs and chunks an index touches
+
+        :param sources: (path, indices on FTSG's time axis) of each FTSG in
+                        time order
+        :type sources: list<(str, np.array)>
+        :param shape: Shape of concatenated grid
+        :type shape: tuple<int>
+        :param dtype: dtype of concatenated grid
+        :type dtype: np.dtype
+        """
+        self.sources = sources
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        self.source_starts = np.cumsum([0] + [indices.size for _, indices in sources])
+        # Last tar.gz loaded, as they can only be read whole
+        self._loaded = (None, None)
+        # Reader of each .ftsg read, so its header is parsed once
+        self._readers = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        return _explicit_indexing_adapter(
+            key, self.shape, _OUTER_INDEXING, self._getitem
+        )
+
+    def _load(self, path):
+        with self._lock:
+            loaded_path, ftsg = self._loaded
+            if loaded_path != path:
+                ftsg = load_FeatureTimeSpaceGrid(path)
+                self._loaded = (path, ftsg)
+            return ftsg
+
+    def _get_reader(self, path):
+        with self._lock:
+            if path not in self._readers:
+                self._readers[path] = ChunkedGridReader(path)
+            return self._readers[path]
+
+    def _read_source(self, source_index, feature_indices, time_indices):
+        # Grid of source at features and indices on its own time axis
+        path, source_time_indices = self.sources[source_index]
+        time_indices = source_time_indices[time_indices]
+        if path.endswith(CHUNKED_SUFFIX):
+            return self._get_reader(path).read(feature_indices, time_indices)
+        return self._load(path).read_slices(time_indices, fill_val=np.nan)[feature_indices]
+
+    def _getitem(self, key):
+        feature_indices = np.atleast_1d(np.arange(self.shape[0])[key[0]])
+        time_indices = np.atleast_1d(np.arange(self.shape[1])[key[1]])
+        grid = np.full((feature_indices.size, time_indices.size) + self.shape[2:], np.nan,
+                       dtype=self.dtype)
+
+        # Read the times of each source touched
+        source_indices = np.searchsorted(self.source_starts, time_indices, side='right') - 1
+        for source_index in np.unique(source_indices):
+            in_source = np.flatnonzero(source_indices == source_index)
+            grid[:, in_source] = self._read_source(
+                source_index, feature_indices,
+                time_indices[in_source] - self.source_starts[source_index]
+            )
+
+        # Apply space keys and drop axes indexed by an int, last axis first so
+        # the axis numbers of the rest hold
+        local_key = tuple(0 if isinstance(k, (int, np.integer)) else slice(None) for k in key[:2])
+        local_key += tuple(key[2:])
+        for axis in reversed(range(len(local_key))):
+            grid = grid[(slice(None),) * axis + (local_key[axis],)]
+        return grid
+
+
+def _open_range(directory, prefix, datetime_start, datetime_stop, dtype=None):
+    # Lazy array of every saved FTSG of prefix in directory with times after
+    # datetime_start up to datetime_stop, with its times, features, Box,
+    # whether packed and time resolution, read from file names and the
+    # first FTSG alone, whose header alone is read if chunked but whose whole
+    # grid is if a tar.gz, kept loaded or its reader kept for the first read
+    query_start = _as_datetime64_ns(datetime_start)
+    query_stop = _as_datetime64_ns(datetime_stop)
+
+    # Times of each FTSG file on the range from its name alone
+    sources, times, time_res_hs = [], [], set()
+    for day_start, day_stop, time_res_h, file_name in _find_day_files(directory, prefix):
+        day_times = _as_datetime64_ns(np.arange(
+            day_start + timedelta(hours=time_res_h),
+            day_stop + timedelta(hours=time_res_h),
+            timedelta(hours=time_res_h)
+        ))
+        in_range = np.flatnonzero((day_times > query_start) & (day_times <= query_stop))
+        if in_range.size:
+            sources.append((os.path.join(directory, file_name), in_range))
+            times.append(day_times[in_range])
+            time_res_hs.add(time_res_h)
+    if not sources:
+        raise FileNotFoundError(
+            f"No FTSGs of prefix {prefix} in {directory} between {datetime_start} and {datetime_stop}"
+        )
+    if len(time_res_hs) > 1:
+        raise ValueError(f"FTSGs of prefix {prefix} in {directory} have time resolutions {sorted(time_res_hs)}")
+
+    # Features, Box and layout from first FTSG, its header alone if chunked,
+    # else the whole tar.gz as its members can only be decompressed together
+    first_path = sources[0][0]
+    first_ftsg, first_reader = None, None
+    if first_path.endswith(CHUNKED_SUFFIX):
+        first_reader = ChunkedGridReader(first_path)
+        header = first_reader.get_header()
+        features = np.array(header["features list"])
+        box = _box_from_args(header["box_args"])
+        packed = header.get("packed", False)
+        if packed:
+            aoi_mask = np.zeros(box.get_num_cells() ** 2, dtype=bool)
+            aoi_mask[header["aoi_mask"]] = True
+            box.set_area_of_interest(aoi_mask.reshape(box.get_num_cells(), box.get_num_cells()))
+        saved_dtype = header["dtype"]
+    else:
+        first_ftsg = load_FeatureTimeSpaceGrid(first_path)
+        features, box, packed = first_ftsg.get_features(), first_ftsg.box, first_ftsg.is_packed()
+        saved_dtype = first_ftsg.get_dtype()
+
+    times = np.concatenate(times)
+    space_shape = (box.get_num_packed_cells(),) if packed else (box.get_num_cells(), box.get_num_cells())
+    backend_array = _FTSGRangeArray(sources, (features.size, times.size) + space_shape,
+                                    saved_dtype if dtype is None else dtype)
+    if first_ftsg is not None:
+        backend_array._loaded = (first_path, first_ftsg)
+    if first_reader is not None:
+        backend_array._readers[first_path] = first_reader
+    return backend_array, times, features, box, packed, time_res_hs.pop()
+
+
+def open_ftsg_range(directory, prefix, datetime_start, datetime_stop, dtype=None, chunks=None):
+    """ Open every saved FTSG of prefix in directory as one lazy DataArray
+    with times after datetime_start up to and including datetime_stop, as
+    FTSG time axes are. Only the first FTSG is read when opened, its header
+    alone if chunked but its whole grid if a tar.gz; the rest are only read
+    when the DataArray's values are, and only for the times and features
+    selected.
+
+    :param directory: Directory of daily saved tar.gz or .ftsg FTSGs
+    :type directory: str
+    :param prefix: Prefix FTSGs were saved with (e.g. firework_closest_)
+    :type prefix: str
+    :param datetime_start: Time to start after
+    :type datetime_start: datetime
+    :param datetime_stop: Time to stop at inclusive
+    :type datetime_stop: datetime
+    :param dtype: Floating point dtype to read grids as, default None keeps
+                  the dtype of the first FTSG
+    :type dtype: str, optional
+    :param chunks: If given the view is made a dask array with these chunks,
+                   'day' giving one chunk per FTSG file, needs dask, default
+                   None leaves it lazily indexed without dask
+    :type chunks: str or dict, optional
+    :returns: Lazy grid with feature, time, lat and lon coordinates
+    :rtype: xr.DataArray
+    """
+    backend_array, times, features, box, packed, _ = _open_range(
+        directory, prefix, datetime_start, datetime_stop, dtype
+    )
+
+    # Space dims and cell center coordinates
+    lat, lon = box.get_cell_centers()
+    if packed:
+        space_dims = ('cell',)
+        lat, lon = box.pack_cells(lat), box.pack_cells(lon)
+    else:
+        space_dims = ('row', 'col')
+    dims = ('feature', 'time') + space_dims
+    variable = xr.Variable(dims, _LazilyIndexedArray(backend_array))
+
+    data_array = xr.DataArray(
+        variable,
+        coords={'feature':features, 'time':times,
+                'lat':(space_dims, lat), 'lon':(space_dims, lon)},
+        name=prefix.rstrip('_') or None
+    )
+    if chunks == 'day':
+        chunks = {'feature':1, 'time':tuple(indices.size for _, indices in backend_array.sources)}
+    if chunks is not None:
+        data_array = data_array.chunk(chunks)
+    return data_array
+
+
+def resample_ftsg_range(directory, prefix, datetime_start, datetime_stop, new_res_h,
+                        how='mean', dtype=None):
+    """ Resample every saved FTSG of prefix in directory from datetime_start
+    to datetime_stop to time resolution new_res_h in one FeatureTimeSpaceGrid,
+    windows spanning consecutive daily files reduced as one, like
+    FeatureTimeSpaceGrid.resample_time does within a grid. Times of days
+    that were not saved count as np.nan. Files are read about a day of
+    windows at a time, never the whole range at the original resolution.
+
+    :param directory: Directory of daily saved tar.gz or .ftsg FTSGs
+    :type directory: str
+    :param prefix: Prefix FTSGs were saved with (e.g. firework_closest_)
+    :type prefix: str
+    :param datetime_start: Time for resampled grid to start exclusive
+    :type datetime_start: datetime
+    :param datetime_stop: Time for resampled grid to end inclusive
+    :type datetime_stop: datetime
+    :param new_res_h: New time resolution in hours, a multiple of the saved
+                      FTSGs' dividing the time range
+    :type new_res_h: int
+    :param how: One of REDUCE_METHODS, default 'mean'
+    :type how: str, optional
+    :param dtype: Floating point dtype of resampled grid, default None keeps
+                  the dtype of the first FTSG
+    :type dtype: str, optional
+    :returns: Resampled grid
+    :rtype: FeatureTimeSpaceGrid
+    """
+    if how not in REDUCE_METHODS:
+        raise ValueError(f"Unknown reduce method {how}, use one of {REDUCE_METHODS}")
+    backend_array, times, features, box, packed, time_res_h = _open_range(
+        directory, prefix, datetime_start, datetime_stop, dtype
+    )
+    if (new_res_h < time_res_h or new_res_h % time_res_h or
+            (datetime_stop - datetime_start) % timedelta(hours=new_res_h)):
+        raise ValueError(
+            f"{datetime_start} to {datetime_stop} every {time_res_h} h can not be resampled to {new_res_h} h"
+        )
+    factor = new_res_h // time_res_h
+    resampled_ftsg = FeatureTimeSpaceGrid(box, features, datetime_start, datetime_stop, new_res_h,
+                                          packed=packed, dtype=backend_array.dtype)
+
+    # Original times covered by each new time bin, new times being bin ends
+    window_times = (resampled_ftsg.get_times()[:, np.newaxis] -
+                    np.timedelta64(time_res_h, 'h') * np.arange(factor - 1, -1, -1))
+    space_shape = backend_array.shape[2:]
+    space_key = (slice(None),) * len(space_shape)
+    grid = np.empty(resampled_ftsg._get_storage_shape(), dtype=backend_array.dtype)
+    windows_per_read = max(1, 24 // new_res_h)
+    for window_start in range(0, window_times.shape[0], windows_per_read):
+        wanted_times = window_times[window_start:window_start + windows_per_read].ravel()
+        positions = np.minimum(np.searchsorted(times, wanted_times), times.size - 1)
+        saved = times[positions] == wanted_times
+        blocks = np.full((features.size, wanted_times.size) + space_shape, np.nan,
+                         dtype=backend_array.dtype)
+        if saved.any():
+            blocks[:, saved] = backend_array._getitem((slice(None), positions[saved]) + space_key)
+        grid[:, window_start:window_start + windows_per_read] = _nan_reduce(
+            blocks.reshape((features.size, -1, factor) + space_shape), 2, how
+        )
+    resampled_ftsg.set_grid(grid)
+    return resampled_ftsg
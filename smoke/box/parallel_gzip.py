@@ -0,0 +1,76 @@
+'''
+Multithreaded gzip of in memory data. Data is split into blocks that are
+compressed on a thread pool (zlib releases the GIL) into one gzip member
+each, and the members concatenated, which is still a valid gzip file read by
+gzip, tarfile and gunzip as usual.
+'''
+import os
+import gzip
+import zlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def _compress_block(block, level):
+    # One complete gzip member of block, wbits of 31 giving gzip framing
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(block) + compressor.flush()
+
+
+def compress(data, level=6, block_size=DEFAULT_BLOCK_SIZE, threads=None):
+    """ Gzip compress data on several threads
+
+    :param data: Data to compress
+    :type data: bytes
+    :param level: zlib compression level 0 to 9, default 6
+    :type level: int, optional
+    :param block_size: Bytes of data in each independently compressed block,
+                       default 4 MiB
+    :type block_size: int, optional
+    :param threads: Threads to compress with, default None uses cpu count
+    :type threads: int, optional
+    :returns: Gzip compressed data of one or more members
+    :rtype: bytes
+    """
+    data = memoryview(data)
+    blocks = [data[i:i + block_size] for i in range(0, len(data), block_size)] or [b'']
+    if len(blocks) == 1:
+        return _compress_block(blocks[0], level)
+    with ThreadPoolExecutor(max_workers=threads or os.cpu_count()) as executor:
+        return b''.join(executor.map(lambda block: _compress_block(block, level), blocks))
+
+
+def decompress(data):
+    """ Decompress gzip data of one or more members
+
+    :param data: Gzip compressed data
+    :type data: bytes
+    :returns: Decompressed data
+    :rtype: bytes
+    """
+    return gzip.decompress(data)
+
+
+def write_atomic(file_path, data):
+    """ Write data to file_path through a temporary file in the same
+    directory renamed over file_path, so readers never see a partial file
+
+    :param file_path: Path to write to
+    :type file_path: str
+    :param data: Data to write
+    :type data: bytes
+    """
+    f_temp, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(file_path)),
+                                         suffix='.partial')
+    try:
+        with os.fdopen(f_temp, 'wb') as f_out:
+            f_out.write(data)
+            f_out.flush()
+            os.fsync(f_out.fileno())
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
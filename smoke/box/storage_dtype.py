@@ -0,0 +1,29 @@
+'''
+Floating point dtype policy of gridded data from parsing through to tensors,
+float32 by default since that is what tensors are made of anyway, with
+float16 as an opt-in for halving memory and disk again at the cost of
+precision (about 3 significant digits, largest value 65504)
+'''
+import numpy as np
+
+
+# Dtypes data may be stored as, by name
+STORAGE_DTYPES = ('float16', 'float32', 'float64')
+DEFAULT_STORAGE_DTYPE = 'float32'
+
+
+def resolve_storage_dtype(dtype=None):
+    """ Return numpy dtype of given storage dtype, the default if None
+
+    :param dtype: One of STORAGE_DTYPES or its numpy dtype, default None
+                  uses DEFAULT_STORAGE_DTYPE
+    :type dtype: str or np.dtype, optional
+    :returns: Storage dtype
+    :rtype: np.dtype
+    """
+    if dtype is None:
+        dtype = DEFAULT_STORAGE_DTYPE
+    dtype = np.dtype(dtype)
+    if dtype.name not in STORAGE_DTYPES:
+        raise ValueError(f"Unsupported storage dtype {dtype.name}, use one of {STORAGE_DTYPES}")
+    return dtype
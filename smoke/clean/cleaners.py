@@ -5,30 +5,53 @@ import numpy.ma as ma
 import xarray as xr
 from datetime import datetime
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 
 from smoke.load.datasets import GeographicalDataset
 from smoke.load.parsers import *
 from smoke.clean.toolset import *
 from smoke.box.Box import Box
+from smoke.box.AssignmentLookupTable import AssignmentLookupTable
+from smoke.box.BoxSet import BoxSet
 from smoke.box.FeatureTimeSpaceGrid import *
 
 
 class BCBox(Box):
-    def __init__(self, resolution_km=5):
+    def __init__(self, resolution_km=5, **kwargs):
         """ Create a theoretical 2D space grid in Box, specifically around
         BC
 
         :param resolution_km: Grid cell length and width in km, default 5 km
         :type resolution_km: int, optional
+        :param kwargs: Keyword args of Box other than its corners and
+                       resolution, e.g. cache_precision
         """
         super().__init__(
-            57.870760, -133.540154, 46.173395, -129.055971, 1250, resolution_km
+            57.870760, -133.540154, 46.173395, -129.055971, 1250, resolution_km, **kwargs
         )
 
+    @classmethod
+    def from_spec(cls, spec, cache_precision=6, cache_max_bytes=64 * 1024 ** 2,
+                  adaptive_consensus=False):
+        """ Rehydrate a BCBox from its BoxSpec without solving for corners,
+        see Box.from_spec
+
+        :returns: BCBox described by spec
+        :rtype: BCBox
+        """
+        return cls(spec.res, cache_precision=cache_precision, cache_max_bytes=cache_max_bytes,
+                   corners=spec.get_corners(), adaptive_consensus=adaptive_consensus)
+
 
 class GenericCleaner(ABC):
-    def __init__(self):
-        pass
+    def __init__(self, dtype=None):
+        """ Create cleaner
+
+        :param dtype: Floating point dtype to parse data and store grids as,
+                      one of storage_dtype.STORAGE_DTYPES, default None uses float32
+        :type dtype: str, optional
+        """
+        self.dtype = dtype
 
     def create_featuretimespacegrid(
         self,
@@ -70,6 +93,48 @@ class GenericCleaner(ABC):
         )
         return grid
 
+    def create_featuretimespacegrids(
+        self,
+        file_dir,
+        box_set,
+        data_datetime_start,
+        data_datetime_finish,
+        grid_datetime_start,
+        grid_datetime_stop,
+        grid_time_res_h,
+    ):
+        """ Generates a FeatureTimeSpaceGrid for every domain of box_set from all
+        data between data_datetime_start and data_datetime_finish, parsing the
+        files only once
+
+        :param file_dir: Location of files to search through
+        :type file_dir: os.path or str
+        :param box_set: Named theoretical space grids to make a ftsg for each of
+        :type box_set: smoke.box.BoxSet
+        :param data_datetime_start: Start datetime for data range inclusive
+        :type data_datetime_start: datetime.datetime
+        :param data_datetime_finish: End datetime for data range inclusive
+        :type data_datetime_finish: datetime.datetime
+        :param grid_datetime_start: Time for FeatureTimeSpaceGrids to start
+        :type grid_datetime_start: datetime.datetime
+        :param grid_datetime_stop: Time for FeatureTimeSpaceGrids to end
+        :type grid_datetime_stop: datetime.datetime
+        :param grid_time_res_h: Resolution to use in between start and stop for time in hours
+        :type grid_time_res_h: int
+        :return: FeatureTimeSpaceGrid representing dataset with given timeframe
+                 for each domain name of box_set
+        :rtype: dict<str, FeatureTimeSpaceGrid>
+        """
+        file_paths = self.get_files(file_dir, data_datetime_start, data_datetime_finish)
+        grids = self.convert_files_tofeaturetimespacegrids(
+            file_paths,
+            box_set,
+            grid_datetime_start,
+            grid_datetime_stop,
+            grid_time_res_h,
+        )
+        return grids
+
     def get_files(self, file_dir, data_datetime_start, data_datetime_finish):
         """ Retrieves a list of all files in file_dir in data date range
 
@@ -177,9 +242,44 @@ class GenericCleaner(ABC):
         """
         ...
 
+    @abstractmethod
+    def convert_files_tofeaturetimespacegrids(
+        self,
+        file_paths,
+        box_set,
+        grid_datetime_start,
+        grid_datetime_stop,
+        grid_time_res_h,
+    ):
+        """ Converts all files given, into a FeatureTimeSpaceGrid of given parameters
+        for every domain of box_set, containing dataset's data in the given time range.
+
+        :param file_paths: Files on to use for dataset
+        :type file_paths: list<str>
+        :param box_set: Named theoretical space grids to make a ftsg for each of
+        :type box_set: smoke.box.BoxSet
+        :param grid_datetime_start: Time for FeatureTimeSpaceGrids to start
+        :type grid_datetime_start: datetime.datetime
+        :param grid_datetime_stop: Time for FeatureTimeSpaceGrids to end
+        :type grid_datetime_stop: datetime.datetime
+        :param grid_time_res_h: Resolution to use in between start and stop for grid's time in hours
+        :type grid_time_res_h: int
+        :return: FeatureTimeSpaceGrid for each domain name of box_set
+        :rtype: dict<str, FeatureTimeSpaceGrid>
+        """
+        ...
+
 
 class GeneralConversionCleaner(GenericCleaner):
 
+    # Method of Box.assign_cells used to assign data to cells, 'consensus' or
+    # the faster nearest cell center 'kdtree' for large swaths of points
+    assignment_method = 'consensus'
+
+    # Whether to store grids sparsely, only keeping cells that are not np.nan,
+    # for datasets that are empty at most cells such as fire detections
+    sparse_grids = False
+
     @property
     @abstractmethod
     def expected_features_array(self):
@@ -245,21 +345,26 @@ class GeneralConversionCleaner(GenericCleaner):
             if requires_mesh and lon.ndim == 1 and lat.ndim == 1:  # Mesh lon, lat if is necessary
                 lon, lat = np.meshgrid(lon, lat)
 
-            # Filter out nan's data, lat, and lon to speed up time
-            non_nan_indices = np.logical_not(np.isnan(data.flatten()))
-            non_nan_data = data.flatten()[non_nan_indices]
-            non_nan_lat = lat.flatten()[non_nan_indices]
-            non_nan_lon = lon.flatten()[non_nan_indices]
+            # Filter out nan's data, lat, and lon, and then any of those
+            # outside of the box to speed up time
+            flat_lat, flat_lon = lat.flatten(), lon.flatten()
+            keep_indices = np.logical_not(np.isnan(data.flatten()))
+            keep_indices[keep_indices] = ftsg.box.contains_many(flat_lat[keep_indices],
+                                                                flat_lon[keep_indices])
+            kept_data = data.flatten()[keep_indices]
+            kept_lat = flat_lat[keep_indices]
+            kept_lon = flat_lon[keep_indices]
 
             # Assign lat and lon coords for each time, take care of mesh
             # above so don't need FTSG to
-            non_nan_assigns = ftsg.assign_space_grid(non_nan_lat,
-                                                     non_nan_lon,
-                                                     mesh=False)
+            kept_assigns = ftsg.assign_space_grid(kept_lat,
+                                                  kept_lon,
+                                                  mesh=False,
+                                                  method=self.assignment_method)
 
             # Flatten data and assigns and append w time to list
-            flat_data = non_nan_data.flatten()
-            flat_assigns = non_nan_assigns.flatten().reshape(flat_data.size, 2)
+            flat_data = kept_data.flatten()
+            flat_assigns = kept_assigns.flatten().reshape(flat_data.size, 2)
             time_data_assigns.append(
                 (
                     _time,
@@ -270,6 +375,42 @@ class GeneralConversionCleaner(GenericCleaner):
 
         return time_data_assigns
 
+    def assign_space_each_time_many(self, time_lat_lon_data, box_set, requires_mesh):
+        """ Create grid assignments for each set of space coordinates for each
+        time, for every domain of box_set at once. Returns arrays of data and
+        grid assignments for that data, for each time, for each domain.
+
+        """
+        box_time_data_assigns = OrderedDict((name, []) for name in box_set)
+        # Assign each time's lat/lon to every grid
+        for _time, lat, lon, data in time_lat_lon_data:
+
+            if requires_mesh and lon.ndim == 1 and lat.ndim == 1:  # Mesh lon, lat if is necessary
+                lon, lat = np.meshgrid(lon, lat)
+
+            # Filter out nan's data, lat, and lon, box_set rejects those
+            # outside of every box itself
+            flat_data, flat_lat, flat_lon = data.flatten(), lat.flatten(), lon.flatten()
+            keep_indices = np.logical_not(np.isnan(flat_data))
+            kept_data = flat_data[keep_indices]
+            box_assigns = box_set.assign_cells(flat_lat[keep_indices],
+                                               flat_lon[keep_indices],
+                                               self.assignment_method)
+
+            # Keep data and assigns within each box and append w time to its list
+            for name, (row, col) in box_assigns.items():
+                in_box = row != -1
+                assigns = np.stack((row[in_box], col[in_box]), axis=-1).astype(int)
+                box_time_data_assigns[name].append(
+                    (
+                        _time,
+                        kept_data[in_box],
+                        ma.masked_where(assigns == -1, assigns)
+                    )
+                )
+
+        return box_time_data_assigns
+
     def group_to_unique_times(self, time_data_assigns):
         """ For the list of (time, data_arr, grid_assigns) group all data_arr and
         grid_assigns together of the same time
@@ -339,14 +480,14 @@ class GeneralConversionCleaner(GenericCleaner):
         """
         # Populate TemporaryTimeSpaceGrid with crunched data and assigns for each time
         orig_times = np.array([tup[0] for tup in time_cruncheddata_crunchedassigns])
-        orig_ttsg = TemporaryTimeSpaceGrid(box, orig_times)
+        orig_ttsg = TemporaryTimeSpaceGrid(box, orig_times, dtype=self.dtype)
         for time_, cruncheddata, crunchedassigns in time_cruncheddata_crunchedassigns:
             orig_ttsg.populate_space_grid(time_, crunchedassigns, cruncheddata)
 
         # Create a crunched TemporaryTimeSpaceGrid representative of what we want
         # to crunch time_cruncheddata_crunchedassigns to, which will be
         # TTSG of FTSG, with ftsg_times and box
-        result_ttsg = TemporaryTimeSpaceGrid(box, ftsg_times)
+        result_ttsg = TemporaryTimeSpaceGrid(box, ftsg_times, dtype=self.dtype)
 
         # Using TimeCruncher crunch the original TTSG to the result TTSG
         # and return
@@ -354,6 +495,71 @@ class GeneralConversionCleaner(GenericCleaner):
 
         return cruncher.crunch_to_result_TTSG(time_bin_size_h, orig_ttsg, result_ttsg)
 
+    def parse_files(self, file_paths):
+        """ Grab GeographicalDatasets of each file using self defined parser
+
+        :param file_paths: Files containing data to parse
+        :type file_paths: list<str>
+        :return: Parsed dataset of each file
+        :rtype: list<GeographicalDataset>
+        """
+        return list(map(lambda f: self.parser.parse_file(f, dtype=self.dtype), file_paths))
+
+    def get_time_lat_lon_data(self, datasets, feature):
+        """ From each dataset's data array of feature take out a tuple of it's
+        arrays of time, lat, lon, and data measurements for every time
+
+        :param datasets: Parsed datasets
+        :type datasets: list<GeographicalDataset>
+        :param feature: Feature to get data of
+        :type feature: str
+        :return: List of (time, lat, lon, data)
+        :rtype: list<tuple>
+        """
+        # Extract each data array of feature in each dataset
+        relevant_feature_data_arrays = [d.get_feature_data_array(feature) for d in datasets]
+
+        time_lat_lon_data = []
+        for da in relevant_feature_data_arrays:
+            for single_time in da:
+                time_lat_lon_data.append(
+                    (
+                        single_time['time'].values,
+                        single_time['lat'].values,
+                        single_time['lon'].values,
+                        single_time.values
+                    )
+                )
+        return time_lat_lon_data
+
+    def populate_feature(self, ftsg, feature, time_data_assigns, grid_time_res_h):
+        """ Crunch data and grid assignments of every time to the grid of ftsg
+        and populate feature with it
+
+        :param ftsg: Grid to populate feature of
+        :type ftsg: FeatureTimeSpaceGrid
+        :param feature: Feature to populate
+        :type feature: str
+        :param time_data_assigns: List of (time, data, grid assignments)
+        :type time_data_assigns: list<tuple>
+        :param grid_time_res_h: Resolution of grid's time in hours
+        :type grid_time_res_h: int
+        """
+        # Group the data and grid assignments of each unique time together
+        time_groupeddata_groupedassigns = self.group_to_unique_times(time_data_assigns)
+
+        # Crunch the overlapping grid assignments for each time and filter out bad assigns
+        time_cruncheddata_crunchedassigns = self.crunch_overlap_each_time(time_groupeddata_groupedassigns)
+
+        # Crunch to the times of the grid, by taking an average across all space grids grouped before
+        # each time on the grid's time axis
+        ftsg_time_space_grid = self.crunch_to_ftsg_times(
+            ftsg.box, ftsg.get_times(), grid_time_res_h, time_cruncheddata_crunchedassigns
+        )
+
+        # Populate feature with resulting time space grid
+        ftsg.set_feature_grid(feature, ftsg_time_space_grid.get_grid())
+
     def convert_files_tofeaturetimespacegrid(
             self,
             file_paths,
@@ -379,7 +585,7 @@ class GeneralConversionCleaner(GenericCleaner):
         """
 
         # Grab GeographicalDatasets of each file using self defined parser
-        datasets = list(map(lambda f: self.parser.parse_file(f), file_paths))
+        datasets = self.parse_files(file_paths)
 
         # Create FTSG to place data values in (all files have same features so just use first's)
         ftsg = FeatureTimeSpaceGrid(
@@ -387,52 +593,99 @@ class GeneralConversionCleaner(GenericCleaner):
             self.expected_features_array,
             grid_datetime_start,
             grid_datetime_stop,
-            grid_time_res_h
+            grid_time_res_h,
+            dtype=self.dtype,
+            sparse=self.sparse_grids
         )
 
         # Iterate over every feature getting and populating a time, row, col grid for each
         for feature in self.expected_features_array:
 
-            # Extract each data array of feature in each dataset
-            relevant_feature_data_arrays = [d.get_feature_data_array(feature) for d in datasets]
-
             # From each data array take out a tuple of it's arrays of time, lat, lon, and data measurements
-            time_lat_lon_data = []
-            for da in relevant_feature_data_arrays:
-                for single_time in da:
-                    time_lat_lon_data.append(
-                        (
-                            single_time['time'].values,
-                            single_time['lat'].values,
-                            single_time['lon'].values,
-                            single_time.values
-                        )
-                    )
+            time_lat_lon_data = self.get_time_lat_lon_data(datasets, feature)
 
             # For each time assign each lat and lon pair of each data point to a point on the grid
             # getting a time, array of data, and array of corresponding grid assignments to data
             time_data_assigns = self.assign_space_each_time(time_lat_lon_data, ftsg, self.requires_mesh)
 
-            # Group the data and grid assignments of each unique time together
-            time_groupeddata_groupedassigns = self.group_to_unique_times(time_data_assigns)
+            # Crunch and populate feature with resulting time space grid
+            self.populate_feature(ftsg, feature, time_data_assigns, grid_time_res_h)
 
-            # Crunch the overlapping grid assignments for each time and filter out bad assigns
-            time_cruncheddata_crunchedassigns = self.crunch_overlap_each_time(time_groupeddata_groupedassigns)
+        return ftsg
+
+    def convert_files_tofeaturetimespacegrids(
+            self,
+            file_paths,
+            box_set,
+            grid_datetime_start,
+            grid_datetime_stop,
+            grid_time_res_h):
+        """ Converts all files given, into a FeatureTimeSpaceGrid of given parameters
+        for every domain of box_set, containing dataset's data in the given time range.
+        Files are parsed and coordinates assigned to all domains only once.
 
-            # Crunch to the times of the grid, by taking an average across all space grids grouped before
-            # each time on the grid's time axis
-            ftsg_time_space_grid = self.crunch_to_ftsg_times(
-                box, ftsg.get_times(), grid_time_res_h, time_cruncheddata_crunchedassigns
+        :param file_paths: Files containing data to use for populating grids
+        :type file_paths: list<str>
+        :param box_set: Named theoretical space grids to make a ftsg for each of
+        :type box_set: smoke.box.BoxSet
+        :param grid_datetime_start: Time for FeatureTimeSpaceGrids to start
+        :type grid_datetime_start: datetime.datetime
+        :param grid_datetime_stop: Time for FeatureTimeSpaceGrids to end
+        :type grid_datetime_stop: datetime.datetime
+        :param grid_time_res_h: Resolution to use in between start and stop for grid's time in hours
+        :type grid_time_res_h: int
+        :return: FeatureTimeSpaceGrid for each domain name of box_set
+        :rtype: dict<str, FeatureTimeSpaceGrid>
+        """
+        datasets = self.parse_files(file_paths)
+
+        ftsgs = OrderedDict(
+            (
+                name,
+                FeatureTimeSpaceGrid(
+                    box,
+                    self.expected_features_array,
+                    grid_datetime_start,
+                    grid_datetime_stop,
+                    grid_time_res_h,
+                    dtype=self.dtype,
+                    sparse=self.sparse_grids
+                )
             )
+            for name, box in box_set.items()
+        )
 
-            # Populate feature with resulting time space grid
-            ftsg.set_feature_grid(feature, ftsg_time_space_grid.get_grid())
+        for feature in self.expected_features_array:
+            time_lat_lon_data = self.get_time_lat_lon_data(datasets, feature)
+
+            # Assign to every domain together then crunch each domain's own
+            box_time_data_assigns = self.assign_space_each_time_many(
+                time_lat_lon_data, box_set, self.requires_mesh
+            )
+            for name, ftsg in ftsgs.items():
+                self.populate_feature(ftsg, feature, box_time_data_assigns[name], grid_time_res_h)
 
-            return ftsg
+        return ftsgs
 
 
 class ConsistentGridConversionCleaner(GeneralConversionCleaner):
 
+    def __init__(self, assignment_table_dir=None, dtype=None):
+        """ Create cleaner for datasets always given on the same grid
+
+        :param assignment_table_dir: Directory of persistent assignment lookup
+                                     tables, so the grid is only assigned once
+                                     across runs, default None assigns every time
+        :type assignment_table_dir: str, optional
+        :param dtype: Floating point dtype to parse data and store grids as,
+                      default None uses float32
+        :type dtype: str, optional
+        """
+        super().__init__(dtype)
+        self.assignment_table = None
+        if assignment_table_dir is not None:
+            self.assignment_table = AssignmentLookupTable(assignment_table_dir)
+
     def assign_space_each_time(self, time_lat_lon_data, ftsg, requires_mesh):
         """ Create grid assignments for each set of space
         coordinates for each time. Returns arrays of data
@@ -447,7 +700,9 @@ class ConsistentGridConversionCleaner(GeneralConversionCleaner):
             # Assign lat and lon coords for just first time since all grids are
             # assumed to be the same (saves time by only doing once)
             _time, lat, lon, data = time_lat_lon_data[0]
-            assigns = ftsg.assign_space_grid(lat, lon, requires_mesh)
+            assigns = ftsg.assign_space_grid(lat, lon, requires_mesh,
+                                             lookup_table=self.assignment_table,
+                                             method=self.assignment_method)
             flat_assigns = assigns.flatten().reshape(data.size, 2)
 
         time_data_assigns = []
@@ -464,6 +719,49 @@ class ConsistentGridConversionCleaner(GeneralConversionCleaner):
 
         return time_data_assigns
 
+    def assign_space_each_time_many(self, time_lat_lon_data, box_set, requires_mesh):
+        """ Create grid assignments for each set of space coordinates for each
+        time, for every domain of box_set. Returns arrays of data and grid
+        assignments for that data, for each time, for each domain.
+
+        Note: Assumes that grid is same shape and is used for speeding
+        up
+
+        """
+        box_time_data_assigns = OrderedDict((name, []) for name in box_set)
+        if len(time_lat_lon_data) == 0:
+            return box_time_data_assigns
+
+        # Assign lat and lon coords for just first time since all grids are
+        # assumed to be the same, from lookup tables if there are any
+        # otherwise to all domains together
+        _time, lat, lon, data = time_lat_lon_data[0]
+        if requires_mesh and lon.ndim == 1 and lat.ndim == 1:
+            lon, lat = np.meshgrid(lon, lat)
+        if self.assignment_table is not None:
+            box_assigns = OrderedDict(
+                (name, self.assignment_table.get_assignments(box, lat, lon, self.assignment_method))
+                for name, box in box_set.items()
+            )
+        else:
+            box_assigns = box_set.assign_cells(lat, lon, self.assignment_method)
+
+        for name, (row, col) in box_assigns.items():
+            assigns = np.dstack((row, col)).astype(int)
+            flat_assigns = ma.masked_where(assigns == -1, assigns).reshape(data.size, 2)
+
+            # Store time, flat data, and corresponding flat common assignments in list
+            for _time, dump1, dump2, time_data in time_lat_lon_data:
+                box_time_data_assigns[name].append(
+                    (
+                        _time,
+                        time_data.flatten(),
+                        flat_assigns
+                    )
+                )
+
+        return box_time_data_assigns
+
     def are_same_assigns(self, list_of_assignment_arrays):
         """
         Returns true if all assignment arrays are equivalent entailing an exact same grid
@@ -557,6 +855,7 @@ class MODISAODCleaner(GeneralConversionCleaner):
     )
     parser = MODISAODParser()
     requires_mesh = False
+    assignment_method = 'kdtree'
 
 
 class MODISFRPCleaner(GeneralConversionCleaner):
@@ -566,3 +865,5 @@ class MODISFRPCleaner(GeneralConversionCleaner):
     expected_features_array = np.array(['FRP'])
     parser = MODISFRPParser()
     requires_mesh = True
+    assignment_method = 'kdtree'
+    sparse_grids = True
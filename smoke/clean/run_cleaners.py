@@ -10,6 +10,36 @@ from datetime import datetime, timedelta
 from multiprocessing import Pool
 
 from smoke.clean.cleaners import *
+from smoke.box.storage_dtype import resolve_storage_dtype
+from smoke.box.FTSGArchive import consolidate_FTSGs
+from smoke.box.FTSGCatalog import FTSGCatalog
+
+def save_day_FTSG(day_FTSG, output_directory, file_prefix, chunked, catalog_path=None):
+    """ Save FTSG in the chunked .ftsg format if chunked else as a tar.gz,
+    recording it in the FTSG catalog at catalog_path if given
+    """
+    if chunked:
+        save_path = day_FTSG.save_chunked(output_directory, file_prefix)
+    else:
+        save_path = day_FTSG.save(output_directory, file_prefix)
+    if catalog_path is not None:
+        FTSGCatalog(catalog_path).record(day_FTSG, save_path, file_prefix)
+
+
+def consolidate_day_FTSGs(box, output_directory, file_prefix, archive_directory):
+    """ Append the daily FTSGs of file_prefix saved in output_directory to
+    the consolidated archive of file_prefix in archive_directory, one for
+    each domain if box is a BoxSet, doing nothing if archive_directory is None
+    """
+    if archive_directory is None:
+        return
+    logger = logging.getLogger(__name__)
+    domain_names = box.get_names() if isinstance(box, BoxSet) else ['']
+    for name in domain_names:
+        archive_path = os.path.join(archive_directory, name, f"{file_prefix}archive")
+        archive = consolidate_FTSGs(os.path.join(output_directory, name), file_prefix, archive_path)
+        logger.info(f"Consolidated {archive.get_num_times()} times of {file_prefix} FTSGs into {archive_path}")
+
 
 def use_cleaner_to_save_day_FTSG(day_to_find_data_for,
                                  buffer_time_h,
@@ -19,7 +49,10 @@ def use_cleaner_to_save_day_FTSG(day_to_find_data_for,
                                  cleaner,
                                  file_directory,
                                  output_directory,
-                                 file_prefix=''):
+                                 file_prefix='',
+                                 telemetry_directory=None,
+                                 chunked=False,
+                                 catalog_path=None):
     """ Saves data on the day_to_find_data_for by using cleaner to create a FTSG for that day,
     using files in file_directory between some buffer_time_h before day_to_find_data_for at 00:00:00,
     and up to time_limit_h hours before that time. Saves resulting FTSG in output_directory
@@ -33,8 +66,9 @@ def use_cleaner_to_save_day_FTSG(day_to_find_data_for,
     :type time_limit_h: int
     :param grid_time_res_h: Time resolution for grid in hours
     :type grid_time_res_h: int
-    :param box: Theoretical space grid to use as for space assignment
-    :type box: smoke_tools.box.Box
+    :param box: Theoretical space grid to use as for space assignment, or named set of them to save a
+                FTSG for each into a subdirectory of output_directory named after its domain
+    :type box: smoke_tools.box.Box or smoke.box.BoxSet
     :param cleaner: Cleaner to use to create FTSG
     :type cleaner: smoke.clean.cleaners.GenericCleaner
     :param file_directory: Path to directory containing raw data files
@@ -43,18 +77,55 @@ def use_cleaner_to_save_day_FTSG(day_to_find_data_for,
     :type output_directory: str
     :param file_prefix: Prefix to add to output FTSG file to differentiate ones of that type, default ''
     :param file_prefix: str, optional
+    :param telemetry_directory: Path to directory to dump box's assignment telemetry of run to as json,
+                                default None does not dump it
+    :type telemetry_directory: str, optional
+    :param chunked: Whether to save FTSG in the chunked .ftsg format instead of as a tar.gz,
+                    default False
+    :type chunked: bool, optional
+    :param catalog_path: Path to SQLite FTSG catalog to record saved FTSG in, default None does
+                         not record it
+    :type catalog_path: str, optional
     """
     logger = logging.getLogger(__name__)
     data_timerange_end = day_to_find_data_for-timedelta(hours=buffer_time_h)
     logger.info(f"Running cleaner to create FTSG with axis range {day_to_find_data_for} to {day_to_find_data_for+timedelta(days=1)} based on files released from {data_timerange_end-timedelta(hours=time_limit_h)} to {data_timerange_end}")
-    day_FTSG = cleaner.create_featuretimespacegrid(file_directory,
-                                                   box,
-                                                   data_timerange_end-timedelta(hours=time_limit_h),
-                                                   data_timerange_end,
-                                                   day_to_find_data_for,
-                                                   day_to_find_data_for+timedelta(days=1),
-                                                   grid_time_res_h)
-    day_FTSG.save(output_directory, file_prefix)
+    if isinstance(box, BoxSet):
+        # Parse files once and save a FTSG for every domain
+        day_FTSGs = cleaner.create_featuretimespacegrids(file_directory,
+                                                         box,
+                                                         data_timerange_end-timedelta(hours=time_limit_h),
+                                                         data_timerange_end,
+                                                         day_to_find_data_for,
+                                                         day_to_find_data_for+timedelta(days=1),
+                                                         grid_time_res_h)
+        # Telemetry of work common to the domains goes in telemetry_directory
+        # itself, that of each domain in a subdirectory named after it
+        boxes = [('', box)] + box.items()
+        for name, day_FTSG in day_FTSGs.items():
+            domain_output_directory = os.path.join(output_directory, name)
+            os.makedirs(domain_output_directory, exist_ok=True)
+            save_day_FTSG(day_FTSG, domain_output_directory, file_prefix, chunked, catalog_path)
+    else:
+        day_FTSG = cleaner.create_featuretimespacegrid(file_directory,
+                                                       box,
+                                                       data_timerange_end-timedelta(hours=time_limit_h),
+                                                       data_timerange_end,
+                                                       day_to_find_data_for,
+                                                       day_to_find_data_for+timedelta(days=1),
+                                                       grid_time_res_h)
+        boxes = [('', box)]
+        save_day_FTSG(day_FTSG, output_directory, file_prefix, chunked, catalog_path)
+
+    if telemetry_directory is not None:
+        for name, domain_box in boxes:
+            telemetry_path = os.path.join(
+                telemetry_directory,
+                name,
+                f"{file_prefix}{day_to_find_data_for.strftime('%Y%m%d')}_assignment_telemetry.json"
+            )
+            domain_box.dump_telemetry(telemetry_path)
+            logger.info(f"Dumped assignment telemetry to {telemetry_path}")
 
 
 @click.command(
@@ -88,9 +159,27 @@ def main(path_to_config, logging_level):
         loaded_yaml = yaml.safe_load(f)
     logger.info(f"Loaded yaml config at {path_to_config}")
 
-    # Create BCBox to assign all space to
-    bc_box = BCBox(loaded_yaml.get('grid_res_km'))
-    logger.info(f"Generated space grid with {loaded_yaml.get('grid_res_km')} km resolution")
+    # Create BCBox to assign all space to, or one for every domain if several are given
+    domains_config = loaded_yaml.get('domains')
+    if domains_config:
+        bc_box = BoxSet({name: BCBox(res_km) for name, res_km in domains_config.items()})
+        logger.info(f"Generated space grids for domains {bc_box.get_names()}")
+    else:
+        bc_box = BCBox(loaded_yaml.get('grid_res_km'))
+        logger.info(f"Generated space grid with {loaded_yaml.get('grid_res_km')} km resolution")
+
+    # Floating point dtype to parse data and store grids as, float32 if not given
+    grid_dtype = loaded_yaml.get('grid_dtype')
+    logger.info(f"Storing grids as {resolve_storage_dtype(grid_dtype).name}")
+
+    # Save format of grids, chunked .ftsg directories or legacy tar.gz
+    chunked = loaded_yaml.get('save_format', 'tar.gz') == 'chunked'
+
+    # Directory of consolidated multi-day archives to append daily FTSGs to
+    archive_directory = loaded_yaml.get('archive_directory')
+
+    # SQLite catalog to record every saved FTSG's coverage and validity in
+    catalog_path = loaded_yaml.get('catalog_path')
 
     # Create datetime objects for all days in time range
     time_config = loaded_yaml.get('timerange')
@@ -132,18 +221,19 @@ def main(path_to_config, logging_level):
                         fw_sub_config.get('data_window_size_h'),
                         fw_config.get('grid_time_res_h'),
                         bc_box,
-                        FireworkCleaner(),
+                        FireworkCleaner(fw_config.get('assignment_table_directory'), grid_dtype),
                         fw_config.get('file_directory'),
                         fw_config.get('output_directory'),
-                        fw_sub_config.get('file_prefix')
+                        fw_sub_config.get('file_prefix'),
+                        loaded_yaml.get('telemetry_directory'),
+                        chunked,
+                        catalog_path
                     ))
                 pool.starmap(use_cleaner_to_save_day_FTSG, args)
+                consolidate_day_FTSGs(bc_box, fw_config.get('output_directory'),
+                                      fw_sub_config.get('file_prefix'), archive_directory)
         logger.info("Finished firework cleaner run over date range")
 
-    # Refresh bc_box for RAM sake
-    del bc_box
-    bc_box = BCBox(loaded_yaml.get('grid_res_km'))
-
     # Bluesky Canada
     bs_config = loaded_yaml.get('bluesky')
     if bs_config.get('run'):
@@ -160,18 +250,19 @@ def main(path_to_config, logging_level):
                         bs_sub_config.get('data_window_size_h'),
                         bs_config.get('grid_time_res_h'),
                         bc_box,
-                        BlueSkyCleaner(),
+                        BlueSkyCleaner(bs_config.get('assignment_table_directory'), grid_dtype),
                         bs_config.get('file_directory'),
                         bs_config.get('output_directory'),
-                        bs_sub_config.get('file_prefix')
+                        bs_sub_config.get('file_prefix'),
+                        loaded_yaml.get('telemetry_directory'),
+                        chunked,
+                        catalog_path
                     ))
                 pool.starmap(use_cleaner_to_save_day_FTSG, args)
+                consolidate_day_FTSGs(bc_box, bs_config.get('output_directory'),
+                                      bs_sub_config.get('file_prefix'), archive_directory)
         logger.info("Finished bluesky cleaner run over date range")
 
-    # Refresh bc_box for RAM sake
-    del bc_box
-    bc_box = BCBox(loaded_yaml.get('grid_res_km'))
-
     # MODIS AOD
     ma_config = loaded_yaml.get('modisAOD')
     if ma_config.get('run'):
@@ -186,18 +277,18 @@ def main(path_to_config, logging_level):
                 24+ma_config.get('grid_time_res_h'),
                 ma_config.get('grid_time_res_h'),
                 bc_box,
-                MODISAODCleaner(),
+                MODISAODCleaner(grid_dtype),
                 ma_config.get('file_directory'),
                 ma_config.get('output_directory'),
-                'modisaod_'
+                'modisaod_',
+                loaded_yaml.get('telemetry_directory'),
+                chunked,
+                catalog_path
             ))
         pool.starmap(use_cleaner_to_save_day_FTSG, args)
+        consolidate_day_FTSGs(bc_box, ma_config.get('output_directory'), 'modisaod_', archive_directory)
         logger.info("Finished modis AOD cleaner run over date range")
 
-    # Refresh bc_box for RAM sake
-    del bc_box
-    bc_box = BCBox(loaded_yaml.get('grid_res_km'))
-
     # MODIS FRP
     mf_config = loaded_yaml.get('modisFRP')
     if mf_config.get('run'):
@@ -212,12 +303,16 @@ def main(path_to_config, logging_level):
                 24+mf_config.get('grid_time_res_h'),
                 mf_config.get('grid_time_res_h'),
                 bc_box,
-                MODISFRPCleaner(),
+                MODISFRPCleaner(grid_dtype),
                 mf_config.get('file_directory'),
                 mf_config.get('output_directory'),
-                'modisfrp_'
+                'modisfrp_',
+                loaded_yaml.get('telemetry_directory'),
+                chunked,
+                catalog_path
             ))
         pool.starmap(use_cleaner_to_save_day_FTSG, args)
+        consolidate_day_FTSGs(bc_box, mf_config.get('output_directory'), 'modisfrp_', archive_directory)
         logger.info("Finished modis FRP cleaner run over date range")
 
 
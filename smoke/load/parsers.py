@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 from abc import ABC, abstractmethod
 
 from smoke.load.datasets import GeographicalDataset
+from smoke.box.storage_dtype import resolve_storage_dtype
 
 
 class GenericParser(ABC):
@@ -13,15 +14,36 @@ class GenericParser(ABC):
     def __init__(self):
         pass
 
-    def parse_file(self, file_path):
+    def parse_file(self, file_path, dtype=None):
         """ Parses a raw data file, returning a geographical
         dataset of data
 
         :param file_path: path to raw data file
         :type file_path: str
+        :param dtype: Floating point dtype to cast floating point data
+                      variables to, default None uses float32
+        :type dtype: str, optional
         """
         data_set = self.convert_raw_to_dataset(file_path)
-        return GeographicalDataset(data_set)
+        return GeographicalDataset(self.cast_floating_data(data_set, dtype))
+
+    def cast_floating_data(self, data_set, dtype=None):
+        """ Cast floating point data variables of dataset to storage dtype,
+        leaving coordinates and non floating point variables as they are
+
+        :param data_set: Dataset to cast
+        :type data_set: xr.Dataset
+        :param dtype: Floating point dtype to cast to, default None uses float32
+        :type dtype: str, optional
+        :returns: Dataset with cast data variables
+        :rtype: xr.Dataset
+        """
+        dtype = resolve_storage_dtype(dtype)
+        return data_set.assign({
+            name: data_array.astype(dtype)
+            for name, data_array in data_set.data_vars.items()
+            if np.issubdtype(data_array.dtype, np.floating) and data_array.dtype != dtype
+        })
 
     @abstractmethod
     def convert_raw_to_dataset(self, file_path):
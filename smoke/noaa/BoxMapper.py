@@ -15,8 +15,9 @@ class BoxMapper:
     hourly_boxes = [[]] * 24
     #cell_index = Box.get_cell_assignment_if_in_grid(box,query_lat,query_lon)
     
-    def __init__(self, hours_of_day_to_exclude):
-        self.box = Box(self.nw_lat, self.nw_lon, self.sw_lat_est, self.sw_lon_est, self.dist, self.res)
+    def __init__(self, hours_of_day_to_exclude, adaptive_consensus=False):
+        self.box = Box(self.nw_lat, self.nw_lon, self.sw_lat_est, self.sw_lon_est, self.dist, self.res,
+                       adaptive_consensus=adaptive_consensus)
         self.hours_of_day_to_exclude = hours_of_day_to_exclude
         for hour in range(0,24):
             if hour in self.hours_of_day_to_exclude:
@@ -0,0 +1,78 @@
+import os
+import unittest
+import tempfile
+import numpy as np
+from datetime import datetime
+from smoke.amalgamate.Amalgamator import Amalgamator, IncompletePredictionSet
+
+
+class StubCatalogEntry:
+
+    def __init__(self, all_nan, valid_times):
+        self.all_nan = all_nan
+        self.valid_times = valid_times
+
+    def is_all_nan(self):
+        return self.all_nan
+
+    def has_valid_data(self, time=None, feature=None):
+        return time in self.valid_times
+
+
+class StubCatalog:
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.requested = []
+
+    def get_entry(self, file_path):
+        self.requested.append(os.path.basename(file_path))
+        return self.entries.get(os.path.basename(file_path))
+
+
+class testAmalgamatorCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        # Label of UTC 2020-07-01 12:00 is named after its PST time
+        open(os.path.join(self.temp_dir.name, '2020_7_1_5_pm25_labels.npy'), 'w').close()
+        self.label_time = datetime(2020, 7, 1, 12)
+        self.file_name = 'firework_closest_strt20200701T000000_stop20200702T000000_res1.tar.gz'
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _make_amalgamator(self, entry):
+        catalog = StubCatalog({self.file_name: entry})
+        amalgamator = Amalgamator(pm25_labels_folder=self.temp_dir.name,
+                                  firework_ftsg_folder=self.temp_dir.name,
+                                  catalog=catalog)
+        return amalgamator, catalog
+
+    def testCatalogAllNanRaisesIncompletePredictionSet(self):
+        amalgamator, catalog = self._make_amalgamator(StubCatalogEntry(True, []))
+        with self.assertRaises(IncompletePredictionSet) as context:
+            amalgamator.make_pytorch_tensor(self.label_time, ['firework_closest'],
+                                            save_directory=self.temp_dir.name)
+        self.assertIn('firework_closest', str(context.exception))
+        self.assertEqual(catalog.requested, [self.file_name])
+
+    def testCatalogNoDataAtTimeRaisesIncompletePredictionSet(self):
+        amalgamator, _ = self._make_amalgamator(StubCatalogEntry(False, [datetime(2020, 7, 1, 13)]))
+        with self.assertRaises(IncompletePredictionSet):
+            amalgamator.make_pytorch_tensor(self.label_time, ['firework_closest'],
+                                            save_directory=self.temp_dir.name)
+
+    def testCatalogValidFallsBackToLoading(self):
+        # Catalog finds no fault so the grid is loaded, which is missing,
+        # without asking the catalog about it again
+        amalgamator, catalog = self._make_amalgamator(StubCatalogEntry(False, [self.label_time]))
+        with self.assertRaises(IncompletePredictionSet) as context:
+            amalgamator.make_pytorch_tensor(self.label_time, ['firework_closest'],
+                                            save_directory=self.temp_dir.name)
+        self.assertIn('does not exist', str(context.exception))
+        self.assertEqual(catalog.requested, [self.file_name])
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
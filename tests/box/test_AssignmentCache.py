@@ -0,0 +1,42 @@
+import unittest
+from smoke.box.AssignmentCache import AssignmentCache
+
+
+class testAssignmentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = AssignmentCache(precision=4, max_bytes=3*AssignmentCache.BYTES_PER_ENTRY)
+
+    def testQuantizedHitsAndMisses(self):
+        self.assertIsNone(self.cache.get(50.0, -120.0))
+        self.cache.put(50.0, -120.0, (1, 2))
+        self.assertEqual(self.cache.get(50.0, -120.0), (1, 2))
+        self.assertEqual(self.cache.get(50.0 + 1e-9, -120.0 - 1e-9), (1, 2))
+        self.assertIsNone(self.cache.get(50.001, -120.0))
+        self.assertTrue((50.00000001, -120.0) in self.cache)
+        stats = self.cache.get_stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["entries"], 1)
+
+    def testLRUEviction(self):
+        self.assertEqual(self.cache.max_entries, 3)
+        self.cache.put(1, 1, (1, 1))
+        self.cache.put(2, 2, (2, 2))
+        self.cache.put(3, 3, (3, 3))
+        self.cache.get(1, 1)
+        self.cache.put(4, 4, (4, 4))
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache.get_stats()["evictions"], 1)
+        self.assertFalse((2, 2) in self.cache)
+        self.assertTrue((1, 1) in self.cache)
+        self.assertTrue((4, 4) in self.cache)
+
+    def testNonFiniteNotCached(self):
+        self.cache.put(float('nan'), 1, (1, 1))
+        self.assertEqual(len(self.cache), 0)
+        self.assertIsNone(self.cache.get(float('nan'), 1))
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
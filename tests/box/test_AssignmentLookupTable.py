@@ -0,0 +1,57 @@
+import os
+import tempfile
+
+import unittest
+import numpy as np
+
+from smoke.box.Box import Box
+from smoke.box.AssignmentLookupTable import AssignmentLookupTable
+
+
+class testAssignmentLookupTable(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.box = Box(
+            57.870760, -133.540154, 46.173395, -129.055971, 1250, 5
+        )
+        self.lon, self.lat = np.meshgrid(np.linspace(-140, -110, 20), np.linspace(62, 45, 15))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def testBuildThenLoad(self):
+        table = AssignmentLookupTable(self.temp_dir.name)
+        row, col = table.get_assignments(self.box, self.lat, self.lon)
+        check_row, check_col = self.box.assign_cells(self.lat, self.lon)
+        self.assertTrue((row == check_row).all())
+        self.assertTrue((col == check_col).all())
+        self.assertTrue(os.path.isfile(table.get_table_path(self.box, self.lat, self.lon)))
+        self.assertEqual(len([f for f in os.listdir(self.temp_dir.name) if f.endswith('.npy')]), 1)
+
+        # New table in same directory loads what was persisted read only
+        other_table = AssignmentLookupTable(self.temp_dir.name)
+        loaded_row, loaded_col = other_table.get_assignments(self.box, self.lat, self.lon)
+        self.assertTrue((loaded_row == check_row).all())
+        self.assertTrue((loaded_col == check_col).all())
+        self.assertFalse(loaded_row.flags.writeable)
+
+    def testFingerprintDependsOnGridAndBox(self):
+        table = AssignmentLookupTable(self.temp_dir.name)
+        coarse_box = Box(
+            57.870760, -133.540154, 46.173395, -129.055971, 1250, 10
+        )
+        fingerprint = table.fingerprint(self.box, self.lat, self.lon)
+        self.assertEqual(fingerprint, table.fingerprint(self.box, self.lat.copy(), self.lon.copy()))
+        self.assertNotEqual(fingerprint, table.fingerprint(coarse_box, self.lat, self.lon))
+        self.assertNotEqual(fingerprint, table.fingerprint(self.box, self.lat + 0.01, self.lon))
+
+    def testFingerprintDependsOnTableVersion(self):
+        table = AssignmentLookupTable(self.temp_dir.name)
+        fingerprint = table.fingerprint(self.box, self.lat, self.lon)
+        table.TABLE_VERSION = AssignmentLookupTable.TABLE_VERSION - 1
+        self.assertNotEqual(fingerprint, table.fingerprint(self.box, self.lat, self.lon))
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
@@ -0,0 +1,57 @@
+import os
+import json
+import unittest
+import tempfile
+import numpy as np
+from smoke.box.Box import Box
+from smoke.box.AssignmentTelemetry import AssignmentTelemetry, LatencyHistogram
+
+
+class testAssignmentTelemetry(unittest.TestCase):
+
+    def testLatencyHistogram(self):
+        hist = LatencyHistogram()
+        for elapsed_s in [2e-6, 5e-4, 5e-4, 20]:
+            hist.record(elapsed_s)
+        hist_dict = hist.to_dict()
+        self.assertEqual(hist_dict["count"], 4)
+        self.assertEqual(hist_dict["min_s"], 2e-6)
+        self.assertEqual(hist_dict["max_s"], 20)
+        self.assertEqual(hist_dict["buckets"]["<=1e-05"], 1)
+        self.assertEqual(hist_dict["buckets"]["<=0.001"], 2)
+        self.assertEqual(hist_dict["buckets"][">10"], 1)
+
+    def testRecordConsensus(self):
+        telemetry = AssignmentTelemetry()
+        telemetry.record_consensus(5, False)
+        telemetry.record_consensus(3, False, solver_calls_saved=2)
+        telemetry.record_consensus(2, True)
+        telemetry_dict = telemetry.to_dict()
+        self.assertEqual(telemetry_dict["consensus"]["assignments"], 3)
+        self.assertEqual(telemetry_dict["consensus"]["agreement_levels"], {"2": 1, "3": 1, "5": 1})
+        self.assertEqual(telemetry_dict["consensus"]["fallbacks"], 1)
+        self.assertEqual(telemetry_dict["solver"]["calls_saved"], 2)
+
+    def testBoxTelemetryDump(self):
+        box = Box(57.870760, -133.540154, 46.173395, -129.055971, 1250, 5)
+        box.assign_cells(np.array([53.9, 30]), np.array([-122.8, -160]))
+        box.get_cell_assignment_if_in_grid(53.9, -122.8)
+        box.get_cell_assignment_if_in_grid(53.9, -122.8)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            telemetry_path = os.path.join(temp_dir, 'telemetry', 'box.json')
+            box.dump_telemetry(telemetry_path)
+            with open(telemetry_path, 'r') as f_json:
+                telemetry_dict = json.load(f_json)
+
+        self.assertEqual(telemetry_dict["points_assigned"],
+                         {"assign_cells_consensus": 2, "get_cell_assignment": 1})
+        self.assertEqual(telemetry_dict["latency"]["get_cell_assignment"]["count"], 1)
+        self.assertEqual(telemetry_dict["solver"]["calls"], 5)
+        self.assertGreater(telemetry_dict["solver"]["iterations"], 0)
+        self.assertEqual(telemetry_dict["consensus"]["assignments"], 1)
+        self.assertEqual(telemetry_dict["cache"]["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
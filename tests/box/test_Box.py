@@ -0,0 +1,157 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from smoke.box.Box import Box
+
+
+class testBox(unittest.TestCase):
+
+    def setUp(self):
+        # Persist corners to a registry of this test alone
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.registry_env = mock.patch.dict(
+            os.environ, {'SMOKE_BOX_REGISTRY': os.path.join(self.temp_dir.name, 'box_corners.json')}
+        )
+        self.registry_env.start()
+        self.box = Box(
+            57.870760, -133.540154, 46.173395, -129.055971, 1250, 5
+        )
+        rng = np.random.RandomState(0)
+        self.lat = rng.uniform(45, 62, 200)
+        self.lon = rng.uniform(-140, -110, 200)
+
+    def tearDown(self):
+        self.registry_env.stop()
+        self.temp_dir.cleanup()
+
+    def testAssignCellsShapeAndSentinel(self):
+        lat2d, lon2d = np.meshgrid(np.array([30, 40, 55, 70, 80]), np.array([-160, -150, -120, -90, -80]))
+        row, col = self.box.assign_cells(lat2d.T, lon2d.T)
+        self.assertEqual(row.shape, (5, 5))
+        self.assertEqual(col.shape, (5, 5))
+        self.assertEqual(row.dtype, np.int32)
+        self.assertEqual(col.dtype, np.int32)
+        self.assertTrue((row[2][2] >= 0) and (col[2][2] >= 0))
+        self.assertEqual(np.sum(row == -1), 24)
+        self.assertEqual(np.sum(col == -1), 24)
+
+    def testAssignCellsMatchesConsensus(self):
+        row, col = self.box.assign_cells(self.lat, self.lon)
+        n_differ = 0
+        for lat, lon, r, c in zip(self.lat, self.lon, row, col):
+            if not self.box.is_within(lat, lon):
+                self.assertEqual((r, c), (-1, -1))
+                continue
+            check_r, check_c = self.box.get_cell_assignment(lat, lon)
+            self.assertLessEqual(abs(check_r - r), Box.ASSIGN_CELLS_TOLERANCE_CELLS)
+            self.assertLessEqual(abs(check_c - c), Box.ASSIGN_CELLS_TOLERANCE_CELLS)
+            n_differ += int((check_r, check_c) != (r, c))
+        self.assertLessEqual(n_differ, 0.05 * np.sum(row >= 0))
+
+    def testContainsManyMatchesIsWithin(self):
+        within = self.box.contains_many(self.lat, self.lon)
+        self.assertTrue(within.any() and not within.all())
+        for lat, lon, check in zip(self.lat, self.lon, within):
+            self.assertEqual(self.box.is_within(lat, lon), check)
+        lat2d, lon2d = self.lat.reshape(20, 10), self.lon.reshape(20, 10)
+        self.assertTrue((self.box.contains_many(lat2d, lon2d) == within.reshape(20, 10)).all())
+        self.assertFalse(self.box.contains_many(np.array([np.nan]), np.array([-122.8]))[0])
+
+    def testAssignCellsEmpty(self):
+        row, col = self.box.assign_cells(np.array([]), np.array([]))
+        self.assertEqual(row.size, 0)
+        self.assertEqual(col.size, 0)
+
+    def testCellCentersRoundTrip(self):
+        box = Box(57.870760, -133.540154, 46.173395, -129.055971, 1250, 50)
+        center_lat, center_lon = box.get_cell_centers()
+        corner_lat, corner_lon = box.get_cell_corners()
+        self.assertEqual(center_lat.shape, (25, 25))
+        self.assertEqual(corner_lon.shape, (26, 26))
+        self.assertIs(box.get_cell_centers()[0], center_lat)
+        # Solved corners are only nearly dist apart, so lattice is a best fit
+        self.assertAlmostEqual(corner_lat[0, 0], box.nw_lat, delta=0.05)
+        self.assertAlmostEqual(corner_lon[0, 0], box.nw_lon, delta=0.05)
+
+        row, col = box.assign_cells(center_lat, center_lon)
+        check_row, check_col = np.indices(center_lat.shape)
+        within = row >= 0
+        self.assertGreater(np.sum(within), 500)
+        self.assertTrue((row[within] == check_row[within]).all())
+        self.assertTrue((col[within] == check_col[within]).all())
+        self.assertEqual(box.get_cell_assignment(*box.get_cell_center(10, 12)), (10, 12))
+
+    def testAssignCellsKDTree(self):
+        box = Box(57.870760, -133.540154, 46.173395, -129.055971, 1250, 50)
+        row, col = box.assign_cells(self.lat, self.lon, method='kdtree')
+        check_row, check_col = box.assign_cells(self.lat, self.lon)
+        self.assertTrue(((row == -1) == (check_row == -1)).all())
+        self.assertLessEqual(np.max(np.abs(row - check_row)), Box.ASSIGN_CELLS_TOLERANCE_CELLS)
+        self.assertLessEqual(np.max(np.abs(col - check_col)), Box.ASSIGN_CELLS_TOLERANCE_CELLS)
+        self.assertGreater(np.mean((row == check_row) & (col == check_col)), 0.9)
+        with self.assertRaises(ValueError):
+            box.assign_cells(self.lat, self.lon, method='nearest')
+
+    def testAdaptiveConsensusMatches(self):
+        # Source grid over the whole Box, hundreds of points of which run
+        # along the south edge and cell edges
+        adaptive_box = Box(*self.box.get_orig_box_args(), adaptive_consensus=True,
+                           corners=self.box.get_corners())
+        lat, lon = np.meshgrid(np.arange(47, 61, 0.5), np.arange(-134, -110, 0.5), indexing='ij')
+        within = self.box.contains_many(lat.ravel(), lon.ravel())
+        num_points = int(np.count_nonzero(within))
+        self.assertGreater(num_points, 800)
+        for query_lat, query_lon in zip(lat.ravel()[within], lon.ravel()[within]):
+            self.assertEqual(adaptive_box.get_cell_assignment(query_lat, query_lon),
+                             self.box.get_cell_assignment(query_lat, query_lon))
+        stats = adaptive_box.get_consensus_stats()
+        self.assertEqual(stats["assignments"], num_points)
+        self.assertGreater(stats["solver_calls_saved"], 0)
+        self.assertGreater(stats["cold_resolves"], 0)
+        self.assertLess(stats["solver_calls"], 5 * num_points)
+        self.assertEqual(self.box.get_consensus_stats()["solver_calls"], 5 * num_points)
+
+    def testCellAssignmentIfInGridCached(self):
+        first = self.box.get_cell_assignment_if_in_grid(53.9, -122.8)
+        self.assertEqual(self.box.get_cache_stats()["misses"], 1)
+        self.assertEqual(self.box.get_cell_assignment_if_in_grid(53.9 + 1e-10, -122.8), first)
+        self.assertEqual(self.box.get_cache_stats()["hits"], 1)
+        self.assertTrue(self.box.is_already_assigned(53.9, -122.8))
+        outside = self.box.get_cell_assignment_if_in_grid(30, -160)
+        self.assertTrue(np.isnan(outside[0]) and np.isnan(outside[1]))
+        self.assertEqual(self.box.get_cache_stats()["entries"], 2)
+
+    def testCoarseCellMapMatchesAssignment(self):
+        # Coarse cells are not factor by factor blocks of cells, the map
+        # agrees with assigning cell centers to the coarse Box instead
+        center_lat, center_lon = self.box.get_cell_centers()
+        for factor in (2, 5, 10):
+            coarse_box = self.box.coarsen(factor)
+            rows, cols = self.box.get_coarse_cell_map(coarse_box)
+            check_rows, check_cols = coarse_box.assign_cells(center_lat, center_lon)
+            within = check_rows >= 0
+            self.assertLessEqual(np.abs(rows - check_rows)[within].max(), Box.ASSIGN_CELLS_TOLERANCE_CELLS)
+            self.assertLessEqual(np.abs(cols - check_cols)[within].max(), Box.ASSIGN_CELLS_TOLERANCE_CELLS)
+            agree = (rows == check_rows) & (cols == check_cols)
+            self.assertGreater(agree[within].mean(), 0.97)
+            self.assertEqual(rows.max(), coarse_box.get_num_cells() - 1)
+
+    def testCoarsenKeepsSettings(self):
+        box = Box(57.870760, -133.540154, 46.173395, -129.055971, 1250, 5,
+                  cache_precision=4, adaptive_consensus=True, corners=self.box.get_corners())
+        aoi_mask = np.zeros((250, 250), dtype=bool)
+        aoi_mask[100:110, 3] = True
+        box.set_area_of_interest(aoi_mask)
+        coarse_box = box.coarsen(2)
+        self.assertEqual(coarse_box.get_corners(), box.get_corners())
+        self.assertEqual(coarse_box.previous_assignments.precision, 4)
+        self.assertTrue(coarse_box.adaptive_consensus)
+        rows, cols = box.get_coarse_cell_map(coarse_box)
+        self.assertEqual(coarse_box.get_num_packed_cells(),
+                         len(set(zip(rows[aoi_mask], cols[aoi_mask]))))
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
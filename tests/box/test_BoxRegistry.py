@@ -0,0 +1,115 @@
+import os
+import pickle
+import tempfile
+
+import unittest
+from unittest import mock
+
+from smoke.box.Box import Box
+from smoke.box import BoxRegistry as box_registry
+from smoke.box.BoxRegistry import BoxRegistry, BoxSpec, get_default_registry
+
+
+class LabelledBox(Box):
+    # Subclass setting its own attribute, to check unpickling runs its __init__
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.label = 'bc'
+
+
+class testBoxRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.registry_path = os.path.join(self.temp_dir.name, 'box_corners.json')
+        self.box_args = (57.870760, -133.540154, 46.173395, -129.055971, 1250, 5)
+        # Start each test with fresh default registries, none persisted
+        self.registry_env = mock.patch.dict(os.environ)
+        self.registry_env.start()
+        os.environ.pop('SMOKE_BOX_REGISTRY', None)
+        self.default_registries = mock.patch.dict(box_registry._default_registries, clear=True)
+        self.default_registries.start()
+
+    def tearDown(self):
+        self.default_registries.stop()
+        self.registry_env.stop()
+        self.temp_dir.cleanup()
+
+    def testDefaultRegistryInMemory(self):
+        # Corners are memoized for the process without touching any file
+        registry = get_default_registry()
+        self.assertIsNone(registry.registry_path)
+        self.assertIs(get_default_registry(), registry)
+        box = Box(*self.box_args)
+        with mock.patch.object(Box, '_compute_box_coords') as compute, \
+                mock.patch('builtins.open') as open_file:
+            same_box = Box(*self.box_args)
+            coarse_box = Box(*self.box_args[:5], 10)
+            compute.assert_not_called()
+            open_file.assert_not_called()
+        self.assertEqual(same_box.get_corners(), tuple(float(c) for c in box.get_corners()))
+        self.assertEqual(coarse_box.get_corners(), same_box.get_corners())
+
+    def testDefaultRegistryPersistOptIn(self):
+        os.environ['SMOKE_BOX_REGISTRY'] = self.registry_path
+        self.assertEqual(get_default_registry().registry_path, self.registry_path)
+        box = Box(*self.box_args)
+        self.assertTrue(os.path.isfile(self.registry_path))
+        with mock.patch.object(Box, '_compute_box_coords') as compute:
+            same_box = Box(*self.box_args, registry=BoxRegistry(self.registry_path))
+            compute.assert_not_called()
+        self.assertEqual(same_box.get_corners(), tuple(float(c) for c in box.get_corners()))
+
+    def testCornersMemoizedAcrossRegistries(self):
+        box = Box(*self.box_args, registry=BoxRegistry(self.registry_path))
+        self.assertTrue(os.path.isfile(self.registry_path))
+
+        # Fresh registry (as in another process) reads corners from file, for
+        # any resolution as corners do not depend on it
+        with mock.patch.object(Box, '_compute_box_coords') as compute:
+            other_registry = BoxRegistry(self.registry_path)
+            same_box = Box(*self.box_args, registry=other_registry)
+            coarse_box = Box(*self.box_args[:5], 10, registry=other_registry)
+            compute.assert_not_called()
+        self.assertEqual(same_box.get_corners(), tuple(float(c) for c in box.get_corners()))
+        self.assertEqual(coarse_box.get_corners(), same_box.get_corners())
+        self.assertEqual(coarse_box.get_num_cells(), 125)
+
+    def testSpecRoundTrip(self):
+        box = Box(*self.box_args, registry=BoxRegistry(self.registry_path))
+        spec = box.to_spec()
+        self.assertIsInstance(spec, BoxSpec)
+        self.assertEqual(spec.get_orig_box_args(), self.box_args)
+        with mock.patch.object(Box, '_compute_box_coords') as compute:
+            rehydrated = Box.from_spec(spec)
+            compute.assert_not_called()
+        self.assertEqual(rehydrated.get_corners(), box.get_corners())
+        self.assertEqual(rehydrated.get_orig_box_args(), box.get_orig_box_args())
+        self.assertTrue(rehydrated.is_within(53.9, -122.8))
+
+    def testLightweightPickle(self):
+        box = Box(*self.box_args, registry=BoxRegistry(self.registry_path))
+        for i in range(100):
+            box.store_assignment(50 + i / 10, -120, i, i)
+        pickled = pickle.dumps(box)
+        self.assertLess(len(pickled), 1000)
+        unpickled = pickle.loads(pickled)
+        self.assertIsInstance(unpickled, Box)
+        self.assertEqual(unpickled.get_corners(), box.get_corners())
+        self.assertEqual(len(unpickled.previous_assignments), 0)
+
+    def testPickleKeepsSettingsAndSubclass(self):
+        box = LabelledBox(*self.box_args, cache_precision=4, cache_max_bytes=1024 ** 2,
+                          adaptive_consensus=True, registry=BoxRegistry(self.registry_path))
+        with mock.patch.object(Box, '_compute_box_coords') as compute:
+            unpickled = pickle.loads(pickle.dumps(box))
+            compute.assert_not_called()
+        self.assertIsInstance(unpickled, LabelledBox)
+        self.assertEqual(unpickled.label, 'bc')
+        self.assertEqual(unpickled.previous_assignments.precision, 4)
+        self.assertEqual(unpickled.previous_assignments.max_bytes, 1024 ** 2)
+        self.assertTrue(unpickled.adaptive_consensus)
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
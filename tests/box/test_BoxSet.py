@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+from smoke.box.Box import Box
+from smoke.box.BoxSet import BoxSet
+
+
+class testBoxSet(unittest.TestCase):
+
+    def setUp(self):
+        self.box_set = BoxSet({
+            'bc50km': Box(57.870760, -133.540154, 46.173395, -129.055971, 1250, 50),
+            'bc125km': Box(57.870760, -133.540154, 46.173395, -129.055971, 1250, 125),
+            'small': Box(56.956768, -131.38922, 48.541751, -129.580869, 1120, 40)
+        })
+        rng = np.random.RandomState(0)
+        self.lat = rng.uniform(40, 65, 300).reshape(30, 10)
+        self.lon = rng.uniform(-145, -105, 300).reshape(30, 10)
+
+    def testMatchesEachBox(self):
+        for method in BoxSet.ASSIGNMENT_METHODS:
+            assignments = self.box_set.assign_cells(self.lat, self.lon, method)
+            self.assertEqual(list(assignments), ['bc50km', 'bc125km', 'small'])
+            for name, box in self.box_set.items():
+                row, col = assignments[name]
+                check_row, check_col = box.assign_cells(self.lat, self.lon, method)
+                self.assertEqual(row.shape, (30, 10))
+                self.assertTrue((row == check_row).all())
+                self.assertTrue((col == check_col).all())
+
+    def testTelemetryNotDoubleCounted(self):
+        for method in BoxSet.ASSIGNMENT_METHODS:
+            self.box_set.assign_cells(self.lat, self.lon, method)
+            shared = self.box_set.get_telemetry()['latency'][f'assign_cells_{method}_shared']
+            total = self.box_set.get_telemetry()['latency'][f'assign_cells_{method}']
+            self.assertEqual(shared['count'], 1)
+            self.assertLessEqual(shared['total_s'], total['total_s'])
+
+            # Each Box records its own points and a share of the call's time
+            box_total_s = 0
+            for name, box in self.box_set.items():
+                telemetry = box.get_telemetry()
+                within = box.contains_many(self.lat.flatten(), self.lon.flatten())
+                self.assertEqual(telemetry['points_assigned'][f'box_set_assign_cells_{method}'],
+                                 np.count_nonzero(within))
+                box_total_s += telemetry['latency'][f'box_set_assign_cells_{method}']['total_s']
+            self.assertLessEqual(box_total_s + shared['total_s'], total['total_s'])
+
+    def testSharedPlanarGroups(self):
+        groups = list(self.box_set._get_planar_groups().values())
+        self.assertEqual(groups, [['bc50km', 'bc125km'], ['small']])
+
+    def testEmptyAndOutside(self):
+        self.assertEqual(len(BoxSet().assign_cells(self.lat, self.lon)), 0)
+        assignments = self.box_set.assign_cells(np.array([30.0]), np.array([-160.0]))
+        for row, col in assignments.values():
+            self.assertEqual((row[0], col[0]), (-1, -1))
+        with self.assertRaises(ValueError):
+            self.box_set.assign_cells(self.lat, self.lon, method='nearest')
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
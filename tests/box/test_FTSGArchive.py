@@ -0,0 +1,59 @@
+import os
+import unittest
+import tempfile
+import numpy as np
+from datetime import datetime
+from smoke.box.Box import Box
+from smoke.box.FeatureTimeSpaceGrid import FeatureTimeSpaceGrid
+from smoke.box.FTSGArchive import FTSGArchive, consolidate_FTSGs
+
+
+class testFTSGArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.box = Box(57.870760, -133.540154, 46.173395, -129.055971, 1250, 125)
+        self.days = []
+        for day in (1, 2, 4):
+            ftsg = FeatureTimeSpaceGrid(self.box, np.array(['feat1', 'feat2']), datetime(2020, 7, day),
+                                        datetime(2020, 7, day + 1), 6)
+            ftsg.populate_space_grid('feat2', datetime(2020, 7, day, 12), np.array([[day, day]]),
+                                     np.array([float(day)]))
+            self.days.append(ftsg)
+
+    def testAppendAndReadRange(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            archive = FTSGArchive(os.path.join(temp_dir, 'archive'))
+            for ftsg in self.days:
+                archive.append(ftsg)
+            with self.assertRaises(ValueError):
+                archive.append(self.days[0])
+
+            archive = FTSGArchive(os.path.join(temp_dir, 'archive'))
+            self.assertEqual(archive.get_num_times(), 12)
+            times, records = archive.read_range(datetime(2020, 7, 2), datetime(2020, 7, 4, 12))
+            self.assertEqual(times[0], np.datetime64('2020-07-02T06:00'))
+            self.assertEqual(times[-1], np.datetime64('2020-07-04T12:00'))
+            self.assertEqual(records.shape, (6, 2, 10, 10))
+            self.assertEqual(records[1, 1, 2, 2], 2)
+
+            # Day 3 was never archived so is left nan
+            ftsg = archive.to_FeatureTimeSpaceGrid(datetime(2020, 7, 1), datetime(2020, 7, 5))
+            self.assertEqual(ftsg.get_grid().shape, (2, 16, 10, 10))
+            self.assertEqual(ftsg.get_grid()[1, 1, 1, 1], 1)
+            self.assertEqual(ftsg.get_grid()[1, 13, 4, 4], 4)
+            self.assertTrue(np.isnan(ftsg.get_grid()[:, 8:12]).all())
+
+    def testConsolidate(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for ftsg in self.days[::-1]:
+                ftsg.save(temp_dir, 'test_')
+            archive = consolidate_FTSGs(temp_dir, 'test_', os.path.join(temp_dir, 'archive'))
+            self.assertEqual(archive.get_num_times(), 12)
+            self.assertTrue((np.diff(archive.get_times()) > np.timedelta64(0)).all())
+            # Rerunning skips days already archived
+            archive = consolidate_FTSGs(temp_dir, 'test_', os.path.join(temp_dir, 'archive'))
+            self.assertEqual(archive.get_num_times(), 12)
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
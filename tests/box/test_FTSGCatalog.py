@@ -0,0 +1,63 @@
+import os
+import unittest
+import tempfile
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from smoke.box.Box import Box
+from smoke.box.FeatureTimeSpaceGrid import FeatureTimeSpaceGrid
+from smoke.box.FTSGCatalog import FTSGCatalog
+
+
+class testFTSGCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.box = Box(57.870760, -133.540154, 46.173395, -129.055971, 1250, 125)
+        self.features = np.array(['feat1', 'feat2'])
+
+    def _make_ftsg(self, sparse=False):
+        ftsg = FeatureTimeSpaceGrid(self.box, self.features, datetime(2020, 7, 1),
+                                    datetime(2020, 7, 2), 6, sparse=sparse)
+        ftsg.populate_space_grid('feat2', datetime(2020, 7, 1, 12), np.array([[3, 4]]),
+                                 np.array([1.0]))
+        return ftsg
+
+    def testRecordAndGetEntry(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            catalog = FTSGCatalog(os.path.join(temp_dir, 'catalog.sqlite'))
+            for sparse in (False, True):
+                ftsg = self._make_ftsg(sparse)
+                save_path = ftsg.save(temp_dir, 'test_')
+                catalog.record(ftsg, save_path)
+
+                entry = FTSGCatalog(catalog.db_path).get_entry(save_path)
+                self.assertEqual(entry.prefix, 'test_')
+                self.assertEqual(entry.features, ['feat1', 'feat2'])
+                self.assertEqual(entry.grid_shape, [2, 4, 10, 10])
+                self.assertEqual(entry.validity.tolist(), [[False] * 4, [False, True, False, False]])
+                self.assertFalse(entry.is_all_nan())
+                self.assertTrue(entry.has_valid_data(time=datetime(2020, 7, 1, 12)))
+                self.assertFalse(entry.has_valid_data(time=datetime(2020, 7, 1, 18)))
+                self.assertFalse(entry.has_valid_data(feature='feat1'))
+                # Aware times are compared in UTC, 12:00 UTC being 05:00 PDT
+                pdt = timezone(timedelta(hours=-7))
+                self.assertTrue(entry.has_valid_data(time=datetime(2020, 7, 1, 5, tzinfo=pdt)))
+                self.assertFalse(entry.has_valid_data(time=datetime(2020, 7, 1, 12, tzinfo=pdt)))
+                self.assertTrue(entry.has_valid_data(time=datetime(2020, 7, 1, 12, tzinfo=timezone.utc)))
+
+            self.assertIsNone(catalog.get_entry(os.path.join(temp_dir, 'missing.tar.gz')))
+            self.assertEqual(len(catalog.find(temp_dir, 'test_', datetime(2020, 7, 2))), 1)
+            self.assertEqual(len(catalog.find(temp_dir, 'test_', datetime(2020, 7, 1))), 0)
+            self.assertEqual(len(catalog.find(temp_dir, 'test_',
+                                              datetime(2020, 6, 30, 20, tzinfo=timezone(timedelta(hours=-7))))), 1)
+
+    def testRecordDirectory(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            save_path = self._make_ftsg().save(temp_dir, 'test_')
+            catalog = FTSGCatalog(os.path.join(temp_dir, 'catalog.sqlite'))
+            self.assertEqual(catalog.record_directory(temp_dir), 1)
+            self.assertEqual(catalog.record_directory(temp_dir), 0)
+            self.assertEqual(catalog.get_entry(save_path).prefix, 'test_')
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
@@ -17,6 +17,16 @@ class testFeatureTimeSpaceGrid(unittest.TestCase):
             datetime(2020, 1, 2),
             6
         )
+        # Same grid stored sparsely, for tests run against both backends
+        self.sparse_grid = FeatureTimeSpaceGrid(
+            box,
+            np.array(['x1', 'x2', 'x3']),
+            datetime(2020, 1, 1),
+            datetime(2020, 1, 2),
+            6,
+            sparse=True
+        )
+        self.backends = {'dense': self.grid, 'sparse': self.sparse_grid}
 
     def testConstructor(self):
         grid = self.grid
@@ -34,12 +44,22 @@ class testFeatureTimeSpaceGrid(unittest.TestCase):
         self.assertTrue((grid.get_times() == np.array([datetime(2020, 1, 1, 6),
                                                        datetime(2020, 1, 1, 12),
                                                        datetime(2020, 1, 1, 18),
-                                                       datetime(2020, 1, 2, 0)])).all())
+                                                       datetime(2020, 1, 2, 0)],
+                                                      dtype='datetime64[ns]')).all())
         self.assertEqual(grid.get_time_index(datetime(2020, 1, 1, 6)), 0)
         self.assertEqual(grid.get_time_index(datetime(2020, 1, 1, 12)), 1)
         self.assertEqual(grid.get_time_index(datetime(2020, 1, 1, 18)), 2)
         self.assertEqual(grid.get_time_index(datetime(2020, 1, 2, 0)), 3)
         self.assertEqual(grid.get_grid().shape, (3, 4, 250, 250))
+        self.assertEqual(grid.get_grid().dtype, np.float32)
+
+    def testGetTimeIndices(self):
+        times = np.array([datetime(2020, 1, 2, 0), datetime(2020, 1, 1, 7), datetime(2020, 1, 1, 12)])
+        self.assertTrue((self.grid.get_time_indices(times) == [3, -1, 1]).all())
+        self.assertTrue((self.grid.get_time_indices(self.grid.get_times()) == [0, 1, 2, 3]).all())
+        self.assertEqual(self.grid.get_time_index(np.datetime64('2020-01-01T18')), 2)
+        with self.assertRaises(KeyError):
+            self.grid.get_time_index(datetime(2020, 1, 1, 7))
 
     def testAssignSpaceGrid1DMaskProperly(self):
         assigns = self.grid.assign_space_grid(np.array([30, 40, 55, 70, 80]), np.array([-160, -150, -120, -90, -80]))
@@ -101,6 +121,17 @@ class testFeatureTimeSpaceGrid(unittest.TestCase):
                                       np.logical_and(np.isnan(self.grid.get_grid()),
                                                      np.isnan(check_grid))).all())
 
+    def testPopulateAndAccumulateMany(self):
+        self.grid.populate_space_grid_many('x2', np.array([0, 3]), np.array([10, 249]),
+                                           np.array([20, 0]), np.array([1.5, 2.5]))
+        self.assertEqual(self.grid.get_grid()[1, 0, 10, 20], 1.5)
+        self.assertEqual(self.grid.get_grid()[1, 3, 249, 0], 2.5)
+        self.grid.accumulate_space_grid_many('x3', 2, np.array([4, 4, 4]), np.array([6, 6, 7]),
+                                             np.array([1., 2., 4.]))
+        self.assertEqual(self.grid.get_grid()[2, 2, 4, 6], 3)
+        self.assertEqual(self.grid.get_grid()[2, 2, 4, 7], 4)
+        self.assertEqual(np.count_nonzero(~np.isnan(self.grid.get_grid())), 4)
+
     def testGetSetGrid(self):
         self.assertEqual(np.nansum(self.grid.get_grid()), 0)
         self.grid.set_grid(np.ones((3, 4, 250, 250)))
@@ -133,6 +164,99 @@ class testFeatureTimeSpaceGrid(unittest.TestCase):
                                       np.array([4001]))
         self.assertEqual(np.nansum(self.grid.get_grid_nan_converted(0)), 4001)
 
+    def testReadSlice(self):
+        for backend, grid in self.backends.items():
+            with self.subTest(backend=backend):
+                grid.populate_space_grid('x2', datetime(2020, 1, 1, 12),
+                                         np.array([[3, 4]]),
+                                         np.array([7]))
+                self.assertTrue(grid.is_time_all_nan(0))
+                self.assertFalse(grid.is_time_all_nan(1))
+                time_slice = grid.read_slice(1)
+                self.assertEqual(time_slice.shape, (3, 250, 250))
+                self.assertEqual(time_slice[1, 3, 4], 7)
+                self.assertEqual(time_slice.sum(), 7 - (3*250*250 - 1))
+                # Reading into a buffer fills only the requested times
+                out = np.zeros((3, 2, 250, 250), dtype=grid.get_dtype())
+                self.assertIs(grid.read_slices([3, 1], fill_val=0, out=out), out)
+                self.assertEqual(out.sum(), 7)
+                self.assertEqual(out[1, 1, 3, 4], 7)
+                # Repeated times are read into every position requesting them
+                repeated = grid.read_slices([1, 0, 1, -3], fill_val=0)
+                self.assertEqual(repeated.sum(), 3 * 7)
+                self.assertEqual(repeated[1, [0, 2, 3], 3, 4].tolist(), [7, 7, 7])
+        # The grid itself is left unconverted
+        self.assertTrue(np.isnan(self.grid.get_grid()[0]).all())
+
+    def testRollTimeAxis(self):
+        for backend, grid in self.backends.items():
+            with self.subTest(backend=backend):
+                grid.populate_space_grid('x2', datetime(2020, 1, 1, 18),
+                                         np.array([[3, 4]]),
+                                         np.array([7]))
+                for _ in range(10):
+                    grid.roll_time_axis()
+                grid.append_times(2)
+                grid.drop_oldest_times(3)
+                self.assertEqual(grid.get_grid().shape, (3, 3, 250, 250))
+                self.assertEqual(grid.get_time(0), datetime(2020, 1, 4, 12))
+                self.assertEqual(grid.get_time_index(datetime(2020, 1, 5, 0)), 2)
+                self.assertEqual(grid.get_time_indices(np.array([datetime(2020, 1, 4, 18),
+                                                                 datetime(2020, 1, 1, 18)])).tolist(),
+                                 [1, -1])
+                self.assertEqual(grid.datetime_stop.replace(tzinfo=None), datetime(2020, 1, 5))
+                self.assertTrue(np.isnan(grid.get_grid()).all())
+
+                # Values survive rolling until their time is dropped
+                grid.populate_space_grid('x1', datetime(2020, 1, 5), np.array([[1, 2]]), np.array([5]))
+                grid.roll_time_axis(2)
+                self.assertEqual(grid.get_grid()[0, 0, 1, 2], 5)
+                self.assertEqual(np.nansum(grid.get_grid()), 5)
+
+    def testCoarsen(self):
+        for backend, grid in self.backends.items():
+            with self.subTest(backend=backend):
+                grid.populate_space_grid('x1', datetime(2020, 1, 1, 6),
+                                         np.array([[0, 0], [0, 1], [3, 3], [9, 9]]),
+                                         np.array([1, 3, 4, 8]))
+                coarse = grid.coarsen(2, how='mean')
+                self.assertEqual(coarse.box.get_num_cells(), 125)
+                self.assertEqual(coarse.box.get_orig_box_args()[5], 10)
+                self.assertEqual(coarse.get_grid().shape, (3, 4, 125, 125))
+                self.assertEqual(coarse.get_grid()[0, 0, 0, 0], 2)
+                self.assertEqual(coarse.get_grid()[0, 0, 1, 1], 4)
+                self.assertEqual(np.count_nonzero(~np.isnan(coarse.get_grid())), 3)
+                self.assertEqual(grid.coarsen(5, how='sum').get_grid()[0, 0, 0, 0], 8)
+                self.assertEqual(grid.coarsen(10, how='max').get_grid()[0, 0, 0, 0], 8)
+                # Cells go to the coarse cell their center is in, not their block
+                grid.populate_space_grid('x3', datetime(2020, 1, 1, 6), np.array([[200, 200]]),
+                                         np.array([5]))
+                self.assertEqual(grid.coarsen(2).get_grid()[2, 0, 99, 99], 5)
+        with self.assertRaises(ValueError):
+            self.grid.coarsen(3)
+
+    def testResampleTime(self):
+        for backend, grid in self.backends.items():
+            with self.subTest(backend=backend):
+                for hour, value in ((6, 1), (12, 3), (18, 8)):
+                    grid.populate_space_grid('x1', datetime(2020, 1, 1, hour),
+                                             np.array([[0, 0]]),
+                                             np.array([value]))
+                resampled = grid.resample_time(12, how='mean')
+                self.assertEqual(resampled.get_grid().shape, (3, 2, 250, 250))
+                self.assertEqual(resampled.get_time(1), datetime(2020, 1, 2))
+                self.assertEqual(resampled.get_grid()[0, 0, 0, 0], 2)
+                self.assertEqual(resampled.get_grid()[0, 1, 0, 0], 8)
+                self.assertEqual(np.count_nonzero(~np.isnan(resampled.get_grid())), 2)
+                self.assertEqual(grid.resample_time(24, how='sum').get_grid()[0, 0, 0, 0], 12)
+                self.assertEqual(grid.resample_time(24, how='max').get_grid()[0, 0, 0, 0], 8)
+        with self.assertRaises(ValueError):
+            self.grid.resample_time(18)
+        with self.assertRaises(ValueError):
+            self.grid.resample_time(3)
+        with self.assertRaises(ValueError):
+            self.grid.resample_time(0)
+
     def testSetGridFail(self):
         try:
             self.grid.set_grid(np.array([1,2,3]))
@@ -8,7 +8,8 @@ import numpy as np
 from datetime import datetime
 
 from smoke.box.Box import Box
-from smoke.box.FeatureTimeSpaceGrid import FeatureTimeSpaceGrid, load_FeatureTimeSpaceGrid
+from smoke.box.FeatureTimeSpaceGrid import (FeatureTimeSpaceGrid, load_FeatureTimeSpaceGrid,
+                                            save_FeatureTimeSpaceGrid_pyramid)
 
 
 def check_meta(file_path, unique_name, datetime_start, datetime_stop, time_res_h,
@@ -117,5 +118,35 @@ class testSaveLoadFTSG(unittest.TestCase):
         self.assertTrue((second_load.get_times() == self.FTSG_d2_res6.get_times()).all())
         self.assertTrue((second_load.get_grid_nan_converted() == self.FTSG_d2_res6.get_grid_nan_converted()).all())
 
+    def testSaveLoadDtype(self):
+        ftsg = FeatureTimeSpaceGrid(Box(57.870760, -133.540154, 46.173395, -129.055971, 1250, 50),
+                                    np.array(['feat1']), datetime(2020, 6, 30), datetime(2020, 7, 1), 6,
+                                    dtype='float16')
+        self.assertEqual(ftsg.get_grid().dtype, np.float16)
+        ftsg.set_grid(np.ones((1, 4, 25, 25)))
+        self.assertEqual(ftsg.get_grid().dtype, np.float16)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ftsg.save(temp_dir, 'dtype_')
+            file_path = os.path.join(temp_dir, 'dtype_strt20200630T000000_stop20200701T000000_res6.tar.gz')
+            self.assertEqual(load_FeatureTimeSpaceGrid(file_path).get_dtype(), np.float16)
+            self.assertEqual(load_FeatureTimeSpaceGrid(file_path, dtype='float32').get_grid().dtype, np.float32)
+        with self.assertRaises(ValueError):
+            FeatureTimeSpaceGrid(ftsg.box, np.array(['feat1']), datetime(2020, 6, 30), datetime(2020, 7, 1), 6,
+                                 dtype='int32')
+
+    def testSavePyramid(self):
+        ftsg = FeatureTimeSpaceGrid(Box(57.870760, -133.540154, 46.173395, -129.055971, 1250, 50),
+                                    np.array(['feat1']), datetime(2020, 6, 30), datetime(2020, 7, 1), 6)
+        ftsg.set_grid(np.ones((1, 4, 25, 25)))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = save_FeatureTimeSpaceGrid_pyramid(ftsg, temp_dir, 'pyramid_', factors=(5, 25))
+            self.assertEqual([os.path.basename(p) for p in paths],
+                             ['pyramid_strt20200630T000000_stop20200701T000000_res6.tar.gz',
+                              'pyramid_250km_strt20200630T000000_stop20200701T000000_res6.tar.gz',
+                              'pyramid_1250km_strt20200630T000000_stop20200701T000000_res6.tar.gz'])
+            coarsest = load_FeatureTimeSpaceGrid(paths[-1])
+            self.assertEqual(coarsest.get_grid().shape, (1, 4, 1, 1))
+            self.assertTrue((coarsest.get_grid() == 1).all())
+
 if __name__ == "__main__":
      unittest.main(argv=["first-arg-is-ignored"], exit=False)
@@ -0,0 +1,71 @@
+import os
+import unittest
+import tempfile
+import numpy as np
+from datetime import datetime
+from smoke.box.Box import Box
+from smoke.box.SparseGrid import SparseGrid
+from smoke.box.FeatureTimeSpaceGrid import FeatureTimeSpaceGrid, load_FeatureTimeSpaceGrid
+
+
+class testSparseGrid(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = SparseGrid((2, 3, 4), np.float32)
+
+    def testSetCellsLastWriteKept(self):
+        self.grid.set_cells([0, 5, 5], [1., 2., 3.])
+        self.grid.set_cells([0], np.nan)  # Clears cell
+        self.assertEqual(self.grid.get_nnz(), 1)
+        dense = self.grid.to_dense()
+        self.assertEqual(dense.dtype, np.float32)
+        self.assertEqual(dense[0, 1, 1], 3)
+        self.assertEqual(np.count_nonzero(~np.isnan(dense)), 1)
+
+    def testAddCells(self):
+        self.grid.set_cells([5], 2.)
+        self.grid.add_cells([5, 5, 7], [1., 1., 4.])
+        indices, values = self.grid.get_cells()
+        self.assertTrue((indices == [5, 7]).all())
+        self.assertTrue((values == [4, 4]).all())
+
+    def testSetDense(self):
+        dense = np.full((3, 4), np.nan)
+        dense[2, 3] = 8
+        self.grid.set_cells([0, 13], [1., 1.])
+        self.grid.set_dense(dense, offset=12)
+        indices, values = self.grid.get_cells()
+        self.assertTrue((indices == [0, 23]).all())
+        self.assertTrue((values == [1, 8]).all())
+
+    def testSparseFTSG(self):
+        box = Box(57.870760, -133.540154, 46.173395, -129.055971, 1250, 50)
+        dense = FeatureTimeSpaceGrid(box, np.array(['feat1', 'feat2']), datetime(2020, 6, 30),
+                                     datetime(2020, 7, 1), 6)
+        sparse = FeatureTimeSpaceGrid(box, np.array(['feat1', 'feat2']), datetime(2020, 6, 30),
+                                      datetime(2020, 7, 1), 6, sparse=True)
+        self.assertTrue(sparse.is_all_nan())
+        for ftsg in (dense, sparse):
+            ftsg.populate_space_grid('feat2', datetime(2020, 6, 30, 12), np.array([[1, 2], [3, 4]]),
+                                     np.array([5., 6.]))
+            ftsg.populate_cell(0, 3, 24, 24, 7.)
+            ftsg.accumulate_space_grid_many('feat1', 0, np.array([0, 0]), np.array([1, 1]), 1.)
+        self.assertEqual(sparse.get_sparse_grid().get_nnz(), 4)
+        self.assertTrue(np.allclose(sparse.get_grid(), dense.get_grid(), equal_nan=True))
+
+        feature_grid = np.full((4, 25, 25), np.nan)
+        feature_grid[2, 10, 10] = 9
+        sparse.set_feature_grid('feat2', feature_grid)
+        self.assertEqual(sparse.get_sparse_grid().get_nnz(), 3)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sparse.save(temp_dir, 'sparse_')
+            loaded = load_FeatureTimeSpaceGrid(
+                os.path.join(temp_dir, 'sparse_strt20200630T000000_stop20200701T000000_res6.tar.gz')
+            )
+        self.assertTrue(loaded.is_sparse())
+        self.assertTrue(np.allclose(loaded.get_grid(), sparse.get_grid(), equal_nan=True))
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
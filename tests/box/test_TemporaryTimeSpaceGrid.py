@@ -23,7 +23,8 @@ class testTimeSpaceGrid(unittest.TestCase):
         self.assertTrue((grid.get_times() == np.array([datetime(2020, 1, 1, 6),
                                                        datetime(2020, 1, 1, 12),
                                                        datetime(2020, 1, 1, 18),
-                                                       datetime(2020, 1, 2, 0)])).all())
+                                                       datetime(2020, 1, 2, 0)],
+                                                      dtype='datetime64[ns]')).all())
         self.assertEqual(grid.get_time_index(datetime(2020, 1, 1, 6)), 0)
         self.assertEqual(grid.get_time_index(datetime(2020, 1, 1, 12)), 1)
         self.assertEqual(grid.get_time_index(datetime(2020, 1, 1, 18)), 2)
@@ -71,6 +72,16 @@ class testTimeSpaceGrid(unittest.TestCase):
                                       np.logical_and(np.isnan(self.grid.get_grid()),
                                                      np.isnan(check_grid))).all())
 
+    def testPopulateAndAccumulateMany(self):
+        self.grid.populate_space_grid_many(np.array([0, 1, 1]), np.array([0, 5, 5]),
+                                           np.array([0, 7, 7]), np.array([1., 2., 3.]))
+        self.assertEqual(self.grid.get_grid()[0, 0, 0], 1)
+        self.assertEqual(self.grid.get_grid()[1, 5, 7], 3)
+        self.grid.accumulate_space_grid_many(1, np.array([5, 5, 9]), np.array([7, 7, 9]), 1)
+        self.assertEqual(self.grid.get_grid()[1, 5, 7], 5)
+        self.assertEqual(self.grid.get_grid()[1, 9, 9], 1)
+        self.assertEqual(np.count_nonzero(~np.isnan(self.grid.get_grid())), 3)
+
     def testSetTimeGrid(self):
         self.assertEqual(np.nansum(self.grid.get_grid()), 0)
         self.grid.set_time_grid(datetime(2020, 1, 1, 6), np.ones((250, 250)))
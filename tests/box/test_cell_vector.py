@@ -0,0 +1,68 @@
+import os
+import unittest
+import tempfile
+import numpy as np
+from datetime import datetime
+from smoke.box.Box import Box
+from smoke.box.FeatureTimeSpaceGrid import FeatureTimeSpaceGrid, load_FeatureTimeSpaceGrid
+from smoke.box.cell_vector import pack_cells, packed_index, unpack_cells
+
+
+class testCellVector(unittest.TestCase):
+
+    def setUp(self):
+        self.aoi_mask = np.zeros((4, 4), dtype=bool)
+        self.aoi_mask[1:3, 1:4] = True
+        self.grid = np.arange(2 * 4 * 4, dtype=float).reshape(2, 4, 4)
+
+    def testPackUnpackRoundTrip(self):
+        packed = pack_cells(self.grid, self.aoi_mask)
+        self.assertEqual(packed.shape, (2, 6))
+        self.assertTrue((packed[0] == [5, 6, 7, 9, 10, 11]).all())
+        unpacked = unpack_cells(packed, self.aoi_mask, fill_val=-1)
+        self.assertTrue((unpacked[:, self.aoi_mask] == self.grid[:, self.aoi_mask]).all())
+        self.assertTrue((unpacked[:, ~self.aoi_mask] == -1).all())
+        out = np.zeros((2, 4, 4))
+        self.assertIs(unpack_cells(packed, self.aoi_mask, out=out), out)
+        with self.assertRaises(ValueError):
+            pack_cells(np.zeros((2, 5, 5)), self.aoi_mask)
+
+    def testPackedIndex(self):
+        index = packed_index(self.aoi_mask)
+        self.assertEqual(index[0, 0], -1)
+        self.assertEqual(index[1, 1], 0)
+        self.assertEqual(index[2, 3], 5)
+
+    def testPackedFTSGSaveLoad(self):
+        box = Box(57.870760, -133.540154, 46.173395, -129.055971, 1250, 50)
+        aoi_mask = box.get_cells_within(box.poly)
+        self.assertTrue(aoi_mask.any() and not aoi_mask.all())
+        box.set_area_of_interest(aoi_mask)
+        ftsg = FeatureTimeSpaceGrid(box, np.array(['feat1']), datetime(2020, 6, 30),
+                                    datetime(2020, 7, 1), 6, packed=True)
+        self.assertEqual(ftsg.get_grid().shape, (1, 4, np.count_nonzero(aoi_mask)))
+
+        row, col = np.argwhere(aoi_mask)[0]
+        out_row, out_col = np.argwhere(~aoi_mask)[0]
+        ftsg.populate_cell(0, 1, row, col, 7)
+        ftsg.populate_cell(0, 1, out_row, out_col, 9)  # Outside area of interest so dropped
+        ftsg.accumulate_space_grid_many('feat1', 2, np.array([row, out_row]), np.array([col, out_col]), 1)
+        self.assertEqual(np.nansum(ftsg.get_grid()[0, 2]), 1)
+        ftsg.get_grid()[0, 2] = np.nan
+        unpacked = ftsg.get_unpacked_grid()
+        self.assertEqual(unpacked.shape, (1, 4, 25, 25))
+        self.assertEqual(unpacked[0, 1, row, col], 7)
+        self.assertEqual(np.nansum(unpacked), 7)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ftsg.save(temp_dir, 'packed_')
+            loaded = load_FeatureTimeSpaceGrid(
+                os.path.join(temp_dir, 'packed_strt20200630T000000_stop20200701T000000_res6.tar.gz')
+            )
+        self.assertTrue(loaded.is_packed())
+        self.assertTrue((loaded.box.get_area_of_interest() == aoi_mask).all())
+        self.assertTrue(np.allclose(loaded.get_grid(), ftsg.get_grid(), equal_nan=True))
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
@@ -0,0 +1,54 @@
+import os
+import unittest
+import tempfile
+import numpy as np
+from datetime import datetime
+from smoke.box.Box import Box
+from smoke.box.chunked_grid import ChunkedGridReader, is_chunked_grid, write_chunked_grid
+from smoke.box.FeatureTimeSpaceGrid import (FeatureTimeSpaceGrid, load_FeatureTimeSpaceGrid,
+                                            open_chunked_FeatureTimeSpaceGrid)
+
+
+class testChunkedGrid(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = np.arange(2 * 5 * 3 * 3, dtype=np.float32).reshape(2, 5, 3, 3)
+        self.grid[1, :2] = np.nan
+
+    def testReadChunks(self):
+        for compression in (None, 'zlib'):
+            with tempfile.TemporaryDirectory() as temp_dir:
+                path = os.path.join(temp_dir, 'grid.ftsg')
+                header = write_chunked_grid(path, self.grid, {"name": "test"}, time_chunk_size=2,
+                                            compression=compression)
+                self.assertTrue(is_chunked_grid(path))
+                self.assertFalse(os.path.exists(path + '.partial'))
+                # Feature 1 times 0 and 1 are all nan so never written
+                self.assertEqual(len(header["chunks"]), 5)
+
+                reader = ChunkedGridReader(path)
+                self.assertEqual(reader.get_header()["name"], "test")
+                self.assertTrue(np.allclose(reader.read(), self.grid, equal_nan=True))
+                self.assertTrue(np.allclose(reader.read([1], [4, 0]), self.grid[[1]][:, [4, 0]],
+                                            equal_nan=True))
+                self.assertEqual(reader.read_chunk(0, 2).shape, (1, 3, 3))
+
+    def testSaveLoadChunkedFTSG(self):
+        ftsg = FeatureTimeSpaceGrid(Box(57.870760, -133.540154, 46.173395, -129.055971, 1250, 50),
+                                    np.array(['feat1', 'feat2']), datetime(2020, 6, 30),
+                                    datetime(2020, 7, 1), 6)
+        ftsg.populate_space_grid('feat2', datetime(2020, 6, 30, 18), np.array([[3, 4]]), np.array([5.]))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = ftsg.save_chunked(temp_dir, 'chunked_', compression=None)
+            self.assertEqual(os.path.basename(path),
+                             'chunked_strt20200630T000000_stop20200701T000000_res6.ftsg')
+            header = open_chunked_FeatureTimeSpaceGrid(path).get_header()
+            self.assertEqual(list(header["chunks"]), ["1,2"])
+            loaded = load_FeatureTimeSpaceGrid(path)
+        self.assertTrue((loaded.get_features() == ftsg.get_features()).all())
+        self.assertTrue((loaded.get_times() == ftsg.get_times()).all())
+        self.assertTrue(np.allclose(loaded.get_grid(), ftsg.get_grid(), equal_nan=True))
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
@@ -0,0 +1,79 @@
+import unittest
+import tempfile
+import numpy as np
+from datetime import datetime
+from unittest import mock
+from smoke.box.Box import Box
+from smoke.box.FeatureTimeSpaceGrid import FeatureTimeSpaceGrid
+from smoke.box import ftsg_range
+from smoke.box.ftsg_range import open_ftsg_range, resample_ftsg_range
+
+
+class testOpenFTSGRange(unittest.TestCase):
+
+    def setUp(self):
+        self.box = Box(57.870760, -133.540154, 46.173395, -129.055971, 1250, 125)
+        self.days = []
+        for day in (1, 2, 3):
+            ftsg = FeatureTimeSpaceGrid(self.box, np.array(['feat1', 'feat2']), datetime(2020, 7, day),
+                                        datetime(2020, 7, day + 1), 6)
+            ftsg.populate_space_grid('feat2', datetime(2020, 7, day, 12), np.array([[day, day]]),
+                                     np.array([float(day)]))
+            self.days.append(ftsg)
+
+    def testOpenRange(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Mix of formats, read the same
+            self.days[0].save(temp_dir, 'test_')
+            self.days[1].save_chunked(temp_dir, 'test_')
+            self.days[2].save(temp_dir, 'test_')
+
+            grid = open_ftsg_range(temp_dir, 'test_', datetime(2020, 7, 1, 6), datetime(2020, 7, 3, 12))
+            self.assertEqual(grid.dims, ('feature', 'time', 'row', 'col'))
+            self.assertEqual(grid.shape, (2, 9, 10, 10))
+            self.assertEqual(grid.time.values[0], np.datetime64('2020-07-01T12:00'))
+            self.assertEqual(grid.time.values[-1], np.datetime64('2020-07-03T12:00'))
+            self.assertEqual(grid.lat.shape, (10, 10))
+
+            selected = grid.sel(feature='feat2', time=np.datetime64('2020-07-02T12:00'))
+            self.assertEqual(float(selected[2, 2]), 2)
+            self.assertEqual(float(grid.isel(time=slice(0, 9, 4)).sum()), 1 + 2 + 3)
+            self.assertTrue(np.isnan(grid.sel(feature='feat1').values).all())
+
+            with self.assertRaises(FileNotFoundError):
+                open_ftsg_range(temp_dir, 'test_', datetime(2020, 8, 1), datetime(2020, 8, 2))
+
+    def testChunkedReaderOpenedOnce(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for ftsg in self.days:
+                ftsg.save_chunked(temp_dir, 'test_')
+            with mock.patch.object(ftsg_range, 'ChunkedGridReader',
+                                   wraps=ftsg_range.ChunkedGridReader) as reader_class:
+                grid = open_ftsg_range(temp_dir, 'test_', datetime(2020, 7, 1), datetime(2020, 7, 4))
+                for time_index in range(grid.time.size):
+                    grid.isel(time=time_index).values
+                self.assertEqual(float(grid.sum()), 1 + 2 + 3)
+                # One reader per day, first day's kept from opening
+                self.assertEqual(reader_class.call_count, 3)
+
+    def testResampleRange(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for ftsg in self.days:
+                ftsg.save(temp_dir, 'test_')
+            # 48 h windows spanning two daily files, noon of day 4 never saved
+            resampled = resample_ftsg_range(temp_dir, 'test_', datetime(2020, 7, 1),
+                                            datetime(2020, 7, 5), 48, how='sum')
+            self.assertEqual(resampled.get_grid().shape, (2, 2, 10, 10))
+            self.assertEqual(resampled.get_grid()[1, 0, 1, 1], 1)
+            self.assertEqual(resampled.get_grid()[1, 0, 2, 2], 2)
+            self.assertEqual(resampled.get_grid()[1, 1, 3, 3], 3)
+            self.assertEqual(np.count_nonzero(~np.isnan(resampled.get_grid())), 3)
+
+            with self.assertRaises(ValueError):
+                resample_ftsg_range(temp_dir, 'test_', datetime(2020, 7, 1), datetime(2020, 7, 2), 5)
+            with self.assertRaises(ValueError):
+                resample_ftsg_range(temp_dir, 'test_', datetime(2020, 7, 1), datetime(2020, 7, 2), 3)
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
@@ -0,0 +1,40 @@
+import unittest
+import numpy as np
+from geopy.distance import distance
+from smoke.box.geodesic import (SPHERICAL_MAX_RELATIVE_ERROR, distances_to_points,
+                                geodesic_distance, vincenty_distance)
+
+
+class testGeodesic(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.lat = rng.uniform(45, 62, 100)
+        self.lon = rng.uniform(-140, -110, 100)
+        self.ref_lats = [57.870760, 46.173395]
+        self.ref_lons = [-133.540154, -129.055971]
+
+    def testVincentyMatchesGeopy(self):
+        dists = distances_to_points(self.lat, self.lon, self.ref_lats, self.ref_lons)
+        self.assertEqual(dists.shape, (2, 100))
+        for i, ref in enumerate(zip(self.ref_lats, self.ref_lons)):
+            check = [distance(ref, (lat, lon)).km for lat, lon in zip(self.lat, self.lon)]
+            np.testing.assert_allclose(dists[i], check, atol=1e-6)
+
+    def testSphericalWithinErrorBound(self):
+        vincenty = geodesic_distance(self.ref_lats[0], self.ref_lons[0], self.lat, self.lon)
+        spherical = geodesic_distance(self.ref_lats[0], self.ref_lons[0], self.lat, self.lon,
+                                      method='spherical')
+        self.assertLessEqual(np.max(np.abs(spherical - vincenty) / vincenty),
+                             SPHERICAL_MAX_RELATIVE_ERROR)
+
+    def testDegenerateAndAntipodal(self):
+        self.assertEqual(vincenty_distance(53.9, -122.8, 53.9, -122.8), 0)
+        self.assertAlmostEqual(float(vincenty_distance(0, 0, 0.5, 179.7)),
+                               distance((0, 0), (0.5, 179.7)).km, places=6)
+        with self.assertRaises(ValueError):
+            geodesic_distance(0, 0, 1, 1, method='flat')
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
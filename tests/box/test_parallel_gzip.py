@@ -0,0 +1,32 @@
+import os
+import gzip
+import unittest
+import tempfile
+import numpy as np
+from smoke.box import parallel_gzip
+
+
+class testParallelGzip(unittest.TestCase):
+
+    def setUp(self):
+        self.data = np.random.RandomState(0).randint(0, 4, 100000).astype(np.uint8).tobytes()
+
+    def testCompressBlocks(self):
+        compressed = parallel_gzip.compress(self.data, block_size=30000, threads=3)
+        # Every block is its own gzip member, readable by the standard gzip module
+        self.assertEqual(gzip.decompress(compressed), self.data)
+        self.assertEqual(parallel_gzip.decompress(compressed), self.data)
+        self.assertEqual(parallel_gzip.decompress(parallel_gzip.compress(b'')), b'')
+
+    def testWriteAtomic(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'data.gz')
+            parallel_gzip.write_atomic(file_path, b'old')
+            parallel_gzip.write_atomic(file_path, parallel_gzip.compress(self.data))
+            self.assertEqual(os.listdir(temp_dir), ['data.gz'])
+            with gzip.open(file_path, 'rb') as f_gz:
+                self.assertEqual(f_gz.read(), self.data)
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)
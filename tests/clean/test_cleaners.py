@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+import xarray as xr
+from datetime import datetime
+
+from smoke.clean.cleaners import BCBox, GeneralConversionCleaner
+
+
+class StubDataset:
+    # Parsed dataset of one time with each feature's data on a lat, lon mesh
+    def __init__(self, feature_values):
+        self.feature_values = feature_values
+
+    def get_feature_data_array(self, feature):
+        lat = np.array([53.9, 54.0])
+        lon = np.array([-122.8, -122.7])
+        return xr.DataArray(
+            np.full((1, lat.size, lon.size), self.feature_values[feature]),
+            dims=('time', 'lat', 'lon'),
+            coords={'time':[np.datetime64('2020-07-01T05')], 'lat':lat, 'lon':lon}
+        )
+
+
+class StubParser:
+    def parse_file(self, file_path, dtype=None):
+        return StubDataset({'feat1': 1., 'feat2': 2.})
+
+
+class TwoFeatureCleaner(GeneralConversionCleaner):
+    file_name_regex = r"^stub$"
+    file_name_datetime_regex = r"stub"
+    file_name_datetime_fmt = "stub"
+    expected_features_array = np.array(['feat1', 'feat2'])
+    parser = StubParser()
+    requires_mesh = True
+    assignment_method = 'kdtree'
+
+
+class testGeneralConversionCleaner(unittest.TestCase):
+
+    def testEveryFeaturePopulated(self):
+        # Every feature is converted, not only the first
+        ftsg = TwoFeatureCleaner().convert_files_tofeaturetimespacegrid(
+            ['stub'], BCBox(25), datetime(2020, 7, 1), datetime(2020, 7, 2), 6
+        )
+        grid = ftsg.get_grid()
+        for feature_index, value in enumerate((1., 2.)):
+            feature_values = grid[feature_index][~np.isnan(grid[feature_index])]
+            self.assertGreater(feature_values.size, 0)
+            self.assertTrue((feature_values == value).all())
+
+
+if __name__ == "__main__":
+    unittest.main(argv=["first-arg-is-ignored"], exit=False)